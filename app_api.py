@@ -1,11 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Dict
-import joblib
-import numpy as np
+from typing import List, Dict, Optional
 from pathlib import Path
+import asyncio
 import logging
+from contextlib import contextmanager
+
+from src.models.flat_artifact import load_serving_models
+from src.api.prefork import preloaded_models
+from src.models.inference import build_predictions, compute_statistics
+from src.models.features import vectorizer_info
+from src.api.worker_pool import InferencePool, PoolSaturatedError
+from src.api.batching import MicroBatcher
+from src.api.cache import create_cache_from_env, predict_with_cache
+from src.api.streaming import DuplexStreamingResponse, RequestBody, stream_predictions
+from src.api.responses import MsgPackResponse, compact_response, wants_msgpack
+from src.api.compression import CompressionMiddleware, compression_options_from_env
+from src.models.artifacts import read_model_version
+from src.api.metrics import MetricsMiddleware, ServingMetrics, mark_handler_done, mark_handler_start
+from src.api.hot_reload import ModelReloader, ModelValidationError, ReloadInProgressError, check_admin_token
+from src.api.video_store import VIDEO_ID_RE, VideoStore, append_comments, session_key
 
 # Configuration
 logging.basicConfig(level=logging.INFO)
@@ -29,6 +44,13 @@ class BatchPredictionResponse(BaseModel):
     statistics: Dict[str, float]
     total_comments: int
 
+class VideoComment(BaseModel):
+    id: str = Field(..., min_length=1, max_length=128)
+    text: str = Field(..., min_length=1, max_length=5000)
+
+class VideoCommentsBatch(BaseModel):
+    comments: List[VideoComment] = Field(..., min_items=1, max_items=1000)
+
 # App
 app = FastAPI(
     title="YouTube Sentiment Analysis API",
@@ -45,22 +67,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression gzip/brotli des réponses, requêtes gzip acceptées
+app.add_middleware(CompressionMiddleware, **compression_options_from_env())
+
+# Métriques Prometheus (/metrics), enregistrées sans verrou sur la boucle d'événements
+metrics = ServingMetrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Variables globales
 vectorizer = None
 model = None
-SENTIMENT_LABELS = {0: "Négatif", 1: "Neutre", 2: "Positif"}
+scorer = None  # SVC linéaire compilé, ou le modèle lui-même
+inference_pool = None
+batcher = None
+prediction_cache = None
+model_version = None
+model_type = None
+artifact_format = None  # "flat" (mmap) ou "joblib"
+reloader = None
+video_store = None  # prédictions et agrégats par vidéo (SQLite)
+
+# Jauges lues au moment du scrape
+metrics.gauge("sentiment_inference_in_flight", "Batchs en cours ou en attente dans le pool", lambda: inference_pool.in_flight)
+metrics.gauge("sentiment_inference_queued", "Batchs en attente d'un worker", lambda: inference_pool.stats()["queued"])
+metrics.gauge("sentiment_microbatch_pending_comments", "Commentaires en attente de micro-batch", lambda: batcher.stats()["pending_comments"])
+metrics.gauge("sentiment_prediction_cache_entries", "Entrées du cache de prédictions", lambda: prediction_cache.stats()["size"])
+metrics.gauge("sentiment_prediction_cache_hit_ratio", "Taux de hits du cache de prédictions", lambda: prediction_cache.stats()["hit_rate"])
+
+async def run_inference(texts):
+    """Un appel vectorize + predict pour un micro-batch regroupé"""
+    result = await inference_pool.predict(vectorizer, scorer, texts)
+    metrics.observe_inference(result, len(texts))
+    return result
+
+async def predict_cached(texts):
+    return await predict_with_cache(prediction_cache, batcher.predict, texts)
+
+@contextmanager
+def inference_errors():
+    """503 + Retry-After si le pool d'inférence est saturé, 500 pour les autres erreurs"""
+    try:
+        yield
+    except PoolSaturatedError as e:
+        metrics.errors.inc("pool_saturated")
+        logger.warning(f"Backpressure: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        metrics.errors.inc("prediction")
+        logger.error(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def swap_models(serving, new_version):
+    """Échange atomique : aucun await entre les affectations des globales"""
+    global vectorizer, model, scorer, model_type, artifact_format, model_version
+    # Les workers process chargent depuis le disque : les démarrer avant l'échange
+    await inference_pool.reload(Path("models"))
+    vectorizer, model, scorer = serving.vectorizer, serving.model, serving.scorer
+    model_type, artifact_format = serving.model_type, serving.artifact_format
+    model_version = new_version
+    prediction_cache.set_model_version(new_version)
 
 @app.on_event("startup")
 async def load_models():
     """Charge les modèles au démarrage"""
-    global vectorizer, model
+    global vectorizer, model, scorer, inference_pool, batcher
+    global prediction_cache, model_version, model_type, artifact_format, reloader, video_store
     
     try:
         logger.info(" Chargement des modèles...")
         
         models_dir = Path("models")
-        vectorizer = joblib.load(models_dir / "tfidf_vectorizer.joblib")
-        model = joblib.load(models_dir / "sentiment_model.joblib")
+        # Sous le lanceur preforking, les modèles sont hérités du parent
+        serving = preloaded_models() or load_serving_models(models_dir)
+        vectorizer, model, scorer = serving.vectorizer, serving.model, serving.scorer
+        model_type, artifact_format = serving.model_type, serving.artifact_format
+        inference_pool = InferencePool.from_env(models_dir)
+        batcher = MicroBatcher.from_env(run_inference)
+        
+        model_version = read_model_version(models_dir)
+        prediction_cache = create_cache_from_env(model_version)
+        reloader = ModelReloader.from_env(models_dir, swap_models, model_version)
+        video_store = VideoStore.from_env()
         
         logger.info(" Modèles chargés avec succès!")
         
@@ -68,6 +155,15 @@ async def load_models():
         logger.error(f" Erreur: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_pool():
+    if reloader is not None:
+        reloader.stop_watching()
+    if inference_pool is not None:
+        inference_pool.shutdown()
+    if video_store is not None:
+        video_store.close()
+
 @app.get("/")
 async def root():
     return {
@@ -83,58 +179,146 @@ async def health_check():
     
     return {
         "status": "healthy",
-        "model_type": type(model).__name__,
-        "vocabulary_size": len(vectorizer.vocabulary_)
+        "model_type": model_type,
+        "artifact_format": artifact_format,
+        "compiled_scorer": hasattr(scorer, "proba_from_decision"),
+        **vectorizer_info(vectorizer),
+        "inference_pool": inference_pool.stats(),
+        "micro_batching": batcher.stats(),
+        "model_version": model_version,
+        "prediction_cache": prediction_cache.stats(),
+        "hot_reload": reloader.stats()
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text format"""
+    return metrics.response()
+
+@app.post("/admin/reload")
+async def reload_models(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """Recharge les modèles depuis models/ sans redémarrage (ce worker uniquement)"""
+    if not check_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin disabled or invalid token")
+    
+    try:
+        return await reloader.reload(force=force)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ModelValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Reload error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/predict_batch", response_model=BatchPredictionResponse)
-async def predict_batch(batch: PredictionBatch):
+async def predict_batch(batch: PredictionBatch, request: Request, compact: bool = False, probabilities: bool = False):
     if vectorizer is None or model is None:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
-    try:
+    with inference_errors():
         texts = [comment.text for comment in batch.comments]
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(texts))
         
-        # Vectorisation et prédiction
-        X = vectorizer.transform(texts)
-        predictions = model.predict(X)
-        probabilities = model.predict_proba(X)
+        # Cache des textes déjà vus, micro-batching des manquants avec les
+        # requêtes concurrentes, puis prédiction hors de la boucle d'événements
+        result = await predict_cached(texts)
         
-        # Construction des résultats
-        results = []
-        sentiment_counts = {0: 0, 1: 0, 2: 0}
+        # Statistiques vectorisées (bincount, percentiles, entropie) puis
+        # construction des résultats
+        # (conversions en bloc, sans opération NumPy par commentaire ; les
+        # dicts sont validés une seule fois par le response_model)
+        with metrics.stage("assembly"):
+            statistics = compute_statistics(result)
+            results = None if compact else build_predictions(texts, result)
         
-        for text, pred, proba in zip(texts, predictions, probabilities):
-            confidence = float(np.max(proba))
-            sentiment = SENTIMENT_LABELS[pred]
-            
-            results.append(SentimentPrediction(
-                text=text,
-                sentiment=sentiment,
-                confidence=confidence,
-                label=int(pred)
-            ))
-            
-            sentiment_counts[pred] += 1
+        # Mode compact : tableaux parallèles, sans écho du texte
+        if compact:
+            # Étape `serialization` mesurée par le middleware, comme les autres réponses
+            mark_handler_done(request)
+            return compact_response(result, statistics, include_probabilities=probabilities,
+                                    binary=wants_msgpack(request))
         
-        # Statistiques
         total = len(texts)
-        statistics = {
-            "negative_percentage": round((sentiment_counts[0] / total) * 100, 2),
-            "neutral_percentage": round((sentiment_counts[1] / total) * 100, 2),
-            "positive_percentage": round((sentiment_counts[2] / total) * 100, 2),
-            "average_confidence": round(float(np.mean([r.confidence for r in results])), 4)
-        }
         
-        return BatchPredictionResponse(
-            predictions=results,
-            statistics=statistics,
-            total_comments=total
+        mark_handler_done(request)
+        response = {
+            "predictions": results,
+            "statistics": statistics,
+            "total_comments": total
+        }
+        # MessagePack si demandé (en-tête Accept), JSON sinon
+        if wants_msgpack(request):
+            return MsgPackResponse(response)
+        return response
+
+@app.post("/predict_stream")
+async def predict_stream(request: Request):
+    """NDJSON en entrée ({"text": ...} par ligne), NDJSON en sortie, sans limite de taille"""
+    if vectorizer is None or model is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    
+    # Pool saturé : 503 avant de commencer la réponse, comme /predict_batch
+    with inference_errors():
+        inference_pool.check_capacity()
+    
+    body = RequestBody(request.receive)
+    return DuplexStreamingResponse(
+        stream_predictions(body, predict_cached),
+        request_body=body,
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/videos/{video_id}/comments")
+async def append_video_comments(video_id: str, batch: VideoCommentsBatch, request: Request):
+    """Ajoute des commentaires {id, text} à une vidéo ; seuls les ids inconnus sont prédits"""
+    if vectorizer is None or model is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    if not VIDEO_ID_RE.match(video_id):
+        raise HTTPException(status_code=422, detail="Invalid video id")
+    
+    with inference_errors():
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(batch.comments))
+        response = await append_comments(
+            video_store, video_id,
+            [(comment.id, comment.text) for comment in batch.comments],
+            predict_cached, model_version
         )
-        
-    except Exception as e:
-        logger.error(f"Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        mark_handler_done(request)
+        return {"video_id": video_id, **response}
+
+@app.get("/videos/{video_id}/summary")
+async def video_summary(video_id: str):
+    """Agrégats de la vidéo, lus en une ligne (O(1) quelle que soit la taille du fil)"""
+    # Refuse aussi les clés `session:<id>` des sessions de l'extension
+    if not VIDEO_ID_RE.match(video_id):
+        raise HTTPException(status_code=422, detail="Invalid video id")
+    summary = await asyncio.to_thread(video_store.summary, video_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Unknown video")
+    return {"video_id": video_id, **summary}
+
+@app.post("/sessions/{session_id}/comments")
+async def append_session_comments(session_id: str, batch: VideoCommentsBatch, request: Request):
+    """Protocole delta de l'extension : seuls les nouveaux commentaires sont envoyés, fusionnés par session"""
+    if vectorizer is None or model is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    if not VIDEO_ID_RE.match(session_id):
+        raise HTTPException(status_code=422, detail="Invalid session id")
+    
+    with inference_errors():
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(batch.comments))
+        await asyncio.to_thread(video_store.purge_sessions)
+        response = await append_comments(
+            video_store, session_key(session_id),
+            [(comment.id, comment.text) for comment in batch.comments],
+            predict_cached, model_version
+        )
+        mark_handler_done(request)
+        return {"session_id": session_id, **response}
 
 if __name__ == "__main__":
     import uvicorn
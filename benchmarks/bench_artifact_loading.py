@@ -0,0 +1,109 @@
+"""Compare le chargement des pickles joblib et du bundle plat en mmap.
+
+Pour chaque format : temps de démarrage à froid (import + chargement +
+première prédiction) et mémoire de N workers chargés en parallèle, comme
+les processus du pool d'inférence. La PSS répartit les pages partagées
+entre les processus qui les mappent : avec le bundle plat, l'IDF et les
+coefficients ne sont comptés qu'une fois via le cache de pages.
+
+    python -m benchmarks.bench_artifact_loading [--workers 4]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+WORKER_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import joblib
+from pathlib import Path
+from src.models.flat_artifact import load_flat_artifact
+from src.models.inference import predict_texts
+from src.models.linear_scorer import load_scorer
+imported = time.perf_counter()
+
+models_dir = Path(sys.argv[2])
+if sys.argv[1] == "flat":
+    _, vectorizer, scorer = load_flat_artifact(models_dir / "serving")
+else:
+    vectorizer = joblib.load(models_dir / "tfidf_vectorizer.joblib")
+    scorer = load_scorer(models_dir, joblib.load(models_dir / "sentiment_model.joblib"))
+loaded = time.perf_counter()
+predict_texts(vectorizer, scorer, ["great video", "boring"])
+print(json.dumps({
+    "load_ms": (loaded - imported) * 1000,
+    "cold_start_ms": (time.perf_counter() - start) * 1000
+}), flush=True)
+sys.stdin.read()  # Rester vivant pendant la mesure de la mémoire
+"""
+
+
+def smaps_rollup(pid):
+    """Rss / Pss / privé en Mo, d'après /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "private_mb": fields["Private_Clean"] + fields["Private_Dirty"]
+    }
+
+
+def measure_format(artifact_format, models_dir, n_workers):
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_PROBE, artifact_format, str(models_dir)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        timings = [json.loads(w.stdout.readline()) for w in workers]
+        memory = [smaps_rollup(w.pid) for w in workers]
+    finally:
+        for w in workers:
+            w.stdin.close()
+            w.wait()
+
+    return {
+        "format": artifact_format,
+        "load_ms": min(t["load_ms"] for t in timings),
+        "cold_start_ms": min(t["cold_start_ms"] for t in timings),
+        "rss_per_worker_mb": sum(m["rss_mb"] for m in memory) / n_workers,
+        "private_per_worker_mb": sum(m["private_mb"] for m in memory) / n_workers,
+        "pss_total_mb": sum(m["pss_mb"] for m in memory)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    formats = ["joblib"]
+    if (models_dir / "serving" / "header.json").exists():
+        formats.append("flat")
+    else:
+        print(" Bundle plat absent : relancer l'entraînement pour l'exporter")
+
+    reports = [measure_format(f, models_dir, args.workers) for f in formats]
+
+    columns = ["load_ms", "cold_start_ms", "rss_per_worker_mb", "private_per_worker_mb", "pss_total_mb"]
+    print("\n" + "=" * 60)
+    print(f" CHARGEMENT DES ARTEFACTS ({args.workers} workers)")
+    print("=" * 60)
+    print(f"{'':>22}" + "".join(f"{r['format']:>12}" for r in reports))
+    for column in columns:
+        print(f"{column:>22}" + "".join(f"{r[column]:>12.2f}" for r in reports))
+
+
+if __name__ == "__main__":
+    main()
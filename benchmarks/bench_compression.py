@@ -0,0 +1,104 @@
+"""Octets sur le fil et latence de bout en bout d'un fil de 5k commentaires.
+
+Le fil est envoyé à `/predict_batch` en batchs de 100, séquentiellement
+(comme l'extension), pour chaque combinaison de format de réponse (complet
+ou compact, JSON ou MessagePack) et d'encodage (aucun, gzip, brotli). Les
+corps de requête sont compressés en gzip dès qu'un encodage est demandé.
+
+La latence mesurée en local ne reflète pas le coût du réseau : une latence
+projetée ajoute le temps de transfert des octets mesurés sur un lien de
+`--bandwidth-mbps`.
+
+    python -m benchmarks.bench_compression [--comments 5000 --bandwidth-mbps 10]
+"""
+import argparse
+import gzip
+import json
+import time
+
+import httpx
+
+from benchmarks.bench_serving import free_port, load_corpus, start_server
+from src.api.compression import brotli
+from src.api.responses import msgpack
+
+BATCH_SIZE = 100
+
+
+def thread_corpus(path, n_comments):
+    """Textes uniques (suffixe d'index) : aucun hit du cache de prédictions"""
+    texts = load_corpus(path)
+    return [f"{texts[i % len(texts)]} #{i}" for i in range(n_comments)]
+
+
+def run_variant(http, url, texts, compact, binary, encoding):
+    headers = {"Content-Type": "application/json", "Accept-Encoding": encoding or "identity"}
+    if binary:
+        headers["Accept"] = "application/msgpack"
+    if encoding:
+        headers["Content-Encoding"] = "gzip"
+    params = {"compact": "true"} if compact else {}
+
+    sent = received = 0
+    start = time.perf_counter()
+    for offset in range(0, len(texts), BATCH_SIZE):
+        body = json.dumps({"comments": [{"text": t} for t in texts[offset:offset + BATCH_SIZE]]}).encode()
+        if encoding:
+            body = gzip.compress(body, compresslevel=6)
+        response = http.post(f"{url}/predict_batch", params=params, content=body, headers=headers)
+        response.raise_for_status()
+        response.read()
+        sent += len(body)
+        received += response.num_bytes_downloaded
+    return {"request_bytes": sent, "response_bytes": received, "elapsed_s": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app_api:app")
+    parser.add_argument("--corpus", default="data/processed/test.csv")
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--bandwidth-mbps", type=float, default=10.0)
+    parser.add_argument("--output", help="rapport JSON")
+    args = parser.parse_args()
+
+    texts = thread_corpus(args.corpus, args.comments)
+    encodings = [None, "gzip"] + (["br"] if brotli is not None else [])
+    binaries = [False] + ([True] if msgpack is not None else [])
+
+    server, url = start_server(args.app, free_port(), {"PREDICTION_CACHE_SIZE": "0"})
+    reports = []
+    try:
+        with httpx.Client(timeout=120) as http:
+            run_variant(http, url, texts[:BATCH_SIZE], False, False, None)  # chauffe
+            for compact in (False, True):
+                for binary in binaries:
+                    for encoding in encodings:
+                        report = run_variant(http, url, texts, compact, binary, encoding)
+                        wire_bytes = report["request_bytes"] + report["response_bytes"]
+                        report.update({
+                            "format": ("compact" if compact else "complet") + ("/msgpack" if binary else "/json"),
+                            "encoding": encoding or "identity",
+                            "projected_s": report["elapsed_s"] + wire_bytes * 8 / (args.bandwidth_mbps * 1e6)
+                        })
+                        reports.append(report)
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = reports[0]
+    print(f"\n{args.comments} commentaires, batchs de {BATCH_SIZE}, lien projeté {args.bandwidth_mbps:g} Mbit/s")
+    print(f"{'format':<18}{'encodage':<10}{'requête (ko)':>14}{'réponse (ko)':>14}"
+          f"{'local (s)':>11}{'projeté (s)':>13}{'octets':>9}")
+    for r in reports:
+        ratio = (r["request_bytes"] + r["response_bytes"]) / (baseline["request_bytes"] + baseline["response_bytes"])
+        print(f"{r['format']:<18}{r['encoding']:<10}{r['request_bytes'] / 1e3:>14.1f}{r['response_bytes'] / 1e3:>14.1f}"
+              f"{r['elapsed_s']:>11.2f}{r['projected_s']:>13.2f}{ratio:>8.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"comments": args.comments, "bandwidth_mbps": args.bandwidth_mbps, "variants": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
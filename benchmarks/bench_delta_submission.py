@@ -0,0 +1,99 @@
+"""Clics successifs de l'extension : renvoi complet vs protocole delta.
+
+Simule un utilisateur qui scrolle : chaque clic voit `--step` commentaires
+de plus que le précédent. Le mode `full` renvoie toute la page à
+`/predict_stream` (comportement d'origine), le mode `delta` n'envoie que les
+nouveaux commentaires à `/sessions/{id}/comments`. On mesure la taille des
+requêtes et le temps CPU du serveur par clic (cache de prédictions désactivé).
+
+    python -m benchmarks.bench_delta_submission [--clicks 25 --step 20]
+"""
+import argparse
+import hashlib
+import json
+import uuid
+
+import httpx
+
+from benchmarks.bench_serving import free_port, load_corpus, server_usage, start_server
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def full_click(http, url, page):
+    body = "\n".join(json.dumps({"text": text}) for text in page).encode()
+    response = http.post(f"{url}/predict_stream", content=body,
+                         headers={"Content-Type": "application/x-ndjson"})
+    response.raise_for_status()
+    return len(body)
+
+
+def delta_click(http, url, session_id, new_comments):
+    body = json.dumps({
+        "comments": [{"id": content_hash(text), "text": text} for text in new_comments]
+    }).encode()
+    response = http.post(f"{url}/sessions/{session_id}/comments", content=body,
+                         headers={"Content-Type": "application/json"})
+    response.raise_for_status()
+    return len(body)
+
+
+def run_mode(mode, url, pid, corpus, clicks, step):
+    session_id = uuid.uuid4().hex
+    reports = []
+    with httpx.Client(timeout=60) as http:
+        for click in range(1, clicks + 1):
+            page = corpus[:click * step]
+            cpu_before = server_usage(pid)[0]
+            if mode == "full":
+                size = full_click(http, url, page)
+            else:
+                size = delta_click(http, url, session_id, page[-step:])
+            reports.append({
+                "click": click,
+                "page_comments": len(page),
+                "request_bytes": size,
+                "server_cpu_ms": (server_usage(pid)[0] - cpu_before) * 1000
+            })
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app_api:app")
+    parser.add_argument("--corpus", default="data/processed/test.csv")
+    parser.add_argument("--clicks", type=int, default=25)
+    parser.add_argument("--step", type=int, default=20, help="nouveaux commentaires par clic")
+    args = parser.parse_args()
+
+    corpus = list(dict.fromkeys(load_corpus(args.corpus)))
+    if len(corpus) < args.clicks * args.step:
+        raise ValueError(f"Corpus trop petit: {len(corpus)} < {args.clicks * args.step}")
+
+    env = {"PREDICTION_CACHE_SIZE": "0", "VIDEO_STORE_PATH": ":memory:"}
+    server, url = start_server(args.app, free_port(), env)
+    try:
+        results = {mode: run_mode(mode, url, server.pid, corpus, args.clicks, args.step)
+                   for mode in ("full", "delta")}
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\n{'clic':>5}{'page':>7}{'full (octets)':>15}{'delta (octets)':>16}"
+          f"{'full CPU (ms)':>15}{'delta CPU (ms)':>16}")
+    for full, delta in zip(results["full"], results["delta"]):
+        if full["click"] in (1, 2, 5) or full["click"] % 5 == 0:
+            print(f"{full['click']:>5}{full['page_comments']:>7}{full['request_bytes']:>15}"
+                  f"{delta['request_bytes']:>16}{full['server_cpu_ms']:>15.1f}{delta['server_cpu_ms']:>16.1f}")
+
+    totals = {mode: (sum(r["request_bytes"] for r in reports), sum(r["server_cpu_ms"] for r in reports))
+              for mode, reports in results.items()}
+    print(f"\n Total : {totals['full'][0]} -> {totals['delta'][0]} octets "
+          f"(x{totals['full'][0] / totals['delta'][0]:.1f}), "
+          f"{totals['full'][1]:.0f} -> {totals['delta'][1]:.0f} ms CPU serveur")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare les modes de features TF-IDF (vocabulaire) et hashing + IDF.
+
+Pour chaque mode : accuracy/F1 du SVM de production sur le split de test,
+débit de `transform`, taille de l'artefact, temps de chargement et RSS
+ajoutée par le chargement dans un processus neuf (comme un worker).
+
+    python -m benchmarks.bench_feature_modes [--skip-training]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+from sklearn.metrics import accuracy_score, f1_score
+
+from src.models.features import FEATURE_MODES
+from src.models.train_model import SentimentModelTrainer
+
+# Mesure faite dans un interpréteur neuf pour isoler le coût du chargement
+LOAD_PROBE = """
+import json, sys, time
+import sklearn.feature_extraction.text, sklearn.pipeline, joblib
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+before = rss_kb()
+start = time.perf_counter()
+joblib.load(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"load_ms": elapsed * 1000, "rss_mb": (rss_kb() - before) / 1024}))
+"""
+
+
+def measure_load(path, repeat=3):
+    runs = [
+        json.loads(subprocess.check_output([sys.executable, "-c", LOAD_PROBE, str(path)]))
+        for _ in range(repeat)
+    ]
+    return {
+        "load_ms": min(r["load_ms"] for r in runs),
+        "rss_mb": min(r["rss_mb"] for r in runs)
+    }
+
+
+def measure_transform(vectorizer, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectorizer.transform(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+def benchmark_mode(mode, train_path, test_path, skip_training, workdir):
+    trainer = SentimentModelTrainer(feature_mode=mode)
+    trainer.load_data(train_path, test_path)
+    trainer.create_vectorizer()
+
+    report = {"mode": mode, "n_features": trainer.X_train_vec.shape[1]}
+
+    if not skip_training:
+        model = trainer.train_svm()
+        y_pred = model.predict(trainer.X_test_vec)
+        report["accuracy"] = accuracy_score(trainer.y_test, y_pred)
+        report["f1_score"] = f1_score(trainer.y_test, y_pred, average='weighted')
+
+    path = Path(workdir) / f"vectorizer_{mode}.joblib"
+    joblib.dump(trainer.vectorizer, path)
+    report["artifact_mb"] = path.stat().st_size / 1e6
+    report["transform_per_s"] = measure_transform(trainer.vectorizer, list(trainer.X_test))
+    report.update(measure_load(path))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train", default="data/processed/train.csv")
+    parser.add_argument("--test", default="data/processed/test.csv")
+    parser.add_argument("--skip-training", action="store_true", help="ne pas entraîner le SVM (pas d'accuracy)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        reports = [
+            benchmark_mode(mode, args.train, args.test, args.skip_training, workdir)
+            for mode in FEATURE_MODES
+        ]
+
+    columns = ["n_features", "accuracy", "f1_score", "transform_per_s", "artifact_mb", "load_ms", "rss_mb"]
+    print("\n" + "=" * 60)
+    print(" COMPARAISON DES MODES DE FEATURES")
+    print("=" * 60)
+    print(f"{'':>16}" + "".join(f"{r['mode']:>14}" for r in reports))
+    for column in columns:
+        values = [r.get(column) for r in reports]
+        print(f"{column:>16}" + "".join(
+            f"{v:>14.4f}" if isinstance(v, float) else f"{str(v if v is not None else '-'):>14}"
+            for v in values
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Débit du featurizer : nettoyage puis vectoriseur sklearn vs analyseur fusionné.
+
+- deux étapes : `clean_text` puis l'analyseur sklearn d'origine (minuscules,
+  accents, regex de tokens), ce que voyait l'entraînement ;
+- API d'origine : texte brut directement dans le vectoriseur d'origine ;
+- fusionné : `create_vectorizer` avec `CommentAnalyzer`, sur le texte brut.
+
+Les vectoriseurs sont entraînés sur les mêmes commentaires ; on vérifie que
+la matrice fusionnée est identique à celle des deux étapes et on compte les
+lignes où l'API d'origine s'en écartait.
+
+    python -m benchmarks.bench_featurizer [--size 200000] [--fit-size 50000]
+"""
+import argparse
+import time
+
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from benchmarks.bench_text_cleaner import synthetic_comments
+from src.data.text_cleaning import clean_text
+from src.models.features import FEATURE_MODES, HASHING_N_FEATURES, create_vectorizer
+
+
+def legacy_vectorizer(mode):
+    """Vectoriseur d'origine, avec le prétraitement de sklearn"""
+    if mode == "tfidf":
+        return TfidfVectorizer(max_features=5000, ngram_range=(1, 2), min_df=2, max_df=0.95,
+                               strip_accents='unicode', lowercase=True)
+    return Pipeline([
+        ("hashing", HashingVectorizer(n_features=HASHING_N_FEATURES, ngram_range=(1, 2),
+                                      strip_accents='unicode', lowercase=True,
+                                      alternate_sign=False, norm=None)),
+        ("idf", TfidfTransformer())
+    ])
+
+
+def measure(fn, texts):
+    start = time.perf_counter()
+    output = fn(texts)
+    return output, len(texts) / (time.perf_counter() - start)
+
+
+def differing_rows(A, B):
+    return int(((A - B).getnnz(axis=1) > 0).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--fit-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    fit_texts = synthetic_comments(args.fit_size, seed=1)
+    texts = synthetic_comments(args.size)
+    print(f" {len(texts)} commentaires synthétiques bruts (entraînement: {len(fit_texts)})")
+
+    for mode in FEATURE_MODES:
+        legacy = legacy_vectorizer(mode).fit([clean_text(t) for t in fit_texts])
+        fused = create_vectorizer(mode).fit(fit_texts)
+
+        two_stage, two_stage_rate = measure(lambda t: legacy.transform([clean_text(x) for x in t]), texts)
+        raw, raw_rate = measure(legacy.transform, texts)
+        X, fused_rate = measure(fused.transform, texts)
+
+        assert differing_rows(X, two_stage) == 0, "Matrice différente du chemin en deux étapes"
+        print(f"\n [{mode}]")
+        print(f" Deux étapes (clean_text + sklearn) : {two_stage_rate:>10,.0f} commentaires/s")
+        print(f" API d'origine (texte brut)         : {raw_rate:>10,.0f} commentaires/s "
+              f"({differing_rows(raw, two_stage) / len(texts):.0%} des lignes différentes de l'entraînement)")
+        print(f" Fusionné (CommentAnalyzer)         : {fused_rate:>10,.0f} commentaires/s "
+              f"(x{fused_rate / two_stage_rate:.2f} vs deux étapes, identique)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Entraînement incrémental (SGD partial_fit) vs SVM batch de référence.
+
+Le SVM de production est entraîné une fois sur tout le split d'entraînement ;
+chaque variante incrémentale consomme le même split par mini-batchs. On
+compare accuracy/F1 sur le split de test, temps d'entraînement total et
+coût d'une mise à jour (un batch + checkpoint + publication).
+
+    python -m benchmarks.bench_incremental [--batch-size 10000]
+"""
+import argparse
+import tempfile
+import time
+
+from sklearn.metrics import accuracy_score, f1_score
+
+from src.data.stream_preprocess import read_split
+from src.models.incremental import IncrementalTrainer, iter_batches
+from src.models.train_model import SentimentModelTrainer
+
+VARIANTS = (("hashing", "log_loss"), ("hashing", "hinge"))
+
+
+def benchmark_svc(train_path, test_path):
+    trainer = SentimentModelTrainer(feature_mode="tfidf")
+    trainer.load_data(train_path, test_path)
+    start = time.perf_counter()
+    trainer.create_vectorizer()
+    model = trainer.train_svm()
+    elapsed = time.perf_counter() - start
+    y_pred = model.predict(trainer.X_test_vec)
+    return {
+        "name": "SVC batch (tfidf)",
+        "accuracy": accuracy_score(trainer.y_test, y_pred),
+        "f1_score": f1_score(trainer.y_test, y_pred, average='weighted'),
+        "train_s": elapsed,
+        "update_s": elapsed
+    }
+
+
+def benchmark_incremental(featurizer, loss, train_path, test, batch_size, models_dir):
+    trainer = IncrementalTrainer(featurizer, loss, models_dir=models_dir)
+    start = time.perf_counter()
+    update = 0.0
+    for df in iter_batches(train_path, batch_size):
+        batch_start = time.perf_counter()
+        trainer.partial_fit(df['text'], df['label'])
+        trainer.checkpoint()
+        update = time.perf_counter() - batch_start
+    publish_start = time.perf_counter()
+    trainer.publish()
+    publish = time.perf_counter() - publish_start
+    return {
+        "name": f"SGD {loss} ({featurizer})",
+        **trainer.evaluate(test['text'], test['label']),
+        "train_s": time.perf_counter() - start,
+        "update_s": update + publish,
+        "batches": trainer.n_batches
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--train", default="data/processed/train.csv")
+    parser.add_argument("--test", default="data/processed/test.csv")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    test = read_split(args.test)
+    reports = [benchmark_svc(args.train, args.test)]
+    for featurizer, loss in VARIANTS:
+        with tempfile.TemporaryDirectory() as models_dir:
+            reports.append(benchmark_incremental(
+                featurizer, loss, args.train, test, args.batch_size, models_dir
+            ))
+
+    baseline = reports[0]
+    print("\n" + "=" * 78)
+    print(" INCRÉMENTAL VS BATCH")
+    print("=" * 78)
+    print(f"{'':>26}{'accuracy':>10}{'F1':>10}{'ΔF1':>9}{'entraîn. (s)':>14}{'màj (s)':>9}")
+    for r in reports:
+        print(f"{r['name']:>26}{r['accuracy']:>10.4f}{r['f1_score']:>10.4f}"
+              f"{r['f1_score'] - baseline['f1_score']:>+9.4f}{r['train_s']:>14.2f}{r['update_s']:>9.2f}")
+    print("\n màj : coût pour intégrer un nouveau batch (refit complet pour le SVC)")
+
+
+if __name__ == "__main__":
+    main()
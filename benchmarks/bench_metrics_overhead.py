@@ -0,0 +1,53 @@
+"""Coût de l'enregistrement des métriques sur le chemin de prédiction.
+
+Rejoue les observations faites pour une requête `/predict_batch` (middleware,
+étapes, tailles de batch) et en déduit la part de CPU consommée à
+10 000 commentaires/s selon le nombre de commentaires par requête.
+
+    python -m benchmarks.bench_metrics_overhead
+"""
+import time
+
+from src.api.metrics import ServingMetrics
+from src.models.inference import SentimentResult
+
+TARGET_COMMENTS_PER_S = 10_000
+
+
+def record_request(metrics, result, n_comments):
+    """Mêmes appels que MetricsMiddleware + predict_batch + run_inference"""
+    start = time.perf_counter()
+    metrics.stage_latency.observe(time.perf_counter() - start, "parse")
+    metrics.observe_request(n_comments)
+    metrics.observe_inference(result, n_comments)
+    with metrics.stage("assembly"):
+        pass
+    metrics.stage_latency.observe(time.perf_counter() - start, "serialization")
+    metrics.requests.inc("/predict_batch", 200)
+    metrics.request_latency.observe(time.perf_counter() - start, "/predict_batch")
+
+
+def main(iterations=200_000):
+    metrics = ServingMetrics()
+    result = SentimentResult(labels=None, confidences=None, probabilities=None,
+                             timings={"transform": 0.0012, "predict_proba": 0.0004})
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        record_request(metrics, result, 100)
+    per_request = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print(f" Enregistrement : {per_request * 1e6:.2f} µs par requête")
+    print(f" Rendu de /metrics : {render_ms:.2f} ms par scrape")
+    for batch_size in (1, 10, 50, 100):
+        overhead = per_request * TARGET_COMMENTS_PER_S / batch_size
+        print(f" {TARGET_COMMENTS_PER_S} commentaires/s par requêtes de {batch_size:>3} : "
+              f"{overhead * 100:.3f}% d'un cœur")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Mémoire totale du serveur selon le nombre de workers, avec et sans préchargement.
+
+Pour N = 1..8 workers, lance `src.api.prefork` (modèles chargés une fois puis
+forkés) et `--no-preload` (chaque worker charge ses modèles, comme
+`uvicorn --workers`), envoie quelques prédictions puis somme la RSS et la
+PSS du parent et des workers. La somme des RSS compte plusieurs fois les
+pages partagées ; la PSS donne la mémoire réellement consommée.
+
+    python -m benchmarks.bench_prefork_memory [--app app_api:app] [--max-workers 8]
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.bench_artifact_loading import smaps_rollup
+
+COMMENTS = {"comments": [{"text": t} for t in ["great video", "so boring", "first!", "meh"] * 25]}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children_of(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def post(port, path, payload):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+def measure(app, n_workers, preload):
+    port = free_port()
+    command = [sys.executable, "-m", "src.api.prefork", app,
+               "--host", "127.0.0.1", "--port", str(port), "--workers", str(n_workers)]
+    if not preload:
+        command.append("--no-preload")
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # Laisser démarrer tous les workers, puis les faire tous prédire
+        time.sleep(2 + n_workers * 0.5)
+        for _ in range(n_workers * 8):
+            post(port, "/predict_batch", COMMENTS)
+        pids = [server.pid] + children_of(server.pid)
+        memory = [smaps_rollup(pid) for pid in pids]
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "rss_sum_mb": sum(m["rss_mb"] for m in memory),
+        "pss_total_mb": sum(m["pss_mb"] for m in memory),
+        "private_mb": sum(m["private_mb"] for m in memory)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app_api:app")
+    parser.add_argument("--max-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'rss par-worker':>16}{'pss par-worker':>16}{'rss prefork':>14}{'pss prefork':>14}")
+    for n in range(1, args.max_workers + 1):
+        baseline = measure(args.app, n, preload=False)
+        prefork = measure(args.app, n, preload=True)
+        print(f"{n:>8}{baseline['rss_sum_mb']:>16.1f}{baseline['pss_total_mb']:>16.1f}"
+              f"{prefork['rss_sum_mb']:>14.1f}{prefork['pss_total_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Micro-benchmark de l'assemblage des résultats de predict_batch.
+
+Compare l'ancienne boucle Python (np.max par ligne, compteur par dict,
+second passage pour la moyenne, un objet Pydantic par commentaire) à
+l'assemblage vectorisé actuel, à probabilités identiques, sans le modèle.
+Dans les deux cas FastAPI valide ensuite la réponse via le response_model ;
+ce coût commun est mesuré à part.
+
+    python -m benchmarks.bench_result_assembly
+"""
+import time
+from typing import Dict, List
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.models.inference import SENTIMENT_LABELS, SentimentResult, build_predictions, compute_statistics
+
+
+class SentimentPrediction(BaseModel):
+    text: str
+    sentiment: str
+    confidence: float
+    label: int
+
+
+def legacy_assembly(texts, predictions, probabilities):
+    """Implémentation d'origine de predict_batch"""
+    results = []
+    sentiment_counts = {0: 0, 1: 0, 2: 0}
+
+    for text, pred, proba in zip(texts, predictions, probabilities):
+        confidence = float(np.max(proba))
+        sentiment = SENTIMENT_LABELS[pred]
+        results.append(SentimentPrediction(
+            text=text,
+            sentiment=sentiment,
+            confidence=confidence,
+            label=int(pred)
+        ))
+        sentiment_counts[pred] += 1
+
+    total = len(texts)
+    statistics = {
+        "negative_percentage": round((sentiment_counts[0] / total) * 100, 2),
+        "neutral_percentage": round((sentiment_counts[1] / total) * 100, 2),
+        "positive_percentage": round((sentiment_counts[2] / total) * 100, 2),
+        "average_confidence": round(float(np.mean([r.confidence for r in results])), 4)
+    }
+    return results, statistics
+
+
+def vectorized_assembly(texts, probabilities):
+    """Implémentation actuelle : argmax/max en bloc, bincount, listes natives"""
+    best = probabilities.argmax(axis=1)
+    result = SentimentResult(
+        labels=best,
+        confidences=probabilities[np.arange(len(best)), best],
+        probabilities=probabilities
+    )
+    statistics = compute_statistics(result)
+    return build_predictions(texts, result), statistics
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[SentimentPrediction]
+    statistics: Dict[str, float]
+    total_comments: int
+
+
+def validate_response(results, statistics):
+    """Coût de validation du response_model, commun aux deux versions"""
+    return BatchPredictionResponse.model_validate({
+        "predictions": results,
+        "statistics": statistics,
+        "total_comments": len(results)
+    })
+
+
+def timeit(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'batch':>8} | {'avant (ms)':>11} | {'après (ms)':>11} | {'gain':>6} | {'validation (ms)':>15}")
+    print("-" * 64)
+
+    for size in (10, 100, 10_000):
+        probabilities = rng.dirichlet(np.ones(3), size=size)
+        predictions = probabilities.argmax(axis=1)
+        texts = [f"comment {i}" for i in range(size)]
+        repeat = 200 if size < 10_000 else 10
+
+        before = timeit(lambda: legacy_assembly(texts, predictions, probabilities), repeat)
+        after = timeit(lambda: vectorized_assembly(texts, probabilities), repeat)
+        results, statistics = vectorized_assembly(texts, probabilities)
+        validation = timeit(lambda: validate_response(results, statistics), repeat)
+        print(f"{size:>8} | {before:>11.3f} | {after:>11.3f} | x{before / after:>5.1f} | {validation:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
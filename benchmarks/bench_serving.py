@@ -0,0 +1,279 @@
+"""Test de charge reproductible du chemin de serving.
+
+Démarre l'API sur localhost (ou cible `--url`), rejoue le split de test
+reddit à concurrence et taille de batch contrôlées, puis mesure débit,
+latences p50/p95/p99, CPU et RSS du serveur. Les résultats sont écrits en
+JSON et peuvent être comparés à un fichier de référence :
+
+    python -m benchmarks.bench_serving --output benchmarks/results/avant.json
+    python -m benchmarks.bench_serving --baseline benchmarks/results/avant.json --threshold 0.10
+
+Le code de sortie vaut 1 si un scénario régresse au-delà du seuil (débit
+en baisse ou p95 en hausse).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def load_corpus(path):
+    """Textes du split de test, dans l'ordre du fichier (rejeu déterministe)"""
+    texts = pd.read_csv(path)['text'].dropna().astype(str)
+    texts = [t[:5000] for t in texts if t.strip()]
+    if not texts:
+        raise ValueError(f"Corpus vide: {path}")
+    return texts
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            for child in f.read().split():
+                pids.extend(process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def server_usage(pid):
+    """Temps CPU (s) et RSS (Mo) cumulés du serveur et de ses workers"""
+    cpu, rss = 0.0, 0.0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) / 1024
+        except OSError:
+            continue
+    return cpu, rss
+
+
+def start_server(app, port, env):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env={**os.environ, **env}
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Le serveur s'est arrêté au démarrage")
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+async def run_scenario(url, corpus, concurrency, batch_size, n_requests, compact, server_pid=None):
+    """`concurrency` clients envoient `n_requests` batchs consécutifs du corpus"""
+    params = {"compact": "true"} if compact else {}
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    async def client(http):
+        nonlocal next_request, errors
+        while next_request < n_requests:
+            offset = next_request * batch_size
+            next_request += 1
+            comments = [
+                {"text": corpus[(offset + i) % len(corpus)]} for i in range(batch_size)
+            ]
+            start = time.perf_counter()
+            try:
+                response = await http.post(f"{url}/predict_batch", params=params, json={"comments": comments})
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        cpu_before = server_usage(server_pid)[0] if server_pid else None
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    report = {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "requests": n_requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "requests_per_s": round(n_requests / elapsed, 2),
+        "comments_per_s": round(n_requests * batch_size / elapsed, 1),
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3),
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3)
+        }
+    }
+    if server_pid:
+        cpu_after, rss = server_usage(server_pid)
+        report["server_cpu_percent"] = round((cpu_after - cpu_before) / elapsed * 100, 1)
+        report["server_rss_mb"] = round(rss, 1)
+    return report
+
+
+def scenario_key(report):
+    return f"c{report['concurrency']}_b{report['batch_size']}"
+
+
+def compare(scenarios, baseline, threshold):
+    """Scénarios dont le débit baisse ou le p95 augmente de plus de `threshold`"""
+    reference = {scenario_key(r): r for r in baseline["scenarios"]}
+    regressions = []
+    for report in scenarios:
+        base = reference.get(scenario_key(report))
+        if base is None:
+            continue
+        throughput_change = report["comments_per_s"] / base["comments_per_s"] - 1
+        p95_change = report["latency_ms"]["p95"] / base["latency_ms"]["p95"] - 1
+        report["vs_baseline"] = {
+            "comments_per_s": round(throughput_change, 4),
+            "p95": round(p95_change, 4)
+        }
+        if throughput_change < -threshold or p95_change > threshold:
+            regressions.append(scenario_key(report))
+    return regressions
+
+
+def parse_ints(value):
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app_api:app", help="app uvicorn à démarrer")
+    parser.add_argument("--url", help="API déjà démarrée (pas de mesure CPU/RSS sauf --pid)")
+    parser.add_argument("--pid", type=int, help="PID du serveur ciblé par --url")
+    parser.add_argument("--corpus", default="data/processed/test.csv")
+    parser.add_argument("--concurrency", type=parse_ints, default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", type=parse_ints, default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=200, help="requêtes par scénario")
+    parser.add_argument("--repeat", type=int, default=3, help="passes par scénario (médiane retenue)")
+    parser.add_argument("--warmup", type=int, default=20, help="requêtes de chauffe par scénario")
+    parser.add_argument("--compact", action="store_true", help="réponses en mode compact")
+    parser.add_argument("--keep-cache", action="store_true", help="garder le cache de prédictions actif")
+    parser.add_argument("--output", help="fichier JSON (défaut: benchmarks/results/serving_<commit>.json)")
+    parser.add_argument("--baseline", help="JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.10, help="régression tolérée (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    # Le corpus est rejoué en boucle : sans cache, chaque requête passe par le modèle
+    env = {} if args.keep_cache else {"PREDICTION_CACHE_SIZE": "0"}
+
+    server = None
+    if args.url:
+        url, server_pid = args.url.rstrip("/"), args.pid
+    else:
+        server, url = start_server(args.app, free_port(), env)
+        server_pid = server.pid
+
+    scenarios = []
+    try:
+        for concurrency in args.concurrency:
+            for batch_size in args.batch_sizes:
+                asyncio.run(run_scenario(url, corpus, concurrency, batch_size, args.warmup, args.compact))
+                # Médiane de plusieurs passes pour que le seuil ne capte pas le bruit
+                runs = sorted(
+                    (asyncio.run(run_scenario(
+                        url, corpus, concurrency, batch_size, args.requests, args.compact, server_pid
+                    )) for _ in range(args.repeat)),
+                    key=lambda r: r["comments_per_s"]
+                )
+                report = runs[len(runs) // 2]
+                report["repeat"] = args.repeat
+                scenarios.append(report)
+                print(f" c={concurrency:>3} b={batch_size:>4} : {report['comments_per_s']:>10.1f} commentaires/s"
+                      f"  p50 {report['latency_ms']['p50']:>8.2f} ms  p95 {report['latency_ms']['p95']:>8.2f} ms"
+                      f"  p99 {report['latency_ms']['p99']:>8.2f} ms  erreurs {report['errors']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    commit = git_commit()
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "app": None if args.url else args.app,
+            "url": args.url,
+            "corpus": args.corpus,
+            "corpus_size": len(corpus),
+            "compact": args.compact,
+            "prediction_cache": args.keep_cache,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "env": {k: v for k, v in os.environ.items() if k.startswith(("INFERENCE_", "MICROBATCH_", "PREDICTION_CACHE_"))}
+        },
+        "scenarios": scenarios
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(scenarios, json.load(f), args.threshold)
+        results["meta"]["baseline"] = args.baseline
+        results["meta"]["threshold"] = args.threshold
+        results["regressions"] = regressions
+
+    output = Path(args.output or f"benchmarks/results/serving_{commit or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n Résultats: {output}")
+
+    if regressions:
+        print(f" Régressions au-delà de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Mémoire par batch de 10k commentaires sur le chemin d'inférence creux.
+
+Pour chaque mode de features, mesure les pics d'allocation (tracemalloc) de
+transform et de predict pour le scoreur linéaire compilé et la forêt
+aléatoire (arbres sklearn sur CSR), ou pour l'artefact servi de
+`--models-dir`. Un contrôle négatif densifie X avant le scoreur : le budget
+doit le signaler. Code de sortie 1 si un chemin servi dépasse le budget.
+
+    python -m benchmarks.bench_sparse_inference [--batch-size 10000 --budget-mb 32]
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from benchmarks.bench_text_cleaner import synthetic_comments
+from src.models.features import FEATURE_MODES, create_vectorizer, vectorizer_info
+from src.models.flat_artifact import load_serving_models
+from src.models.linear_scorer import compile_model
+from src.models.memory_budget import (
+    BATCH_SIZE, DEFAULT_BUDGET_MB, AllocationBudgetExceeded, check_allocation_budget
+)
+
+
+class DensifyingModel:
+    """Contrôle négatif : densifie X avant de prédire"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X.toarray())
+
+
+def synthetic_models(fit_size):
+    """(nom, vectoriseur, modèle) entraînés sur des commentaires synthétiques"""
+    texts = synthetic_comments(fit_size, seed=1)
+    y = np.arange(len(texts)) % 3
+    for mode in FEATURE_MODES:
+        vectorizer = create_vectorizer(mode).fit(texts)
+        X = vectorizer.transform(texts)
+        yield f"{mode}/linéaire compilé", vectorizer, compile_model(LogisticRegression(max_iter=200).fit(X, y))
+        yield f"{mode}/random forest", vectorizer, RandomForestClassifier(
+            n_estimators=100, max_depth=20, random_state=42, n_jobs=1
+        ).fit(X, y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--budget-mb", type=float, default=DEFAULT_BUDGET_MB)
+    parser.add_argument("--fit-size", type=int, default=20_000)
+    parser.add_argument("--models-dir", help="mesurer l'artefact servi plutôt que des modèles synthétiques")
+    parser.add_argument("--output", help="rapport JSON")
+    args = parser.parse_args()
+
+    texts = synthetic_comments(args.batch_size)
+    if args.models_dir:
+        serving = load_serving_models(args.models_dir)
+        name = f"{vectorizer_info(serving.vectorizer)['feature_mode']}/{serving.model_type} ({serving.artifact_format})"
+        candidates = [(name, serving.vectorizer, serving.scorer)]
+    else:
+        candidates = list(synthetic_models(args.fit_size))
+
+    print(f"\n Batch de {len(texts)} commentaires, budget {args.budget_mb:g} Mo par étape")
+    print(f"{'chemin':<32}{'transform (Mo)':>16}{'predict (Mo)':>14}{'X creux (Mo)':>14}"
+          f"{'X dense (Mo)':>14}{'sortie':>18}")
+    reports, failures = [], []
+    for name, vectorizer, model in candidates:
+        try:
+            report = check_allocation_budget(vectorizer, model, texts, args.budget_mb)
+        except AllocationBudgetExceeded as e:
+            failures.append(name)
+            print(f"{name:<32} DÉPASSEMENT : {e}")
+            continue
+        reports.append({"path": name, **report})
+        print(f"{name:<32}{report['transform_peak_mb']:>16.1f}{report['predict_peak_mb']:>14.1f}"
+              f"{report['X_mb']:>14.1f}{report['dense_equivalent_mb']:>14.0f}"
+              f"{report['output_dtype'] + str(tuple(report['output_shape'])):>18}")
+
+    # Contrôle négatif, sur le premier modèle à vocabulaire (X dense raisonnable)
+    name, vectorizer, model = candidates[0]
+    if vectorizer_info(vectorizer)['feature_mode'] == 'tfidf':
+        try:
+            check_allocation_budget(vectorizer, DensifyingModel(model), texts, args.budget_mb)
+            print(" Contrôle négatif NON détecté : le budget est trop large")
+            failures.append("contrôle négatif")
+        except AllocationBudgetExceeded as e:
+            print(f" Contrôle négatif (X densifié) détecté : {e}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"batch_size": len(texts), "budget_mb": args.budget_mb, "paths": reports,
+                       "failures": failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
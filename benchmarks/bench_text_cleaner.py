@@ -0,0 +1,94 @@
+"""Débit du nettoyage de texte : implémentation d'origine vs moteur actuel.
+
+Génère des commentaires synthétiques (URLs, mentions, hashtags, emojis,
+accents, espaces Unicode), vérifie que les sorties sont identiques octet
+pour octet et mesure le débit séquentiel et multi-processus.
+
+    python -m benchmarks.bench_text_cleaner [--size 1000000] [--jobs 4]
+"""
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.text_cleaning import clean_texts
+
+WORDS = [
+    "great", "video", "LOVE", "this", "song", "worst", "ever", "Modi", "bjp", "congress",
+    "first!!!", "lol", "😂😂", "déjà", "vu", "naïve", "İstanbul", "ß", "100%", "2019",
+    "http://t.co/abc", "https://youtu.be/x?t=1", "www.example.com/page", "@user_42", "@",
+    "#india", "#", "##tag", "can't", "won’t", "a.b.c", "...", "--", "\t", " ", " ",
+    "\n", "x@wwwy.z", "hé#llo", "http", "ww", "@#mix", "ＦＵＬＬ", "١٢٣", "émoji🔥fire"
+]
+
+
+def legacy_clean_text(text):
+    """Implémentation d'origine de TextCleaner.clean_text"""
+    if pd.isna(text):
+        return ""
+
+    text = str(text).lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'#(\w+)', r'\1', text)
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def synthetic_comments(size, seed=0):
+    """Commentaires de 1 à 40 tokens, collés ou séparés aléatoirement"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 40, size=size)
+    tokens = rng.integers(0, len(WORDS), size=int(lengths.sum()))
+    glue = rng.random(size=int(lengths.sum())) < 0.15
+    comments = []
+    position = 0
+    for length in lengths:
+        parts = []
+        for i in range(position, position + length):
+            parts.append(WORDS[tokens[i]])
+            parts.append("" if glue[i] else " ")
+        comments.append("".join(parts))
+        position += length
+    return comments
+
+
+def measure(fn, texts):
+    start = time.perf_counter()
+    output = fn(texts)
+    elapsed = time.perf_counter() - start
+    return output, len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    texts = synthetic_comments(args.size)
+    print(f" {len(texts)} commentaires synthétiques, {args.jobs} processus disponibles")
+
+    legacy, legacy_rate = measure(lambda t: pd.Series(t).apply(legacy_clean_text).tolist(), texts)
+    print(f" Origine (apply + re.sub)    : {legacy_rate:>12,.0f} commentaires/s")
+
+    current, current_rate = measure(clean_texts, texts)
+    assert current == legacy, "Sortie différente de l'implémentation d'origine"
+    print(f" Moteur actuel, 1 processus  : {current_rate:>12,.0f} commentaires/s "
+          f"(x{current_rate / legacy_rate:.1f})")
+
+    if args.jobs > 1:
+        parallel, parallel_rate = measure(lambda t: clean_texts(t, n_jobs=args.jobs), texts)
+        assert parallel == legacy, "Sortie parallèle différente de l'implémentation d'origine"
+        print(f" Moteur actuel, {args.jobs} processus : {parallel_rate:>12,.0f} commentaires/s "
+              f"(x{parallel_rate / legacy_rate:.1f})")
+
+    print(" Sorties identiques octet pour octet")
+
+
+if __name__ == "__main__":
+    main()
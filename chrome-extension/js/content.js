@@ -1,3 +1,27 @@
+// Empreinte de contenu sur 64 bits (deux FNV-1a 32 bits de graines différentes)
+function hashText(text) {
+    let h1 = 0x811c9dc5;
+    let h2 = 0x050c5d1f;
+    for (let i = 0; i < text.length; i++) {
+        const c = text.charCodeAt(i);
+        h1 = Math.imul(h1 ^ c, 0x01000193);
+        h2 = Math.imul(h2 ^ c, 0x01000193);
+    }
+    return (h1 >>> 0).toString(16).padStart(8, '0') + (h2 >>> 0).toString(16).padStart(8, '0');
+}
+
+// Session d'analyse de l'onglet : commentaires déjà prédits, par empreinte.
+// Une nouvelle session démarre quand la vidéo change (navigation SPA).
+let session = null;
+
+function currentSession() {
+    const videoId = new URLSearchParams(location.search).get('v');
+    if (!session || session.videoId !== videoId) {
+        session = { id: crypto.randomUUID(), videoId, scored: new Map(), summary: null };
+    }
+    return session;
+}
+
 // Fonction pour extraire les commentaires YouTube
 function extractComments() {
     const comments = [];
@@ -14,10 +38,11 @@ function extractComments() {
                 const text = commentTextElement.innerText.trim();
                 
                 if (text && text.length > 0) {
+                    const author = element.querySelector('#author-text')?.innerText.trim() || 'Unknown';
                     comments.push({
-                        id: `comment_${index}`,
+                        hash: hashText(`${author}\n${text}`),
                         text: text,
-                        author: element.querySelector('#author-text')?.innerText.trim() || 'Unknown',
+                        author: author,
                         likes: element.querySelector('#vote-count-middle')?.innerText.trim() || '0'
                     });
                 }
@@ -37,6 +62,37 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
         return true;
     }
     
+    // Protocole delta : seuls les commentaires pas encore prédits dans la session
+    if (request.action === 'extractNewComments') {
+        const comments = extractComments();
+        const current = currentSession();
+        const seen = new Set(current.scored.keys());
+        const newComments = comments.filter(c => !seen.has(c.hash) && seen.add(c.hash));
+        sendResponse({
+            success: true,
+            sessionId: current.id,
+            newComments: newComments,
+            scored: [...current.scored.values()],
+            summary: current.summary,
+            count: comments.length
+        });
+    }
+    
+    if (request.action === 'recordPredictions') {
+        const current = currentSession();
+        if (current.id === request.sessionId) {
+            request.predictions.forEach(p => current.scored.set(p.id, p));
+            current.summary = request.summary;
+        }
+        sendResponse({ success: true });
+    }
+    
+    // Le serveur a perdu la session (expiration, redémarrage) : tout renvoyer
+    if (request.action === 'resetSession') {
+        session = null;
+        sendResponse({ success: true, sessionId: currentSession().id });
+    }
+    
     if (request.action === 'extractComments') {
         const comments = extractComments();
         sendResponse({
@@ -1,6 +1,8 @@
 const API_URL_KEY = 'apiUrl';
 const THEME_KEY = 'theme';
 const DEFAULT_API_URL = 'https://3xpe-youtube-sentiment-api.hf.space';
+const SESSION_BATCH_SIZE = 1000;  // limite de POST /sessions/{id}/comments
+const COMPRESSION_MIN_SIZE = 1024;  // octets, même seuil que l'API
 
 let currentFilter = 'all';
 let allPredictions = [];
@@ -94,34 +96,27 @@ async function analyzeComments() {
             await new Promise(resolve => setTimeout(resolve, 500));
         }
         
-        const response = await chrome.tabs.sendMessage(tab.id, { action: 'extractComments' });
+        let response = await chrome.tabs.sendMessage(tab.id, { action: 'extractNewComments' });
         
-        if (!response.success || response.comments.length === 0) {
+        if (!response.success || response.count === 0) {
             throw new Error('Aucun commentaire trouvé. Scrollez pour charger plus de commentaires.');
         }
         
-        console.log(`${response.comments.length} commentaires extraits`);
+        console.log(`${response.count} commentaires sur la page, ${response.newComments.length} nouveaux`);
         
         // Envoyer à l'API
         const { apiUrl } = await chrome.storage.sync.get(API_URL_KEY);
         const url = apiUrl || DEFAULT_API_URL;
         
-        const apiResponse = await fetch(`${url}/predict_batch`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                comments: response.comments.map(c => ({ text: c.text }))
-            })
-        });
-        
-        if (!apiResponse.ok) {
-            throw new Error(`Erreur API: ${apiResponse.status}`);
+        // Seuls les commentaires apparus depuis le dernier clic sont envoyés ;
+        // le serveur les fusionne dans les statistiques de la session
+        let data = await submitSessionComments(url, tab.id, response);
+        if (data.total_comments < response.scored.length + response.newComments.length) {
+            await chrome.tabs.sendMessage(tab.id, { action: 'resetSession' });
+            response = await chrome.tabs.sendMessage(tab.id, { action: 'extractNewComments' });
+            data = await submitSessionComments(url, tab.id, response);
         }
         
-        const data = await apiResponse.json();
-        
         // Afficher les résultats
         displayResults(data);
         
@@ -133,6 +128,63 @@ async function analyzeComments() {
     }
 }
 
+// Corps JSON compressé en gzip au-delà du seuil ; la réponse est
+// décompressée par le navigateur (Accept-Encoding automatique)
+async function jsonRequest(payload) {
+    const json = JSON.stringify(payload);
+    const headers = { 'Content-Type': 'application/json' };
+    if (json.length < COMPRESSION_MIN_SIZE || typeof CompressionStream === 'undefined') {
+        return { headers, body: json };
+    }
+    const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+    return {
+        headers: { ...headers, 'Content-Encoding': 'gzip' },
+        body: await new Response(stream).arrayBuffer()
+    };
+}
+
+// Envoyer les nouveaux commentaires à POST /sessions/{id}/comments, par batchs
+async function submitSessionComments(url, tabId, session) {
+    const texts = new Map(session.newComments.map(c => [c.hash, c.text]));
+    const predictions = [];
+    let summary = session.summary;
+    
+    for (let start = 0; start < session.newComments.length; start += SESSION_BATCH_SIZE) {
+        const batch = session.newComments.slice(start, start + SESSION_BATCH_SIZE);
+        const apiResponse = await fetch(`${url}/sessions/${session.sessionId}/comments`, {
+            method: 'POST',
+            ...await jsonRequest({
+                comments: batch.map(c => ({ id: c.hash, text: c.text.slice(0, 5000) }))
+            })
+        });
+        
+        if (!apiResponse.ok) {
+            throw new Error(`Erreur API: ${apiResponse.status}`);
+        }
+        
+        const data = await apiResponse.json();
+        data.predictions.forEach(p => predictions.push({ ...p, text: texts.get(p.id) }));
+        summary = data.summary;
+    }
+    
+    // Mémoriser les prédictions dans l'onglet pour ne plus les renvoyer
+    if (predictions.length > 0) {
+        await chrome.tabs.sendMessage(tabId, {
+            action: 'recordPredictions',
+            sessionId: session.sessionId,
+            predictions,
+            summary
+        });
+    }
+    
+    // Statistiques cumulées de la session
+    return {
+        predictions: [...session.scored, ...predictions],
+        statistics: summary.statistics,
+        total_comments: summary.total_comments
+    };
+}
+
 // Afficher les résultats
 function displayResults(data) {
     allPredictions = data.predictions;
@@ -1,11 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Dict
-import joblib
-import numpy as np
+from typing import List, Dict, Optional
 from pathlib import Path
+import asyncio
 import logging
+from contextlib import contextmanager
+
+from src.models.flat_artifact import load_serving_models
+from src.api.prefork import preloaded_models
+from src.models.inference import build_predictions, compute_statistics
+from src.models.features import vectorizer_info
+from src.api.worker_pool import InferencePool, PoolSaturatedError
+from src.api.batching import MicroBatcher
+from src.api.cache import create_cache_from_env, predict_with_cache
+from src.api.streaming import DuplexStreamingResponse, RequestBody, stream_predictions
+from src.api.responses import MsgPackResponse, compact_response, wants_msgpack
+from src.api.compression import CompressionMiddleware, compression_options_from_env
+from src.models.artifacts import read_model_version
+from src.api.metrics import MetricsMiddleware, ServingMetrics, mark_handler_done, mark_handler_start
+from src.api.hot_reload import ModelReloader, ModelValidationError, ReloadInProgressError, check_admin_token
+from src.api.video_store import VIDEO_ID_RE, VideoStore, append_comments, session_key
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -29,6 +44,13 @@ class BatchPredictionResponse(BaseModel):
     statistics: Dict[str, float]
     total_comments: int
 
+class VideoComment(BaseModel):
+    id: str = Field(..., min_length=1, max_length=128)
+    text: str = Field(..., min_length=1, max_length=5000)
+
+class VideoCommentsBatch(BaseModel):
+    comments: List[VideoComment] = Field(..., min_items=1, max_items=1000)
+
 # Initialisation de l'application
 app = FastAPI(
     title="YouTube Sentiment Analysis API",
@@ -45,23 +67,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression gzip/brotli des réponses, requêtes gzip acceptées
+app.add_middleware(CompressionMiddleware, **compression_options_from_env())
+
+# Métriques Prometheus (/metrics), enregistrées sans verrou sur la boucle d'événements
+metrics = ServingMetrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # Variables globales pour le modèle
 vectorizer = None
 model = None
-SENTIMENT_LABELS = {0: "Négatif", 1: "Neutre", 2: "Positif"}
+scorer = None  # SVC linéaire compilé, ou le modèle lui-même
+inference_pool = None
+batcher = None
+prediction_cache = None
+model_version = None
+model_type = None
+artifact_format = None  # "flat" (mmap) ou "joblib"
+reloader = None
+video_store = None  # prédictions et agrégats par vidéo (SQLite)
+
+# Jauges lues au moment du scrape
+metrics.gauge("sentiment_inference_in_flight", "Batchs en cours ou en attente dans le pool", lambda: inference_pool.in_flight)
+metrics.gauge("sentiment_inference_queued", "Batchs en attente d'un worker", lambda: inference_pool.stats()["queued"])
+metrics.gauge("sentiment_microbatch_pending_comments", "Commentaires en attente de micro-batch", lambda: batcher.stats()["pending_comments"])
+metrics.gauge("sentiment_prediction_cache_entries", "Entrées du cache de prédictions", lambda: prediction_cache.stats()["size"])
+metrics.gauge("sentiment_prediction_cache_hit_ratio", "Taux de hits du cache de prédictions", lambda: prediction_cache.stats()["hit_rate"])
+
+async def run_inference(texts):
+    """Vectorise et prédit un micro-batch dans le pool d'inférence"""
+    result = await inference_pool.predict(vectorizer, scorer, texts)
+    metrics.observe_inference(result, len(texts))
+    return result
+
+async def predict_cached(texts):
+    """Prédit via le cache, le micro-batching et le pool d'inférence"""
+    return await predict_with_cache(prediction_cache, batcher.predict, texts)
+
+@contextmanager
+def inference_errors(action):
+    """
+    Traduit les erreurs d'un endpoint d'inférence en réponses HTTP
+    
+    File d'inférence saturée : 503 avec Retry-After, pour que le client
+    réessaie ; toute autre erreur : 500 avec `action` dans le message.
+    """
+    try:
+        yield
+    except PoolSaturatedError as e:
+        metrics.errors.inc("pool_saturated")
+        logger.warning(f" File d'inférence saturée: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        metrics.errors.inc("prediction")
+        logger.error(f" Erreur lors de {action}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de {action}: {str(e)}"
+        )
+
+async def swap_models(serving, new_version):
+    """Installe un modèle rechargé ; aucun await entre les affectations des globales"""
+    global vectorizer, model, scorer, model_type, artifact_format, model_version
+    # Les workers process chargent depuis le disque : les démarrer avant l'échange
+    await inference_pool.reload(Path("models"))
+    vectorizer, model, scorer = serving.vectorizer, serving.model, serving.scorer
+    model_type, artifact_format = serving.model_type, serving.artifact_format
+    model_version = new_version
+    prediction_cache.set_model_version(new_version)
 
 def load_models():
     """Charge le modèle et le vectoriseur au démarrage"""
-    global vectorizer, model
+    global vectorizer, model, scorer, inference_pool, batcher
+    global prediction_cache, model_version, model_type, artifact_format
     
     try:
         models_dir = Path("models")
         
-        logger.info("Chargement du vectoriseur...")
-        vectorizer = joblib.load(models_dir / "tfidf_vectorizer.joblib")
+        logger.info("Chargement du vectoriseur et du modèle...")
+        # Sous le lanceur preforking, les modèles sont hérités du parent
+        serving = preloaded_models() or load_serving_models(models_dir)
+        vectorizer, model, scorer = serving.vectorizer, serving.model, serving.scorer
+        model_type, artifact_format = serving.model_type, serving.artifact_format
+        logger.info(f"Format d'artefact: {artifact_format}")
+        inference_pool = InferencePool.from_env(models_dir)
+        batcher = MicroBatcher.from_env(run_inference)
         
-        logger.info("Chargement du modèle...")
-        model = joblib.load(models_dir / "sentiment_model.joblib")
+        model_version = read_model_version(models_dir)
+        prediction_cache = create_cache_from_env(model_version)
         
         logger.info(" Modèles chargés avec succès!")
         
@@ -72,7 +169,20 @@ def load_models():
 @app.on_event("startup")
 async def startup_event():
     """Événement au démarrage de l'application"""
+    global reloader, video_store
     load_models()
+    reloader = ModelReloader.from_env(Path("models"), swap_models, model_version)
+    video_store = VideoStore.from_env()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrête la surveillance des modèles et le pool d'inférence"""
+    if reloader is not None:
+        reloader.stop_watching()
+    if inference_pool is not None:
+        inference_pool.shutdown()
+    if video_store is not None:
+        video_store.close()
 
 @app.get("/")
 async def root():
@@ -82,7 +192,13 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/health": "Vérifier l'état de l'API",
-            "/predict_batch": "Analyser un batch de commentaires"
+            "/predict_batch": "Analyser un batch de commentaires",
+            "/predict_stream": "Analyser un flux NDJSON de commentaires, sans limite de taille",
+            "/metrics": "Métriques Prometheus",
+            "/admin/reload": "Recharger le modèle sans redémarrage (ADMIN_TOKEN)",
+            "/videos/{video_id}/comments": "Ajouter des commentaires à l'analyse d'une vidéo",
+            "/videos/{video_id}/summary": "Résumé persistant d'une vidéo",
+            "/sessions/{session_id}/comments": "Envoyer les seuls nouveaux commentaires d'une session"
         }
     }
 
@@ -100,16 +216,63 @@ async def health_check():
         "status": "healthy",
         "model_loaded": model is not None,
         "vectorizer_loaded": vectorizer is not None,
-        "model_type": type(model).__name__
+        "model_type": model_type,
+        "artifact_format": artifact_format,
+        **vectorizer_info(vectorizer),
+        "compiled_scorer": hasattr(scorer, "proba_from_decision"),
+        "inference_pool": inference_pool.stats(),
+        "micro_batching": batcher.stats(),
+        "model_version": model_version,
+        "prediction_cache": prediction_cache.stats(),
+        "hot_reload": reloader.stats()
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métriques au format texte Prometheus (requêtes, latences par étape, files)"""
+    return metrics.response()
+
+@app.post("/admin/reload")
+async def reload_models(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Recharge les modèles depuis models/ sans redémarrage
+    
+    Le nouveau modèle est chargé, validé contre model_metadata.json et chauffé
+    en arrière-plan, puis échangé atomiquement. Ne concerne que le worker qui
+    reçoit la requête : avec plusieurs workers, préférer MODEL_RELOAD_INTERVAL.
+    """
+    if not check_admin_token(x_admin_token):
+        raise HTTPException(
+            status_code=403,
+            detail="Administration désactivée ou jeton invalide"
+        )
+    
+    try:
+        return await reloader.reload(force=force)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ModelValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors du rechargement: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors du rechargement: {str(e)}"
+        )
+
 @app.post("/predict_batch", response_model=BatchPredictionResponse)
-async def predict_batch(batch: PredictionBatch):
+async def predict_batch(batch: PredictionBatch, request: Request, compact: bool = False, probabilities: bool = False):
     """
     Analyse un batch de commentaires et retourne les sentiments
     
     Args:
         batch: Liste de commentaires à analyser
+        compact: Réponse en tableaux parallèles (labels, confidences) sans écho du texte
+        probabilities: En mode compact, inclure les vecteurs de probabilités
+
+    Le corps peut être compressé (`Content-Encoding: gzip`) ; la réponse est
+    compressée selon `Accept-Encoding` et encodée en MessagePack si l'en-tête
+    `Accept` le demande.
     Returns:
         Prédictions avec statistiques globales
     """
@@ -120,57 +283,176 @@ async def predict_batch(batch: PredictionBatch):
             detail="Modèles non chargés"
         )
 
-    try:
+    with inference_errors("la prédiction"):
         # Extraire les textes
         texts = [comment.text for comment in batch.comments]
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(texts))
         
-        # Vectorisation
-        X = vectorizer.transform(texts)
-        
-        # Prédictions
-        predictions = model.predict(X)
-        probabilities = model.predict_proba(X)
+        # Seuls les textes absents du cache sont regroupés avec les requêtes
+        # concurrentes (micro-batching) puis prédits dans le pool d'inférence
+        result = await predict_cached(texts)
         
-        # Construire les résultats
-        results = []
-        sentiment_counts = {0: 0, 1: 0, 2: 0}
+        # Statistiques vectorisées (bincount, percentiles, entropie) puis
+        # construction des résultats
+        # (conversions en bloc, sans opération NumPy par commentaire ; les
+        # dicts sont validés une seule fois par le response_model)
+        with metrics.stage("assembly"):
+            statistics = compute_statistics(result)
+            results = None if compact else build_predictions(texts, result)
         
-        for i, (text, pred, proba) in enumerate(zip(texts, predictions, probabilities)):
-            confidence = float(np.max(proba))
-            sentiment = SENTIMENT_LABELS[pred]
-            
-            results.append(SentimentPrediction(
-                text=text,
-                sentiment=sentiment,
-                confidence=confidence,
-                label=int(pred)
-            ))
-            
-            sentiment_counts[pred] += 1
+        # Réponse compacte optionnelle, construite sans objet par commentaire
+        if compact:
+            # Étape `serialization` mesurée par le middleware, comme les autres réponses
+            mark_handler_done(request)
+            return compact_response(result, statistics, include_probabilities=probabilities,
+                                    binary=wants_msgpack(request))
         
-        # Calculer les statistiques
         total = len(texts)
-        statistics = {
-            "negative_percentage": round((sentiment_counts[0] / total) * 100, 2),
-            "neutral_percentage": round((sentiment_counts[1] / total) * 100, 2),
-            "positive_percentage": round((sentiment_counts[2] / total) * 100, 2),
-            "average_confidence": round(float(np.mean([r.confidence for r in results])), 4)
-        }
         
         logger.info(f" Analysé {total} commentaires avec succès")
         
-        return BatchPredictionResponse(
-            predictions=results,
-            statistics=statistics,
-            total_comments=total
+        mark_handler_done(request)
+        response = {
+            "predictions": results,
+            "statistics": statistics,
+            "total_comments": total
+        }
+        # MessagePack si le client le demande (en-tête Accept), JSON sinon
+        if wants_msgpack(request):
+            return MsgPackResponse(response)
+        return response
+
+@app.post("/predict_stream")
+async def predict_stream(request: Request):
+    """
+    Analyse un flux NDJSON de commentaires, sans limite de taille
+    
+    Chaque ligne d'entrée est `{"text": "...", "id": ...}` (id optionnel).
+    Les prédictions sont renvoyées en NDJSON au fil de l'eau, par chunks
+    de STREAM_CHUNK_SIZE commentaires, suivies d'une ligne de statistiques.
+    """
+    if vectorizer is None or model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modèles non chargés"
+        )
+    
+    # Pool saturé : 503 avant de commencer la réponse, comme /predict_batch
+    with inference_errors("la prédiction"):
+        inference_pool.check_capacity()
+    
+    body = RequestBody(request.receive)
+    return DuplexStreamingResponse(
+        stream_predictions(body, predict_cached),
+        request_body=body,
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/videos/{video_id}/comments")
+async def append_video_comments(video_id: str, batch: VideoCommentsBatch, request: Request):
+    """
+    Ajoute des commentaires à l'analyse persistante d'une vidéo
+    
+    Seuls les identifiants de commentaires encore inconnus pour cette vidéo
+    sont prédits puis stockés ; les comptes par classe sont mis à jour dans
+    la même transaction. Renvoyer un fil déjà analysé ne coûte qu'une
+    lecture des identifiants.
+    
+    Args:
+        video_id: Identifiant de la vidéo YouTube
+        batch: Commentaires `{"id", "text"}` (1000 au plus par requête)
+    Returns:
+        Nombre de commentaires reçus et ajoutés, et le résumé à jour
+    """
+    if vectorizer is None or model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modèles non chargés"
+        )
+    if not VIDEO_ID_RE.match(video_id):
+        raise HTTPException(
+            status_code=422,
+            detail="Identifiant de vidéo invalide"
+        )
+    
+    with inference_errors("l'ajout des commentaires"):
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(batch.comments))
+        
+        response = await append_comments(
+            video_store, video_id,
+            [(comment.id, comment.text) for comment in batch.comments],
+            predict_cached, model_version
         )
         
-    except Exception as e:
-        logger.error(f" Erreur lors de la prédiction: {e}")
+        logger.info(f" Vidéo {video_id}: {response['new_comments']} nouveaux commentaires")
+        
+        mark_handler_done(request)
+        return {"video_id": video_id, **response}
+
+@app.get("/videos/{video_id}/summary")
+async def video_summary(video_id: str):
+    """
+    Résumé d'une vidéo : comptes et statistiques de tous ses commentaires
+    
+    Lu depuis une seule ligne d'agrégats, quelle que soit la taille du fil.
+    Les clés `session:<id>` des sessions de l'extension ne sont pas lisibles ici.
+    """
+    if not VIDEO_ID_RE.match(video_id):
         raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la prédiction: {str(e)}"
+            status_code=422,
+            detail="Identifiant de vidéo invalide"
         )
+    summary = await asyncio.to_thread(video_store.summary, video_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Vidéo inconnue"
+        )
+    return {"video_id": video_id, **summary}
+
+@app.post("/sessions/{session_id}/comments")
+async def append_session_comments(session_id: str, batch: VideoCommentsBatch, request: Request):
+    """
+    Fusionne les nouveaux commentaires d'une session dans ses statistiques
+    
+    L'extension n'envoie que les commentaires apparus depuis le dernier clic
+    (identifiés par une empreinte de leur contenu) ; la réponse contient leurs
+    prédictions et les statistiques cumulées de la session. Un identifiant déjà
+    reçu n'est ni re-prédit ni recompté. Les sessions expirent après
+    SESSION_TTL secondes d'inactivité.
+    
+    Args:
+        session_id: Identifiant de session généré par l'extension
+        batch: Nouveaux commentaires `{"id", "text"}`
+    Returns:
+        Prédictions des commentaires envoyés et statistiques de la session
+    """
+    if vectorizer is None or model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modèles non chargés"
+        )
+    if not VIDEO_ID_RE.match(session_id):
+        raise HTTPException(
+            status_code=422,
+            detail="Identifiant de session invalide"
+        )
+    
+    with inference_errors("l'ajout des commentaires"):
+        mark_handler_start(metrics, request)
+        metrics.observe_request(len(batch.comments))
+        await asyncio.to_thread(video_store.purge_sessions)
+        
+        response = await append_comments(
+            video_store, session_key(session_id),
+            [(comment.id, comment.text) for comment in batch.comments],
+            predict_cached, model_version
+        )
+        
+        mark_handler_done(request)
+        return {"session_id": session_id, **response}
 
 if __name__ == "__main__":
     import uvicorn
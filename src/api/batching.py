@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from src.api.metrics import BATCH_SIZE_BUCKETS, Histogram
+from src.models.inference import SentimentResult
+
+
+class MicroBatcher:
+    """Regroupe les commentaires de requêtes concurrentes en un seul batch.
+
+    Les requêtes arrivant pendant `max_wait_ms` (ou jusqu'à `max_batch_size`
+    commentaires) partagent un unique appel vectorize + predict ; chaque
+    appelant reçoit ensuite sa tranche du résultat. Une requête arrivant
+    quand rien n'est en attente ni en cours d'inférence part tout de suite :
+    un client seul ne paie pas `max_wait_ms`. Un batch ne dépasse
+    jamais `max_batch_size` : une requête plus grande est découpée en
+    plusieurs batchs, puis ses résultats sont recollés. Tout l'état est
+    manipulé depuis la boucle d'événements, sans verrou.
+    """
+
+    def __init__(self, predict_fn, max_wait_ms=2.0, max_batch_size=512):
+        self.predict_fn = predict_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+
+        self._pending = []  # (textes, future, instant d'arrivée)
+        self._pending_size = 0
+        self._timer = None
+        self._tasks = set()
+
+        # Métriques
+        self.batches = 0
+        self.requests = 0
+        self.comments = 0
+        self.largest_batch = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+        self.batch_size = Histogram(
+            "sentiment_microbatch_size", "Commentaires par micro-batch", BATCH_SIZE_BUCKETS
+        )
+
+    @classmethod
+    def from_env(cls, predict_fn):
+        """Configure via MICROBATCH_WAIT_MS et MICROBATCH_MAX_SIZE"""
+        return cls(
+            predict_fn,
+            max_wait_ms=float(os.environ.get("MICROBATCH_WAIT_MS", 2.0)),
+            max_batch_size=int(os.environ.get("MICROBATCH_MAX_SIZE", 512))
+        )
+
+    async def predict(self, texts):
+        """Ajoute les textes au batch courant et attend leurs prédictions"""
+        if len(texts) > self.max_batch_size:
+            parts = await asyncio.gather(*(
+                self.predict(texts[start:start + self.max_batch_size])
+                for start in range(0, len(texts), self.max_batch_size)
+            ))
+            return _concat(parts)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Le batch courant est envoyé avant de déborder de max_batch_size
+        if self._pending_size + len(texts) > self.max_batch_size:
+            self._flush()
+        self._pending.append((texts, future, time.perf_counter()))
+        self._pending_size += len(texts)
+
+        # Batcher au repos : rien à regrouper, inutile d'attendre
+        idle = len(self._pending) == 1 and not self._tasks
+        if idle or self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending
+        self._pending = []
+        self._pending_size = 0
+
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        now = time.perf_counter()
+        texts = [text for request_texts, _, _ in batch for text in request_texts]
+        self._record(batch, len(texts), now)
+
+        try:
+            result = await self.predict_fn(texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Redistribuer les tranches à chaque appelant
+        offset = 0
+        for request_texts, future, _ in batch:
+            size = len(request_texts)
+            if not future.done():
+                future.set_result(result[offset:offset + size])
+            offset += size
+
+    def _record(self, batch, size, now):
+        self.batches += 1
+        self.requests += len(batch)
+        self.comments += size
+        self.largest_batch = max(self.largest_batch, size)
+
+        self.batch_size.observe(size)
+
+        for _, _, enqueued_at in batch:
+            delay = now - enqueued_at
+            self.total_queue_delay += delay
+            self.max_queue_delay = max(self.max_queue_delay, delay)
+
+    def stats(self):
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "requests": self.requests,
+            "comments": self.comments,
+            "avg_batch_size": round(self.comments / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending_comments": self._pending_size,
+            "avg_queue_delay_ms": round(self.total_queue_delay / self.requests * 1000, 3) if self.requests else 0.0,
+            "max_queue_delay_ms": round(self.max_queue_delay * 1000, 3),
+            "batch_size_histogram": dict(zip(labels, self.batch_size.bucket_counts()))
+        }
+
+
+def _concat(results):
+    """Recolle dans l'ordre les résultats des batchs d'une requête découpée"""
+    return SentimentResult(
+        labels=np.concatenate([result.labels for result in results]),
+        confidences=np.concatenate([result.confidences for result in results]),
+        probabilities=np.concatenate([result.probabilities for result in results])
+    )
@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import numpy as np
+
+from src.api.sqlite_utils import chunks
+from src.models.inference import SentimentResult
+
+
+class BasePredictionCache(ABC):
+    """Interface commune des backends de cache de prédictions.
+
+    La clé est un hash du texte et de la version du modèle : une ancienne
+    entrée ne peut jamais être servie pour un nouveau modèle. Les backends
+    implémentent `get_many`, `set_many`, `clear` et `size` en traitant
+    toutes les clés d'une requête en un seul aller-retour.
+    """
+    backend = None
+    # Vrai si get_many/set_many font des E/S bloquantes : appelés dans un thread
+    blocking_io = False
+
+    def __init__(self, max_entries=100_000, ttl_seconds=3600, model_version=""):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def key(self, text):
+        payload = f"{self.model_version}\0{text}".encode("utf-8", "surrogatepass")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def set_model_version(self, model_version):
+        """Invalide le cache si la version du modèle a changé"""
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self.clear()
+            self.invalidations += 1
+
+    @abstractmethod
+    def get_many(self, keys):
+        """Retourne {clé: (label, confiance, probas)} pour les clés présentes"""
+
+    @abstractmethod
+    def set_many(self, keys, result):
+        """Enregistre les prédictions de `result`, alignées sur `keys`"""
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def size(self):
+        pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "enabled": self.enabled,
+            "model_version": self.model_version,
+            "size": self.size(),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+class PredictionCache(BasePredictionCache):
+    """Cache LRU + TTL en mémoire du processus (backend par défaut).
+
+    Chaque entrée ne garde que (label, confiance, probabilités), la mémoire
+    est bornée par `max_entries`.
+    """
+    backend = "memory"
+
+    def __init__(self, max_entries=100_000, ttl_seconds=3600, model_version=""):
+        super().__init__(max_entries, ttl_seconds, model_version)
+        self._entries = OrderedDict()  # clé -> (label, confiance, probas, expiration)
+
+    @classmethod
+    def from_env(cls, model_version=""):
+        """Configure via PREDICTION_CACHE_SIZE (0 = désactivé) et PREDICTION_CACHE_TTL"""
+        return cls(
+            max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 100_000)),
+            ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", 3600)),
+            model_version=model_version
+        )
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                continue
+            if entry[3] < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                continue
+            self._entries.move_to_end(key)
+            found[key] = entry[:3]
+            self.hits += 1
+        return found
+
+    def set_many(self, keys, result):
+        expires_at = time.monotonic() + self.ttl_seconds
+        for key, label, confidence, proba in zip(
+            keys, result.labels, result.confidences, result.probabilities
+        ):
+            self._entries[key] = (label, confidence, proba, expires_at)
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLitePredictionCache(BasePredictionCache):
+    """Cache partagé entre workers via un fichier SQLite local (mode WAL).
+
+    Aucun service externe : tous les workers uvicorn d'une machine ouvrent
+    le même fichier. Une requête fait un seul SELECT ... IN (...) pour toutes
+    ses clés et un seul executemany pour les écritures, dans un thread (voir
+    `predict_with_cache`). L'éviction LRU se base sur la date du dernier
+    accès, rafraîchie au plus une fois par `eviction_interval` secondes et
+    par entrée, et n'est faite qu'une fois par `eviction_interval` : le
+    fichier peut dépasser `max_entries` entre deux passes. `size()` est le
+    compte de la dernière passe plus les écritures locales depuis. Les
+    compteurs hits/misses restent propres à chaque worker.
+    """
+    backend = "sqlite"
+    blocking_io = True
+
+    def __init__(self, path, max_entries=100_000, ttl_seconds=3600, model_version="",
+                 eviction_interval=5.0):
+        super().__init__(max_entries, ttl_seconds, model_version)
+        self.path = str(path)
+        self.eviction_interval = eviction_interval
+        # Une connexion partagée par les threads : une transaction à la fois
+        self._lock = threading.Lock()
+        self._stale_versions = False
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS predictions (
+                key BLOB PRIMARY KEY,
+                model_version TEXT NOT NULL,
+                label INTEGER NOT NULL,
+                confidence REAL NOT NULL,
+                proba BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON predictions (last_access)"
+        )
+        self._conn.commit()
+        self._size = self._count()
+        self._last_eviction = time.monotonic()
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def get_many(self, keys):
+        keys = list(keys)
+        now = time.time()
+        with self._lock:
+            found, expired = self._get_many(keys, now)
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        self.expirations += len(expired)
+        return found
+
+    def _get_many(self, keys, now):
+        found = {}
+        expired = []
+
+        # LRU approché : la date d'accès n'est rafraîchie que si elle a plus
+        # de `eviction_interval` secondes, une lecture chaude ne prend donc
+        # pas le verrou d'écriture partagé entre workers
+        stale = []
+        refresh_before = now - self.eviction_interval
+
+        for chunk in chunks(keys):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, label, confidence, proba, expires_at, last_access FROM predictions "
+                f"WHERE key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for key, label, confidence, proba, expires_at, last_access in rows:
+                if expires_at < now:
+                    expired.append(key)
+                    continue
+                found[key] = (label, confidence, np.frombuffer(proba, dtype=np.float64))
+                if last_access < refresh_before:
+                    stale.append(key)
+
+        if not stale and not expired:
+            return found, expired
+        with self._conn:
+            for chunk in chunks(stale):
+                self._conn.execute(
+                    f"UPDATE predictions SET last_access = ? "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    [now, *chunk]
+                )
+            if expired:
+                self._conn.executemany(
+                    "DELETE FROM predictions WHERE key = ?", [(key,) for key in expired]
+                )
+                self._size = max(self._size - len(expired), 0)
+        return found, expired
+
+    def set_many(self, keys, result):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        rows = [
+            (key, self.model_version, int(label), float(confidence),
+             np.asarray(proba, dtype=np.float64).tobytes(), expires_at, now)
+            for key, label, confidence, proba in zip(
+                keys, result.labels, result.confidences, result.probabilities
+            )
+        ]
+
+        with self._lock, self._conn:
+            if self._stale_versions:
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE model_version != ?", (self.model_version,)
+                )
+                self._stale_versions = False
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._size += len(rows)
+            if time.monotonic() - self._last_eviction >= self.eviction_interval:
+                self._evict()
+
+    def _evict(self):
+        """COUNT(*) puis suppression des entrées les moins récemment lues"""
+        self._last_eviction = time.monotonic()
+        self._size = self._count()
+        overflow = self._size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM predictions WHERE key IN ("
+                "SELECT key FROM predictions ORDER BY last_access LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+            self._size = self.max_entries
+
+    def set_model_version(self, model_version):
+        """Ne supprime que les entrées des autres versions (partagées entre workers).
+
+        Appelé sur la boucle d'événements : la suppression est faite à la
+        prochaine écriture, dans un thread. Les clés incluant la version, les
+        anciennes entrées ne peuvent plus être servies d'ici là.
+        """
+        if model_version != self.model_version:
+            self.model_version = model_version
+            self._stale_versions = True
+            self._size = 0
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions")
+            self._size = 0
+
+    def size(self):
+        return self._size
+
+    def close(self):
+        self._conn.close()
+
+
+def create_cache_from_env(model_version=""):
+    """Choisit le backend via PREDICTION_CACHE_BACKEND (memory | sqlite)"""
+    backend = os.environ.get("PREDICTION_CACHE_BACKEND", "memory")
+    if backend == "memory":
+        return PredictionCache.from_env(model_version)
+    if backend == "sqlite":
+        return SQLitePredictionCache(
+            os.environ.get("PREDICTION_CACHE_PATH", "prediction_cache.sqlite3"),
+            max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 100_000)),
+            ttl_seconds=float(os.environ.get("PREDICTION_CACHE_TTL", 3600)),
+            model_version=model_version
+        )
+    raise ValueError(f"Backend de cache inconnu: {backend}")
+
+
+async def _cache_call(cache, method, *args):
+    """Les backends à E/S bloquantes (SQLite) sont appelés hors de la boucle"""
+    if cache.blocking_io:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+async def predict_with_cache(cache, predict_fn, texts):
+    """Sert les textes connus depuis le cache et ne prédit que les manquants.
+
+    Les doublons à l'intérieur du batch ne sont vectorisés qu'une fois.
+    """
+    if not cache.enabled:
+        return await predict_fn(texts)
+
+    keys = [cache.key(text) for text in texts]
+    found = await _cache_call(cache, cache.get_many, dict.fromkeys(keys))
+
+    # Textes manquants, dédupliqués dans l'ordre d'apparition
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    if missing:
+        missing_keys = list(missing)
+        version = cache.model_version
+        result = await predict_fn(list(missing.values()))
+        # Modèle rechargé pendant la prédiction : ne pas polluer le nouveau cache
+        if cache.model_version == version:
+            await _cache_call(cache, cache.set_many, missing_keys, result)
+        for key, label, confidence, proba in zip(
+            missing_keys, result.labels, result.confidences, result.probabilities
+        ):
+            found[key] = (label, confidence, proba)
+
+    rows = [found[key] for key in keys]
+    return SentimentResult(
+        labels=np.array([row[0] for row in rows]),
+        confidences=np.array([row[1] for row in rows], dtype=np.float32),
+        probabilities=np.array([row[2] for row in rows], dtype=np.float32)
+    )
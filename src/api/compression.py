@@ -0,0 +1,176 @@
+"""Compression du transport : réponses gzip/brotli, corps de requête gzip.
+
+Réponses : l'encodage est négocié via `Accept-Encoding` (brotli en priorité
+si le module est installé, sinon gzip) et n'est appliqué qu'au-delà de
+`minimum_size` octets, aux réponses envoyées en un seul message. Les flux
+(/predict_stream) passent tels quels pour ne pas retarder les premières
+lignes.
+
+Requêtes : un corps `Content-Encoding: gzip` est décompressé au fil des
+messages reçus, avec une taille décompressée maximale (protection contre
+les bombes de décompression).
+"""
+import asyncio
+import gzip
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel, gzip seul en repli
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # qualité 11 trop lente pour des réponses dynamiques
+# Au-delà, la compression de la réponse est faite hors de la boucle d'événements
+THREAD_MIN_SIZE = 256 * 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "application/x-ndjson", "text/")
+
+
+def compression_options_from_env():
+    """Seuil via COMPRESSION_MIN_SIZE (0 désactive), limite via MAX_DECOMPRESSED_SIZE"""
+    return {
+        "minimum_size": int(os.environ.get("COMPRESSION_MIN_SIZE", 1024)),
+        "max_decompressed_size": int(os.environ.get("MAX_DECOMPRESSED_SIZE", 64 * 1024 * 1024))
+    }
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client (q > 0), sans ordre de préférence"""
+    accepted = set()
+    for token in header.split(","):
+        name, _, params = token.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def negotiate_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class GzipRequestDecoder:
+    """Décompression incrémentale d'un corps gzip, bornée à `max_size` octets"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decode(self, data, final):
+        try:
+            # max_length : on s'arrête dès le dépassement sans tout décompresser
+            limit = self.max_size - self.size + 1 if self.max_size else 0
+            chunk = self._decompressor.decompress(data, limit)
+            if final:
+                chunk += self._decompressor.flush()
+        except zlib.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid gzip body: {e}")
+        self.size += len(chunk)
+        if self.max_size and (self.size > self.max_size or self._decompressor.unconsumed_tail):
+            raise HTTPException(status_code=413, detail=f"Decompressed body exceeds {self.max_size} bytes")
+        if final and not self._decompressor.eof:
+            raise HTTPException(status_code=400, detail="Truncated gzip body")
+        return chunk
+
+
+class CompressionMiddleware:
+    """Middleware ASGI : décompression des requêtes, compression des réponses"""
+
+    def __init__(self, app, minimum_size=1024, max_decompressed_size=64 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_decompressed_size = max_decompressed_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if request_encoding not in ("identity", "gzip"):
+            response = JSONResponse({"detail": f"Unsupported Content-Encoding: {request_encoding}"}, status_code=415)
+            await response(scope, receive, send)
+            return
+        if request_encoding == "gzip":
+            scope, receive = self._decoded_request(scope, receive)
+
+        encoding = negotiate_encoding(headers.get("accept-encoding", "")) if self.minimum_size else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # En-têtes retenus jusqu'au premier corps : on sait alors s'il faut compresser
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            response_headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = response_headers.get("content-type", "")
+            if (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in response_headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                if len(body) >= THREAD_MIN_SIZE:
+                    body = await asyncio.to_thread(compress, body, encoding)
+                else:
+                    body = compress(body, encoding)
+                response_headers["Content-Encoding"] = encoding
+                response_headers["Content-Length"] = str(len(body))
+                response_headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _decoded_request(self, scope, receive):
+        """Scope sans Content-Encoding/Content-Length et `receive` qui décompresse"""
+        decoder = GzipRequestDecoder(self.max_decompressed_size)
+        raw_headers = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+
+        async def receive_decoded():
+            message = await receive()
+            if message["type"] == "http.request":
+                more_body = message.get("more_body", False)
+                message = {**message, "body": decoder.decode(message.get("body", b""), not more_body)}
+            return message
+
+        return {**scope, "headers": raw_headers}, receive_decoded
@@ -0,0 +1,165 @@
+import asyncio
+import hmac
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.models.artifacts import compute_model_version, load_metadata, read_model_version
+from src.models.features import vectorizer_info
+from src.models.flat_artifact import load_serving_models
+from src.models.inference import predict_texts
+
+logger = logging.getLogger(__name__)
+
+# Textes de chauffe : premier passage dans l'analyseur, le scoreur et numpy
+WARMUP_TEXTS = ["great video, loved it", "this is so boring", "first!", "ok"]
+
+
+class ModelValidationError(ValueError):
+    """Les artefacts sur disque ne correspondent pas à model_metadata.json"""
+
+
+class ReloadInProgressError(RuntimeError):
+    """Un rechargement est déjà en cours"""
+
+
+def prepare_models(models_dir):
+    """Charge, valide et chauffe un nouveau couple vectoriseur/modèle.
+
+    Exécuté hors de la boucle d'événements ; rien n'est exposé aux requêtes
+    tant que cette fonction n'a pas réussi.
+    """
+    models_dir = Path(models_dir)
+    metadata = load_metadata(models_dir)
+    actual_version = compute_model_version(models_dir)
+    expected_version = metadata.get('model_version', actual_version)
+
+    # Les métadonnées sont écrites en dernier : une empreinte différente
+    # signifie un entraînement en cours d'écriture ou des fichiers incohérents
+    if actual_version != expected_version:
+        raise ModelValidationError(
+            f"Empreinte des artefacts {actual_version} != model_version {expected_version}"
+        )
+
+    serving = load_serving_models(models_dir)
+    info = vectorizer_info(serving.vectorizer)
+    for key in ('feature_mode', 'n_features'):
+        if key in metadata and metadata[key] != info[key]:
+            raise ModelValidationError(f"{key}: {info[key]} chargé, {metadata[key]} attendu")
+    n_features_in = getattr(serving.scorer, 'n_features_in_', info['n_features'])
+    if n_features_in != info['n_features']:
+        raise ModelValidationError(
+            f"Le modèle attend {n_features_in} features, le vectoriseur en produit {info['n_features']}"
+        )
+
+    result = predict_texts(serving.vectorizer, serving.scorer, WARMUP_TEXTS)
+    if result.probabilities.shape != (len(WARMUP_TEXTS), 3) or not np.isfinite(result.probabilities).all():
+        raise ModelValidationError("Prédictions de chauffe invalides")
+
+    return serving, expected_version
+
+
+class ModelReloader:
+    """Recharge les modèles en arrière-plan puis appelle `apply` pour l'échange.
+
+    `apply(serving, model_version)` est une coroutine qui fait l'échange des
+    globales sans `await` intermédiaire : aucune requête ne peut observer un
+    état mélangé, et les batchs en cours gardent leurs références vers
+    l'ancien modèle.
+    """
+
+    def __init__(self, models_dir, apply, current_version=None):
+        self.models_dir = Path(models_dir)
+        self.apply = apply
+        self.current_version = current_version
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload_at = None
+        self.last_error = None
+        self._lock = asyncio.Lock()
+        self._watch_task = None
+
+    async def reload(self, force=False):
+        """Recharge si la version sur disque a changé (ou si `force`)"""
+        if self._lock.locked():
+            raise ReloadInProgressError("Rechargement déjà en cours")
+
+        async with self._lock:
+            start = time.perf_counter()
+            try:
+                serving, version = await asyncio.to_thread(prepare_models, self.models_dir)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+
+            previous = self.current_version
+            if version == previous and not force:
+                return {"status": "unchanged", "model_version": version}
+
+            await self.apply(serving, version)
+            self.current_version = version
+            self.reloads += 1
+            self.last_reload_at = time.time()
+            self.last_error = None
+            load_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"Modèle rechargé: {previous} -> {version} ({load_ms:.0f} ms)")
+            return {
+                "status": "reloaded",
+                "model_version": version,
+                "previous_version": previous,
+                "artifact_format": serving.artifact_format,
+                "load_ms": round(load_ms, 1)
+            }
+
+    def start_watching(self, interval):
+        """Surveille models/ et recharge quand la version du modèle change"""
+        self._watch_task = asyncio.create_task(self._watch(interval))
+
+    async def _watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Hors de la boucle : sans model_version, toute l'empreinte est recalculée
+                version = await asyncio.to_thread(read_model_version, self.models_dir)
+                if version == self.current_version:
+                    continue
+                await self.reload()
+            except ReloadInProgressError:
+                pass
+            except Exception as e:
+                # Entraînement en cours d'écriture : nouvel essai au prochain tour
+                self.last_error = str(e)
+                logger.warning(f"Rechargement automatique échoué: {e}")
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+
+    @classmethod
+    def from_env(cls, models_dir, apply, current_version=None):
+        """Active la surveillance si MODEL_RELOAD_INTERVAL (secondes) est > 0"""
+        reloader = cls(models_dir, apply, current_version)
+        interval = float(os.environ.get("MODEL_RELOAD_INTERVAL", 0))
+        if interval > 0:
+            reloader.start_watching(interval)
+        return reloader
+
+    def stats(self):
+        return {
+            "model_version": self.current_version,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+            "watching": self._watch_task is not None and not self._watch_task.done()
+        }
+
+
+def check_admin_token(token):
+    """Vrai si ADMIN_TOKEN est défini et correspond ; l'admin est désactivé sinon"""
+    expected = os.environ.get("ADMIN_TOKEN")
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
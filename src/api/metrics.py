@@ -0,0 +1,236 @@
+"""Métriques au format texte Prometheus, sans dépendance externe.
+
+Toutes les observations sont faites depuis la boucle d'événements (les
+durées mesurées dans le pool d'inférence remontent avec le résultat) : un
+seul thread écrit, il n'y a donc pas de verrou. Une observation coûte un
+`bisect` et deux additions.
+"""
+import time
+from bisect import bisect_left
+
+from starlette.responses import Response
+
+# Secondes, de 50 µs à 10 s : couvre une étape sur un commentaire comme un gros batch
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histogramme à buckets fixes ; cumulé seulement au moment du rendu"""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self.series = {}  # labels -> [counts par bucket (+Inf en dernier), somme]
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels):
+        series = self.series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def bucket_counts(self, *labels):
+        """Comptes par bucket, non cumulés (+Inf en dernier)"""
+        series = self.series.get(labels)
+        return list(series[0]) if series else [0] * (len(self.buckets) + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Jauge lue au moment du scrape (profondeur de file, taille du cache...)"""
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_value(value)}"
+        ]
+
+
+class ServingMetrics:
+    """Métriques du chemin de prédiction d'une app"""
+
+    def __init__(self):
+        self.requests = Counter(
+            "sentiment_http_requests_total", "Requêtes HTTP par route et statut", ("path", "status")
+        )
+        self.request_latency = Histogram(
+            "sentiment_http_request_duration_seconds", "Durée totale des requêtes HTTP",
+            LATENCY_BUCKETS, ("path",)
+        )
+        self.stage_latency = Histogram(
+            "sentiment_stage_duration_seconds", "Durée par étape du chemin de prédiction",
+            LATENCY_BUCKETS, ("stage",)
+        )
+        self.request_batch_size = Histogram(
+            "sentiment_request_batch_size", "Commentaires par requête", BATCH_SIZE_BUCKETS
+        )
+        self.inference_batch_size = Histogram(
+            "sentiment_inference_batch_size", "Commentaires par appel au modèle (après micro-batching et cache)",
+            BATCH_SIZE_BUCKETS
+        )
+        self.comments = Counter("sentiment_comments_total", "Commentaires analysés")
+        self.errors = Counter("sentiment_errors_total", "Erreurs par type", ("kind",))
+        self.gauges = []
+
+    def gauge(self, name, documentation, read):
+        self.gauges.append(Gauge(name, documentation, read))
+
+    def stage(self, name):
+        return _StageTimer(self.stage_latency, name)
+
+    def observe_request(self, n_comments):
+        self.request_batch_size.observe(n_comments)
+        self.comments.inc(amount=n_comments)
+
+    def observe_inference(self, result, n_texts):
+        """Durées mesurées dans le worker d'inférence, rapportées par le résultat"""
+        self.inference_batch_size.observe(n_texts)
+        for stage, seconds in result.timings.items():
+            self.stage_latency.observe(seconds, stage)
+
+    def render(self):
+        lines = []
+        for metric in (
+            self.requests, self.request_latency, self.stage_latency,
+            self.request_batch_size, self.inference_batch_size, self.comments, self.errors
+        ):
+            lines.extend(metric.render())
+        for gauge in self.gauges:
+            lines.extend(gauge.render())
+        return "\n".join(lines) + "\n"
+
+    def response(self):
+        return Response(self.render(), media_type=CONTENT_TYPE)
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "stage", "start")
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.stage)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : requêtes par route et statut, durée totale.
+
+    Mesure aussi l'étape `serialization` (fin du handler -> envoi des
+    en-têtes), qui inclut la validation du response_model et le JSON.
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["metrics_start"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                handler_done = state.get("metrics_handler_done")
+                if handler_done is not None:
+                    self.metrics.stage_latency.observe(time.perf_counter() - handler_done, "serialization")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "other"
+            self.metrics.requests.inc(path, status)
+            self.metrics.request_latency.observe(time.perf_counter() - start, path)
+
+
+def mark_handler_start(metrics, request):
+    """Étape `parse` : réception du corps et validation Pydantic"""
+    start = getattr(request.state, "metrics_start", None)
+    if start is not None:
+        metrics.stage_latency.observe(time.perf_counter() - start, "parse")
+
+
+def mark_handler_done(request):
+    request.state.metrics_handler_done = time.perf_counter()
@@ -0,0 +1,163 @@
+"""Lanceur preforking : charge les modèles une fois puis forke les workers.
+
+Les workers héritent du vectoriseur et du scoreur en copie-sur-écriture.
+`gc.freeze()` sort ces objets des générations suivies par le ramasse-miettes,
+dont les parcours écriraient dans leurs en-têtes et dupliqueraient les pages.
+
+    python -m src.api.prefork app_api:app --workers 4 --port 7860
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from src.models.flat_artifact import load_serving_models
+
+logger = logging.getLogger(__name__)
+
+# Un worker mort avant MIN_UPTIME secondes compte comme un échec de démarrage ;
+# au-delà de MAX_CRASHES échecs consécutifs le lanceur abandonne
+MIN_UPTIME = 10.0
+MAX_CRASHES = 5
+# Attente avant redémarrage : 0.5 s, doublée à chaque échec consécutif
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30.0
+
+# Modèles chargés par le parent avant le fork, repris par le startup des apps
+_preloaded = None
+
+
+def preloaded_models():
+    """Modèles hérités du processus parent, ou None hors du lanceur"""
+    return _preloaded
+
+
+def preload(models_dir="models"):
+    global _preloaded
+    _preloaded = load_serving_models(models_dir)
+    # Tout ce qui existe à ce point est partagé ; le GC ne doit plus y toucher
+    gc.collect()
+    gc.freeze()
+    return _preloaded
+
+
+def _serve(app_path, sock):
+    import uvicorn
+
+    module_name, attr = app_path.split(":")
+    app = getattr(importlib.import_module(module_name), attr)
+    config = uvicorn.Config(app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(app_path, sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 1
+        try:
+            _serve(app_path, sock)
+            code = 0
+        except SystemExit as e:
+            # uvicorn sort via sys.exit(3) si le startup de l'app échoue
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            logger.exception("Échec du worker")
+        finally:
+            os._exit(code)
+    return pid
+
+
+def run(app_path, host="0.0.0.0", port=7860, workers=2, models_dir="models", preload_models=True,
+        max_crashes=MAX_CRASHES):
+    """Ouvre le socket, précharge les modèles et supervise `workers` processus.
+
+    Retourne 0 après un arrêt demandé (SIGTERM/SIGINT), 1 si les workers
+    échouent au démarrage plus de `max_crashes` fois de suite.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # L'app est importée avant le fork pour partager aussi FastAPI et sklearn
+    importlib.import_module(app_path.split(":")[0])
+    if preload_models:
+        serving = preload(models_dir)
+        logger.info(f"Modèles préchargés ({serving.artifact_format}), fork de {workers} workers")
+
+    children = {}  # pid -> instant du fork
+    for _ in range(workers):
+        children[_spawn(app_path, sock)] = time.monotonic()
+    stopping = False
+    crashes = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started_at = children.pop(pid, None)
+        if stopping or started_at is None:
+            continue
+
+        # Un worker mort est remplacé, il hérite toujours des modèles préchargés ;
+        # des échecs au démarrage répétés (artefact invalide...) espacent les essais
+        crashes = crashes + 1 if time.monotonic() - started_at < MIN_UPTIME else 0
+        if crashes > max_crashes:
+            logger.error(f"{crashes} échecs de démarrage consécutifs, arrêt du lanceur")
+            stop(signal.SIGTERM, None)
+            continue
+        delay = min(RESTART_DELAY * 2 ** max(crashes - 1, 0), MAX_RESTART_DELAY)
+        logger.warning(f"Worker {pid} arrêté (statut {status}), redémarrage dans {delay:g} s")
+        time.sleep(delay)
+        if not stopping:
+            children[_spawn(app_path, sock)] = time.monotonic()
+
+    sock.close()
+    return 1 if crashes > max_crashes else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur preforking partageant les modèles")
+    parser.add_argument("app", nargs="?", default="app_api:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", 2)))
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="chaque worker charge ses modèles (comportement uvicorn --workers)"
+    )
+    parser.add_argument(
+        "--max-crashes",
+        type=int,
+        default=MAX_CRASHES,
+        help="échecs de démarrage consécutifs tolérés avant de quitter avec le code 1"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    return run(args.app, args.host, args.port, args.workers, args.models_dir, not args.no_preload,
+               args.max_crashes)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+from starlette.responses import Response
+
+from src.models.inference import SENTIMENT_LABELS
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel, json standard en repli
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack est optionnel, réponses JSON seulement
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _to_builtin(obj):
+    return obj.tolist() if isinstance(obj, np.ndarray) else obj.item()
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON sérialisée avec orjson (tableaux NumPy natifs) si disponible"""
+    media_type = "application/json"
+
+    def render(self, content):
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=_to_builtin
+        ).encode("utf-8")
+
+
+class MsgPackResponse(Response):
+    """Réponse MessagePack : flottants binaires (9 octets) au lieu de leur texte"""
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+    def render(self, content):
+        return msgpack.packb(content, default=_to_builtin)
+
+
+def wants_msgpack(request):
+    """Le client demande MessagePack (`Accept`) et le module est installé"""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def compact_response(result, statistics, include_probabilities=False, binary=False):
+    """Réponse en tableaux parallèles, sans écho du texte ni objet par commentaire.
+
+    `labels[i]`, `confidences[i]` (et `probabilities[i]`) correspondent au
+    i-ème commentaire envoyé ; `sentiments` donne le nom de chaque label.
+    `binary` encode la réponse en MessagePack plutôt qu'en JSON.
+    """
+    content = {
+        "labels": np.asarray(result.labels, dtype=np.int64),
+        "confidences": np.asarray(result.confidences, dtype=np.float64),
+        "sentiments": {str(label): name for label, name in SENTIMENT_LABELS.items()},
+        "statistics": statistics,
+        "total_comments": len(result)
+    }
+    if include_probabilities:
+        content["probabilities"] = np.ascontiguousarray(result.probabilities, dtype=np.float64)
+    return (MsgPackResponse if binary else FastJSONResponse)(content)
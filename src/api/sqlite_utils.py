@@ -0,0 +1,10 @@
+"""Utilitaires partagés par les stores SQLite (cache de prédictions, vidéos)."""
+
+# Nombre max de paramètres par requête (limite SQLite par défaut: 999)
+MAX_PARAMS = 900
+
+
+def chunks(values, size=MAX_PARAMS):
+    """Découpe `values` en tranches utilisables dans un `IN (...)`"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+from functools import partial
+
+import anyio
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from src.models.inference import LOW_CONFIDENCE_THRESHOLD, prediction_entropy
+
+# Taille max d'un texte (identique à la validation de Comment)
+MAX_TEXT_LENGTH = 5000
+# Taille max d'une ligne NDJSON avant de considérer l'entrée invalide
+MAX_LINE_BYTES = 64 * 1024
+
+
+class StreamInputError(ValueError):
+    """Ligne NDJSON invalide dans le flux d'entrée"""
+
+
+class RequestBody:
+    """Corps de la requête, lu par chunks au rythme du générateur de réponse.
+
+    Remplace `request.stream()` et signale la fin de l'upload : après le
+    dernier chunk, `receive` ne sert plus qu'à annoncer la déconnexion.
+    """
+
+    def __init__(self, receive):
+        self._receive = receive
+        self.complete = asyncio.Event()
+
+    async def __aiter__(self):
+        while not self.complete.is_set():
+            message = await self._receive()
+            if message["type"] == "http.request":
+                if not message.get("more_body", False):
+                    self.complete.set()
+                if message.get("body"):
+                    yield message["body"]
+            elif message["type"] == "http.disconnect":
+                raise ClientDisconnect()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse qui répond pendant l'upload du corps de la requête.
+
+    La StreamingResponse standard consomme `receive()` dès le début pour
+    détecter la déconnexion du client, ce qui vole les chunks du corps quand
+    on répond avant la fin de l'upload. Ici le générateur lit seul le corps
+    (`request_body`) ; l'écoute de la déconnexion ne démarre qu'une fois
+    l'upload terminé. Avant, une déconnexion remonte par `request_body`.
+    """
+
+    def __init__(self, content, request_body, **kwargs):
+        super().__init__(content, **kwargs)
+        self.request_body = request_body
+
+    async def __call__(self, scope, receive, send):
+        spec_version = tuple(map(int, scope.get("asgi", {}).get("spec_version", "2.0").split(".")))
+        if spec_version >= (2, 4):
+            # Le serveur lève OSError sur send() une fois le client parti
+            try:
+                await self.stream_response(send)
+            except OSError:
+                raise ClientDisconnect()
+        else:
+            async with anyio.create_task_group() as task_group:
+                async def wrap(func):
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(wrap, partial(self.stream_response, send))
+                await wrap(partial(self.listen_for_disconnect, receive))
+
+        if self.background is not None:
+            await self.background()
+
+    async def listen_for_disconnect(self, receive):
+        await self.request_body.complete.wait()
+        await super().listen_for_disconnect(receive)
+
+
+class RunningStatistics:
+    """Statistiques accumulées chunk par chunk, en mémoire constante.
+
+    Seules les statistiques additives sont suivies : les percentiles de
+    confiance de `compute_statistics` demanderaient de garder tout le flux.
+    """
+
+    def __init__(self, n_classes=3):
+        self.counts = np.zeros(n_classes, dtype=np.int64)
+        self.confidence_sum = 0.0
+        self.entropy_sum = 0.0
+        self.low_confidence = 0
+        self.total = 0
+
+    def update(self, result):
+        confidences = np.asarray(result.confidences)
+        self.counts += np.bincount(np.asarray(result.labels, dtype=np.intp), minlength=len(self.counts))
+        self.confidence_sum += float(confidences.sum())
+        self.entropy_sum += float(prediction_entropy(result.probabilities).sum())
+        self.low_confidence += int(np.count_nonzero(confidences < LOW_CONFIDENCE_THRESHOLD))
+        self.total += len(result)
+
+    def as_dict(self):
+        total = max(self.total, 1)
+        return {
+            "negative_percentage": round(float(self.counts[0]) / total * 100, 2),
+            "neutral_percentage": round(float(self.counts[1]) / total * 100, 2),
+            "positive_percentage": round(float(self.counts[2]) / total * 100, 2),
+            "average_confidence": round(self.confidence_sum / total, 4),
+            "average_entropy": round(self.entropy_sum / total, 4),
+            "low_confidence_percentage": round(self.low_confidence / total * 100, 2)
+        }
+
+
+def parse_line(line, line_number):
+    """Extrait (id, texte) d'une ligne `{"text": ..., "id": ...}` ou `"texte"`"""
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise StreamInputError(f"Ligne {line_number}: JSON invalide ({e.msg})")
+
+    if isinstance(item, str):
+        comment_id, text = None, item
+    elif isinstance(item, dict) and isinstance(item.get("text"), str):
+        comment_id, text = item.get("id"), item["text"]
+    else:
+        raise StreamInputError(f"Ligne {line_number}: champ 'text' manquant")
+
+    if not 1 <= len(text) <= MAX_TEXT_LENGTH:
+        raise StreamInputError(
+            f"Ligne {line_number}: le texte doit faire entre 1 et {MAX_TEXT_LENGTH} caractères"
+        )
+    return comment_id, text
+
+
+async def iter_ndjson(byte_stream):
+    """Découpe un flux d'octets en lignes NDJSON au fil de leur arrivée"""
+    buffer = b""
+    line_number = 0
+    async for chunk in byte_stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield parse_line(line, line_number)
+        if len(buffer) > MAX_LINE_BYTES:
+            raise StreamInputError(f"Ligne {line_number + 1}: plus de {MAX_LINE_BYTES} octets")
+
+    if buffer.strip():
+        yield parse_line(buffer, line_number + 1)
+
+
+def _encode(obj):
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def stream_predictions(byte_stream, predict_fn, chunk_size=None):
+    """Prédit un flux NDJSON par chunks de taille fixe et renvoie du NDJSON.
+
+    Une ligne est émise par commentaire dès que son chunk est prédit, puis
+    une ligne finale avec les statistiques globales. Seul le chunk courant
+    est gardé en mémoire, quelle que soit la taille de l'entrée.
+    """
+    chunk_size = chunk_size or int(os.environ.get("STREAM_CHUNK_SIZE", 256))
+    stats = RunningStatistics()
+    ids, texts = [], []
+    index = 0
+
+    async def flush():
+        nonlocal index
+        result = await predict_fn(texts)
+        stats.update(result)
+        lines = []
+        for comment_id, sentiment, confidence, label in zip(
+            ids, result.sentiments, result.confidences.tolist(), result.labels.tolist()
+        ):
+            item = {
+                "index": index,
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "label": label
+            }
+            if comment_id is not None:
+                item["id"] = comment_id
+            lines.append(_encode(item))
+            index += 1
+        ids.clear()
+        texts.clear()
+        return b"".join(lines)
+
+    error = None
+    try:
+        try:
+            async for comment_id, text in iter_ndjson(byte_stream):
+                ids.append(comment_id)
+                texts.append(text)
+                if len(texts) >= chunk_size:
+                    yield await flush()
+        except StreamInputError as e:
+            # Les lignes valides reçues avant l'erreur sont prédites d'abord
+            error = e
+        if texts:
+            yield await flush()
+    except Exception as e:
+        error = e
+
+    if error is not None:
+        # Réponse déjà commencée : l'erreur est signalée dans le flux
+        yield _encode({"error": str(error), "processed": stats.total})
+        return
+
+    yield _encode({"statistics": stats.as_dict(), "total_comments": stats.total})
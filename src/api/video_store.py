@@ -0,0 +1,251 @@
+"""Analyses persistantes par vidéo : prédictions par commentaire + agrégats.
+
+Chaque vidéo a une ligne d'agrégats (comptes par classe, sommes de
+confiance et d'entropie) mise à jour dans la même transaction que
+l'insertion de ses nouveaux commentaires. Lire un résumé est donc une seule
+lecture de ligne, quelle que soit la taille du fil. Un identifiant de
+commentaire déjà connu n'est ni re-prédit ni recompté : `INSERT OR IGNORE`
+départage aussi deux requêtes concurrentes (plusieurs workers partagent le
+même fichier SQLite en mode WAL).
+
+Les prédictions stockées ne sont pas recalculées après un rechargement du
+modèle ; `model_version` indique la version de la dernière mise à jour.
+
+Les sessions de l'extension (un onglet, une vidéo) utilisent les mêmes
+tables sous des clés `session:<id>` et expirent après SESSION_TTL secondes
+sans mise à jour.
+
+Les méthodes de `VideoStore` sont bloquantes : depuis l'API, elles sont
+appelées dans un thread (`asyncio.to_thread`), d'où le verrou autour de la
+connexion partagée.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from src.api.sqlite_utils import chunks
+from src.models.inference import LOW_CONFIDENCE_THRESHOLD, SENTIMENT_LABELS, prediction_entropy
+
+# Identifiants YouTube (11 caractères) et identifiants de test raisonnables
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+SESSION_PREFIX = "session:"
+
+
+class VideoStore:
+    def __init__(self, path, session_ttl=86400):
+        self.path = str(path)
+        self.session_ttl = session_ttl
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS video_comments (
+                video_id TEXT NOT NULL,
+                comment_id TEXT NOT NULL,
+                label INTEGER NOT NULL,
+                confidence REAL NOT NULL,
+                model_version TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (video_id, comment_id)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL,
+                negative INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                positive INTEGER NOT NULL,
+                confidence_sum REAL NOT NULL,
+                entropy_sum REAL NOT NULL,
+                low_confidence INTEGER NOT NULL,
+                model_version TEXT,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls):
+        """Fichier configuré via VIDEO_STORE_PATH, expiration des sessions via SESSION_TTL"""
+        return cls(
+            os.environ.get("VIDEO_STORE_PATH", "video_store.sqlite3"),
+            session_ttl=float(os.environ.get("SESSION_TTL", 86400))
+        )
+
+    def predictions(self, video_id, comment_ids):
+        """{id: (label, confiance)} des commentaires déjà stockés parmi `comment_ids`"""
+        comment_ids = list(comment_ids)
+        with self._lock:
+            return self._predictions(video_id, comment_ids)
+
+    def _predictions(self, video_id, comment_ids):
+        found = {}
+        for chunk in chunks(comment_ids):
+            rows = self._conn.execute(
+                f"SELECT comment_id, label, confidence FROM video_comments WHERE video_id = ? "
+                f"AND comment_id IN ({','.join('?' * len(chunk))})",
+                [video_id, *chunk]
+            ).fetchall()
+            found.update((comment_id, (label, confidence)) for comment_id, label, confidence in rows)
+        return found
+
+    def unknown_ids(self, video_id, comment_ids):
+        """Identifiants pas encore stockés pour cette vidéo, dans l'ordre, sans doublons"""
+        comment_ids = list(dict.fromkeys(comment_ids))
+        known = self.predictions(video_id, comment_ids)
+        return [comment_id for comment_id in comment_ids if comment_id not in known]
+
+    def add_predictions(self, video_id, comment_ids, result, model_version=None):
+        """Stocke les prédictions et met à jour les agrégats ; retourne le nombre ajouté"""
+        now = time.time()
+        labels = np.asarray(result.labels, dtype=np.int64)
+        confidences = np.asarray(result.confidences, dtype=np.float64)
+        entropies = prediction_entropy(result.probabilities)
+        comment_ids = list(comment_ids)
+
+        with self._lock, self._conn:
+            # Verrou d'écriture pris avant la lecture : aucun autre worker ne
+            # peut insérer les mêmes ids entre le SELECT et l'INSERT
+            self._conn.execute("BEGIN IMMEDIATE")
+            known = self._predictions(video_id, comment_ids)
+            inserted = np.zeros(len(labels), dtype=bool)
+            for i, comment_id in enumerate(comment_ids):
+                if comment_id not in known:
+                    known[comment_id] = None
+                    inserted[i] = True
+
+            changes = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO video_comments VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (video_id, comment_ids[i], labels[i].item(), confidences[i].item(), model_version, now)
+                    for i in np.flatnonzero(inserted)
+                ]
+            )
+            added = self._conn.total_changes - changes
+            if added != inserted.sum():
+                raise RuntimeError(f"{added} commentaires insérés sur {int(inserted.sum())} attendus")
+
+            # Seuls les commentaires réellement insérés entrent dans les agrégats
+            counts = np.bincount(labels[inserted], minlength=3)
+            self._conn.execute(
+                """INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (video_id) DO UPDATE SET
+                    total = total + excluded.total,
+                    negative = negative + excluded.negative,
+                    neutral = neutral + excluded.neutral,
+                    positive = positive + excluded.positive,
+                    confidence_sum = confidence_sum + excluded.confidence_sum,
+                    entropy_sum = entropy_sum + excluded.entropy_sum,
+                    low_confidence = low_confidence + excluded.low_confidence,
+                    model_version = excluded.model_version,
+                    updated_at = excluded.updated_at""",
+                (
+                    video_id, added, int(counts[0]), int(counts[1]), int(counts[2]),
+                    float(confidences[inserted].sum()), float(entropies[inserted].sum()),
+                    int((confidences[inserted] < LOW_CONFIDENCE_THRESHOLD).sum()),
+                    model_version, now
+                )
+            )
+        return added
+
+    def summary(self, video_id):
+        """Résumé d'une vidéo en une lecture de ligne, None si inconnue"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total, negative, neutral, positive, confidence_sum, entropy_sum, "
+                "low_confidence, model_version, updated_at FROM videos WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        total, negative, neutral, positive, confidence_sum, entropy_sum, low, version, updated_at = row
+
+        def percentage(count):
+            return round(count / total * 100, 2) if total else 0.0
+
+        return {
+            "total_comments": total,
+            "counts": {"negative": negative, "neutral": neutral, "positive": positive},
+            "statistics": {
+                "negative_percentage": percentage(negative),
+                "neutral_percentage": percentage(neutral),
+                "positive_percentage": percentage(positive),
+                "average_confidence": round(confidence_sum / total, 4) if total else 0.0,
+                "average_entropy": round(entropy_sum / total, 4) if total else 0.0,
+                "low_confidence_percentage": percentage(low)
+            },
+            "model_version": version,
+            "updated_at": updated_at
+        }
+
+    def purge_sessions(self, min_interval=60):
+        """Supprime les sessions inactives ; au plus une passe par `min_interval` secondes"""
+        now = time.time()
+        if now - self._last_purge < min_interval:
+            return 0
+        self._last_purge = now
+        # Intervalle de clés [session:, session;) : parcours de la clé primaire
+        bounds = (SESSION_PREFIX, SESSION_PREFIX[:-1] + ";")
+        with self._lock, self._conn:
+            expired = [
+                row[:1] for row in self._conn.execute(
+                    "SELECT video_id FROM videos WHERE video_id >= ? AND video_id < ? AND updated_at < ?",
+                    (*bounds, now - self.session_ttl)
+                )
+            ]
+            self._conn.executemany("DELETE FROM video_comments WHERE video_id = ?", expired)
+            self._conn.executemany("DELETE FROM videos WHERE video_id = ?", expired)
+        return len(expired)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def session_key(session_id):
+    return SESSION_PREFIX + session_id
+
+
+async def append_comments(store, video_id, comments, predict_fn, model_version=None):
+    """Prédit les seuls commentaires inconnus de `(id, texte)` et met à jour le résumé.
+
+    La réponse contient la prédiction stockée de chaque identifiant envoyé,
+    qu'il soit nouveau ou déjà connu.
+    """
+    texts = {}
+    for comment_id, text in comments:
+        texts.setdefault(comment_id, text)
+
+    stored = await asyncio.to_thread(store.predictions, video_id, texts)
+    new_ids = [comment_id for comment_id in texts if comment_id not in stored]
+    added = 0
+    if new_ids:
+        result = await predict_fn([texts[comment_id] for comment_id in new_ids])
+        added = await asyncio.to_thread(store.add_predictions, video_id, new_ids, result, model_version)
+        # Relu depuis la base : une requête concurrente a pu insérer le même id
+        stored.update(await asyncio.to_thread(store.predictions, video_id, new_ids))
+    summary = await asyncio.to_thread(store.summary, video_id)
+
+    return {
+        "received": len(comments),
+        "new_comments": added,
+        "predictions": [
+            {
+                "id": comment_id,
+                "sentiment": SENTIMENT_LABELS[label],
+                "confidence": confidence,
+                "label": label
+            }
+            for comment_id, (label, confidence) in zip(texts, map(stored.get, texts))
+        ],
+        "summary": summary
+    }
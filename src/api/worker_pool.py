@@ -0,0 +1,126 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from src.models.inference import predict_texts
+from src.models.flat_artifact import load_serving_models
+
+# Modèles chargés dans chaque processus worker (mode "process")
+_worker_vectorizer = None
+_worker_scorer = None
+
+
+def _load_worker_models(models_dir):
+    """Initialiseur des processus workers"""
+    global _worker_vectorizer, _worker_scorer
+    serving = load_serving_models(models_dir)
+    _worker_vectorizer, _worker_scorer = serving.vectorizer, serving.scorer
+
+
+def _predict_in_worker(texts):
+    return predict_texts(_worker_vectorizer, _worker_scorer, texts)
+
+
+class PoolSaturatedError(Exception):
+    """Levée quand la file d'attente d'inférence est pleine"""
+
+
+class InferencePool:
+    """Pool borné pour sortir l'inférence CPU de la boucle asyncio.
+
+    Au plus `max_workers` batchs s'exécutent et `max_queue` attendent ; au-delà
+    les requêtes sont rejetées immédiatement (PoolSaturatedError) au lieu de
+    s'accumuler. Le compteur n'est manipulé que depuis la boucle d'événements,
+    il n'a donc pas besoin de verrou.
+    """
+
+    def __init__(self, kind="thread", max_workers=2, max_queue=32, models_dir="models"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Type de pool inconnu: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor = self._create_executor(models_dir)
+
+    def _create_executor(self, models_dir):
+        if self.kind == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_load_worker_models,
+                initargs=(str(models_dir),)
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference"
+        )
+
+    @classmethod
+    def from_env(cls, models_dir="models"):
+        """Configure le pool via INFERENCE_POOL, INFERENCE_WORKERS et INFERENCE_QUEUE_SIZE"""
+        return cls(
+            kind=os.environ.get("INFERENCE_POOL", "thread"),
+            max_workers=int(os.environ.get("INFERENCE_WORKERS", min(4, os.cpu_count() or 1))),
+            max_queue=int(os.environ.get("INFERENCE_QUEUE_SIZE", 32)),
+            models_dir=models_dir
+        )
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def check_capacity(self):
+        """Lève PoolSaturatedError si la file est pleine"""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"File d'inférence pleine ({self.in_flight}/{self.capacity})"
+            )
+
+    async def submit(self, fn, *args):
+        """Exécute fn(*args) dans le pool, ou rejette si la file est pleine"""
+        self.check_capacity()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def predict(self, vectorizer, model, texts):
+        """Vectorise et prédit un batch de textes dans le pool"""
+        if self.kind == "process":
+            return await self.submit(_predict_in_worker, texts)
+        return await self.submit(predict_texts, vectorizer, model, texts)
+
+    async def reload(self, models_dir):
+        """Mode process : démarre et chauffe de nouveaux workers, puis les échange.
+
+        Les batchs déjà soumis terminent sur les anciens workers. En mode
+        thread, les modèles sont passés à chaque appel : rien à faire.
+        """
+        if self.kind != "process":
+            return
+        executor = self._create_executor(models_dir)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _predict_in_worker, ["warmup"])
+            for _ in range(self.max_workers)
+        ))
+        old, self._executor = self._executor, executor
+        old.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
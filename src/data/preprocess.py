@@ -1,39 +1,26 @@
 import pandas as pd
-import re
+import os
 import nltk
 from pathlib import Path
 
+from src.data.text_cleaning import clean_text, clean_texts
+
 # Télécharger les ressources NLTK
 nltk.download('stopwords', quiet=True)
 from nltk.corpus import stopwords
 
 class TextCleaner:
-    def __init__(self):
+    def __init__(self, n_jobs=1):
         self.stop_words = set(stopwords.words('english'))
+        self.n_jobs = n_jobs
     
     def clean_text(self, text):
         """Nettoie un texte"""
-        if pd.isna(text):
-            return ""
-        
-        text = str(text).lower()
-        
-        # Supprimer les URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-        
-        # Supprimer les mentions (@username)
-        text = re.sub(r'@\w+', '', text)
-        
-        # Supprimer les hashtags mais garder le texte
-        text = re.sub(r'#(\w+)', r'\1', text)
-        
-        # Garder les lettres, chiffres et espaces de base
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        
-        # Supprimer les espaces multiples
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return clean_text(text)
+    
+    def clean_series(self, series):
+        """Nettoie une colonne pandas en conservant son index"""
+        return pd.Series(clean_texts(series, self.n_jobs), index=series.index, dtype=object)
     
     def process_dataset(self, input_path, output_path):
         """Traite le dataset complet"""
@@ -41,7 +28,7 @@ class TextCleaner:
         df = pd.read_csv(input_path)
         
         print(" Nettoyage des textes...")
-        df['text'] = df['clean_comment'].apply(self.clean_text)
+        df['text'] = self.clean_series(df['clean_comment'])
         
         # Mapper les labels: -1 -> 0 (neg), 0 -> 1 (neutral), 1 -> 2 (pos)
         df['label'] = df['category'].map({-1: 0, 0: 1, 1: 2})
@@ -65,7 +52,7 @@ class TextCleaner:
         return df_clean
 
 if __name__ == "__main__":
-    cleaner = TextCleaner()
+    cleaner = TextCleaner(n_jobs=int(os.environ.get("CLEAN_JOBS", -1)))
     df = cleaner.process_dataset(
         "data/raw/reddit.csv",
         "data/processed/cleaned_data.csv"
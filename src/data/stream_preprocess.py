@@ -0,0 +1,179 @@
+"""Prétraitement out-of-core : nettoyage, labels et split en une seule passe.
+
+Le CSV brut est lu par chunks ; chaque chunk est nettoyé, ses labels sont
+remappés, puis chaque ligne est affectée à train ou test selon un hash de
+son texte nettoyé. L'affectation ne dépend ni de l'ordre ni de la taille
+des chunks et les doublons tombent toujours du même côté (pas de fuite
+train/test). Le hash ne dépend pas du label : le split n'est stratifié
+qu'en espérance, chaque classe approchant `test_size` sans la garantie
+exacte d'un split stratifié en mémoire. Les chunks sont écrits en
+partitions Parquet (ou Feather) :
+
+    data/processed/stream/
+        train/part-00000.parquet ...
+        test/part-00000.parquet ...
+        _manifest.json
+
+La mémoire de pointe est bornée par `chunk_size` x (chunks en vol), quelle
+que soit la taille de l'entrée.
+"""
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.text_cleaning import clean_texts
+
+LABEL_MAP = {-1: 0, 0: 1, 1: 2}
+FORMATS = ("parquet", "feather")
+MANIFEST_FILE = "_manifest.json"
+
+
+def hash_split(texts, test_size=0.2, random_state=42):
+    """Masque booléen `is_test`, déterministe pour un texte et une graine donnés"""
+    hash_key = f"{random_state:016d}"[-16:]
+    hashes = pd.util.hash_pandas_object(pd.Series(texts, dtype=object), index=False, hash_key=hash_key)
+    # uint64 -> [0, 1) ; les 53 bits de poids fort suffisent à la précision d'un float64
+    return (hashes.to_numpy() >> np.uint64(11)) / float(1 << 53) < test_size
+
+
+def write_partition(df, path, fmt):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = df.reset_index(drop=True)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+
+def process_chunk(chunk, index, output_dir, test_size, random_state, fmt):
+    """Nettoie, étiquette, découpe et écrit un chunk ; retourne ses comptes"""
+    text = pd.Series(clean_texts(chunk['clean_comment']), index=chunk.index, dtype=object)
+    label = chunk['category'].map(LABEL_MAP)
+
+    # Même filtre que TextCleaner.process_dataset ; labels inconnus écartés
+    keep = (text.str.len() > 5) & label.notna()
+    df = pd.DataFrame({'text': text[keep], 'label': label[keep].astype(np.int8)})
+
+    is_test = hash_split(df['text'], test_size, random_state)
+    counts = {}
+    for split, part in (("train", df[~is_test]), ("test", df[is_test])):
+        if len(part):
+            write_partition(part, Path(output_dir) / split / f"part-{index:05d}.{fmt}", fmt)
+        counts[split] = part['label'].value_counts().to_dict()
+    return {"rows_in": len(chunk), "rows_out": len(df), "counts": counts}
+
+
+def preprocess_stream(input_path, output_dir="data/processed/stream", chunk_size=100_000,
+                      test_size=0.2, random_state=42, fmt="parquet", n_jobs=1):
+    """Pipeline complet ; `n_jobs` chunks sont traités en parallèle (-1 : tous les cœurs)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(FORMATS)})")
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    output_dir = Path(output_dir)
+    for split in ("train", "test"):
+        for old in (output_dir / split).glob("part-*"):
+            old.unlink()
+
+    totals = {"rows_in": 0, "rows_out": 0, "partitions": 0,
+              "counts": {"train": {}, "test": {}}}
+
+    def accumulate(stats):
+        totals["rows_in"] += stats["rows_in"]
+        totals["rows_out"] += stats["rows_out"]
+        totals["partitions"] += 1
+        for split, counts in stats["counts"].items():
+            for label, count in counts.items():
+                totals["counts"][split][int(label)] = totals["counts"][split].get(int(label), 0) + count
+        print(f" Chunk {totals['partitions']}: {totals['rows_in']} lignes lues, {totals['rows_out']} gardées")
+
+    reader = pd.read_csv(input_path, usecols=['clean_comment', 'category'], chunksize=chunk_size)
+    args = (output_dir, test_size, random_state, fmt)
+
+    if n_jobs <= 1:
+        for index, chunk in enumerate(reader):
+            accumulate(process_chunk(chunk, index, *args))
+    else:
+        # Au plus 2 chunks en vol par processus : la lecture attend les workers
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            pending = deque()
+            for index, chunk in enumerate(reader):
+                pending.append(executor.submit(process_chunk, chunk, index, *args))
+                if len(pending) >= 2 * n_jobs:
+                    accumulate(pending.popleft().result())
+            while pending:
+                accumulate(pending.popleft().result())
+
+    manifest = {
+        "format": fmt,
+        "source": str(input_path),
+        "chunk_size": chunk_size,
+        "test_size": test_size,
+        "random_state": random_state,
+        "split": "hash(text)",
+        **totals
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"\n Partitions écrites dans {output_dir} ({totals['partitions']} chunks)")
+    for split in ("train", "test"):
+        counts = totals["counts"][split]
+        print(f" {split}: {sum(counts.values())} exemples, labels {dict(sorted(counts.items()))}")
+    return manifest
+
+
+def partition_files(path):
+    """Fichiers de partition d'un split, dans l'ordre des chunks"""
+    path = Path(path)
+    return sorted(p for p in path.iterdir() if p.suffix in (".parquet", ".feather"))
+
+
+def iter_partitions(path, columns=('text', 'label')):
+    """Itère les partitions d'un split sans tout charger"""
+    for part in partition_files(path):
+        if part.suffix == ".parquet":
+            yield pd.read_parquet(part, columns=list(columns))
+        else:
+            yield pd.read_feather(part, columns=list(columns))
+
+
+def read_split(path):
+    """Charge un split : CSV, fichier Parquet/Feather ou répertoire de partitions"""
+    path = Path(path)
+    if path.is_dir():
+        return pd.concat(iter_partitions(path), ignore_index=True)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    if path.suffix == ".feather":
+        return pd.read_feather(path)
+    return pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prétraitement par chunks vers des partitions colonnaires")
+    parser.add_argument("--input", default="data/raw/reddit.csv")
+    parser.add_argument("--output", default="data/processed/stream")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--jobs", type=int, default=1, help="chunks traités en parallèle (-1 : tous les cœurs)")
+    args = parser.parse_args()
+
+    preprocess_stream(
+        args.input, args.output, args.chunk_size, args.test_size,
+        args.random_state, args.format, args.jobs
+    )
+
+
+if __name__ == "__main__":
+    main()
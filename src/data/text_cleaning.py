@@ -0,0 +1,63 @@
+"""Nettoyage des commentaires, sans dépendance NLTK : importable par l'API."""
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Regex compilées une fois ; l'ordre des passes est celui d'origine
+URL_RE = re.compile(r'http\S+|www\S+|https\S+')
+MENTION_RE = re.compile(r'@\w+')
+HASHTAG_RE = re.compile(r'#(?=\w)')
+# `[^a-z0-9\s]` -> ' ' puis `\s+` -> ' ' revient à remplacer chaque suite de
+# caractères hors [a-z0-9] par une espace : une seule passe
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+# Même remplacement pour un texte ASCII, via bytes.translate (table de 256 octets)
+ASCII_ALNUM_TABLE = bytes(c if chr(c) in 'abcdefghijklmnopqrstuvwxyz0123456789' else 32 for c in range(256))
+
+# Taille des chunks envoyés aux processus en mode parallèle
+CLEAN_CHUNK_SIZE = 20_000
+
+
+def clean_tokens(text):
+    """Mots [a-z0-9]+ du texte nettoyé (URLs, mentions et '#' retirés)"""
+    if not isinstance(text, str):
+        # None / NaN (cellules vides de pandas) : texte vide
+        if text is None or (isinstance(text, float) and math.isnan(text)):
+            return []
+        text = str(text)
+
+    text = text.lower()
+
+    # Chaque passe n'est faite que si son motif peut apparaître
+    if 'http' in text or 'www' in text:
+        text = URL_RE.sub('', text)
+    if '@' in text:
+        text = MENTION_RE.sub('', text)
+    if '#' in text:
+        text = HASHTAG_RE.sub('', text)
+
+    if text.isascii():
+        return text.encode().translate(ASCII_ALNUM_TABLE).decode().split()
+    return NON_ALNUM_RE.sub(' ', text).split()
+
+
+def clean_text(text):
+    """Nettoie un texte (URLs, mentions, '#', ponctuation, espaces)"""
+    return ' '.join(clean_tokens(text))
+
+
+def _clean_chunk(texts):
+    return [clean_text(text) for text in texts]
+
+
+def clean_texts(texts, n_jobs=1, chunk_size=CLEAN_CHUNK_SIZE):
+    """Nettoie une séquence de textes, sur `n_jobs` processus si > 1 (-1 : tous les cœurs)"""
+    texts = list(texts)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(texts) <= chunk_size:
+        return _clean_chunk(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return [text for chunk in executor.map(_clean_chunk, chunks) for text in chunk]
@@ -0,0 +1,59 @@
+import hashlib
+import json
+from pathlib import Path
+
+VECTORIZER_FILE = "tfidf_vectorizer.joblib"
+MODEL_FILE = "sentiment_model.joblib"
+SCORER_FILE = "linear_scorer.npz"
+METADATA_FILE = "model_metadata.json"
+# Bundle plat servi en mmap (voir flat_artifact)
+FLAT_DIR = "serving"
+HEADER_FILE = "header.json"
+
+
+def _header_bytes(header):
+    """En-tête du bundle plat sans sa propre version, sous forme canonique"""
+    return json.dumps(
+        {key: value for key, value in header.items() if key != 'model_version'}, sort_keys=True
+    ).encode()
+
+
+def compute_model_version(models_dir, flat_header=None):
+    """Empreinte du contenu des artefacts servis (vectoriseur, modèle, scoreur, bundle plat).
+
+    L'en-tête du bundle est haché sans son champ `model_version`, qui contient
+    cette empreinte ; `flat_header` remplace l'en-tête lu sur disque (export
+    en cours).
+    """
+    models_dir = Path(models_dir)
+    digest = hashlib.sha256()
+    for name in (VECTORIZER_FILE, MODEL_FILE, SCORER_FILE):
+        path = models_dir / name
+        if not path.exists():
+            continue
+        digest.update(name.encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+
+    header_path = models_dir / FLAT_DIR / HEADER_FILE
+    if flat_header is None and header_path.exists():
+        with open(header_path) as f:
+            flat_header = json.load(f)
+    if flat_header is not None:
+        digest.update(f"{FLAT_DIR}/{HEADER_FILE}".encode())
+        digest.update(_header_bytes(flat_header))
+    return digest.hexdigest()[:16]
+
+
+def load_metadata(models_dir):
+    path = Path(models_dir) / METADATA_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_model_version(models_dir):
+    """Version du modèle déclarée dans model_metadata.json, sinon calculée"""
+    return load_metadata(models_dir).get('model_version') or compute_model_version(models_dir)
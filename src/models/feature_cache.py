@@ -0,0 +1,78 @@
+"""Cache disque des features : vectoriseur entraîné + matrices creuses train/test.
+
+La clé est une empreinte des textes train/test, du mode de features, des
+paramètres du vectoriseur et de la version de scikit-learn. Une relance sur
+les mêmes données (ou un balayage de modèles) recharge les matrices avec
+`scipy.sparse.load_npz` au lieu de refaire la featurisation :
+
+    data/features/<clé>/
+        vectorizer.joblib
+        X_train.npz
+        X_test.npz
+        meta.json
+
+Les labels n'entrent pas dans la clé : ils ne changent pas les features.
+"""
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import scipy.sparse as sp
+import sklearn
+
+FEATURE_CACHE_DIR = "data/features"
+
+
+def _texts_digest(digest, texts):
+    hashes = pd.util.hash_pandas_object(pd.Series(texts, dtype=object), index=False)
+    digest.update(len(hashes).to_bytes(8, "little"))
+    digest.update(hashes.to_numpy().tobytes())
+
+
+def feature_cache_key(train_texts, test_texts, feature_mode, vectorizer):
+    """Empreinte des données et de la configuration du vectoriseur (non entraîné)"""
+    digest = hashlib.sha256()
+    params = {name: repr(value) for name, value in sorted(vectorizer.get_params().items())}
+    digest.update(json.dumps(
+        {"feature_mode": feature_mode, "params": params, "sklearn": sklearn.__version__},
+        sort_keys=True
+    ).encode())
+    _texts_digest(digest, train_texts)
+    _texts_digest(digest, test_texts)
+    return digest.hexdigest()[:16]
+
+
+def load_features(cache_dir, key):
+    """(vectoriseur, X_train, X_test) ou None si la clé est absente"""
+    path = Path(cache_dir) / key
+    if not (path / "meta.json").exists():
+        return None
+    return (
+        joblib.load(path / "vectorizer.joblib"),
+        sp.load_npz(path / "X_train.npz"),
+        sp.load_npz(path / "X_test.npz")
+    )
+
+
+def save_features(cache_dir, key, vectorizer, X_train, X_test, feature_mode):
+    """Écrit une entrée du cache ; meta.json en dernier marque l'entrée complète"""
+    path = Path(cache_dir) / key
+    tmp = Path(cache_dir) / f".{key}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    joblib.dump(vectorizer, tmp / "vectorizer.joblib")
+    sp.save_npz(tmp / "X_train.npz", X_train.tocsr(), compressed=False)
+    sp.save_npz(tmp / "X_test.npz", X_test.tocsr(), compressed=False)
+    with open(tmp / "meta.json", "w") as f:
+        json.dump({
+            "feature_mode": feature_mode,
+            "train_shape": list(X_train.shape),
+            "test_shape": list(X_test.shape),
+            "sklearn": sklearn.__version__
+        }, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+    return path
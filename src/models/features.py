@@ -0,0 +1,83 @@
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from src.data.text_cleaning import clean_tokens
+
+FEATURE_MODES = ("tfidf", "hashing")
+
+# 2^18 colonnes : peu de collisions pour des n-grammes 1-2 de commentaires,
+# et des coefficients denses (n_features x 3 paires) de ~6 Mo
+HASHING_N_FEATURES = 2 ** 18
+
+
+class CommentAnalyzer:
+    """Analyseur des vectoriseurs : nettoyage, tokens et n-grammes en une passe.
+
+    Remplace le prétraitement de sklearn (minuscules, accents, regex de
+    tokens) par celui de `clean_text` : l'entraînement (textes déjà
+    nettoyés) et l'API (textes bruts) produisent les mêmes n-grammes.
+    Comme `token_pattern` par défaut, les mots d'un caractère sont ignorés.
+    """
+
+    def __init__(self, ngram_range=(1, 2)):
+        self.ngram_range = tuple(ngram_range)
+
+    def __call__(self, text):
+        tokens = [token for token in clean_tokens(text) if len(token) > 1]
+        min_n, max_n = self.ngram_range
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            ngrams.extend(map(' '.join, zip(*(tokens[i:] for i in range(n)))))
+        return ngrams
+
+    def __repr__(self):
+        # Utilisé par la clé du cache de features : doit rester stable
+        return f"CommentAnalyzer(ngram_range={self.ngram_range})"
+
+
+def create_vectorizer(mode="tfidf"):
+    """Crée le featurizer non entraîné pour le mode demandé.
+
+    - `tfidf` : TfidfVectorizer avec vocabulaire (`vocabulary_`, dict Python)
+    - `hashing` : HashingVectorizer sans état + vecteur IDF stocké ; pas de
+      dictionnaire à charger ni à consulter par token
+
+    Les deux utilisent `CommentAnalyzer` : l'API peut leur passer le texte brut.
+    """
+    if mode == "tfidf":
+        return TfidfVectorizer(
+            max_features=5000,
+            analyzer=CommentAnalyzer(ngram_range=(1, 2)),  # Unigrammes et bigrammes
+            min_df=2,            # Ignorer les termes très rares
+            max_df=0.95,         # Ignorer les termes trop fréquents
+        )
+    if mode == "hashing":
+        return Pipeline([
+            ("hashing", HashingVectorizer(
+                n_features=HASHING_N_FEATURES,
+                analyzer=CommentAnalyzer(ngram_range=(1, 2)),
+                alternate_sign=False,
+                norm=None
+            )),
+            ("idf", TfidfTransformer())
+        ])
+    raise ValueError(f"Mode de features inconnu: {mode} (attendu: {', '.join(FEATURE_MODES)})")
+
+
+def text_analyzer(vectorizer):
+    """`comment` (analyseur fusionné) ou `sklearn` (artefacts plus anciens)"""
+    if not hasattr(vectorizer, 'vocabulary_'):
+        vectorizer = vectorizer.named_steps["hashing"]
+    return "comment" if isinstance(vectorizer.analyzer, CommentAnalyzer) else "sklearn"
+
+
+def vectorizer_info(vectorizer):
+    """Mode, nombre de features et analyseur d'un featurizer entraîné"""
+    if hasattr(vectorizer, 'vocabulary_'):
+        info = {"feature_mode": "tfidf", "n_features": len(vectorizer.vocabulary_)}
+    else:
+        info = {
+            "feature_mode": "hashing",
+            "n_features": vectorizer.named_steps["hashing"].n_features
+        }
+    return {**info, "text_analyzer": text_analyzer(vectorizer)}
@@ -0,0 +1,182 @@
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from src.models.artifacts import (
+    FLAT_DIR, HEADER_FILE, MODEL_FILE, VECTORIZER_FILE, compute_model_version, load_metadata
+)
+from src.models.features import CommentAnalyzer, vectorizer_info
+from src.models.linear_scorer import (
+    LinearOvRScorer, LinearSoftmaxScorer, LinearSVCScorer, compile_model, load_scorer
+)
+
+FORMAT_VERSION = 1
+
+SCORER_KINDS = {
+    "linear_svc_ovo": LinearSVCScorer,
+    "softmax": LinearSoftmaxScorer,
+    "linear_ovr": LinearOvRScorer
+}
+
+
+@dataclass
+class ServingModels:
+    vectorizer: object
+    model: object
+    scorer: object
+    model_type: str
+    artifact_format: str
+
+
+def _json_params(estimator):
+    """Paramètres sérialisables en JSON ; `dtype` reste à sa valeur par défaut"""
+    params = {}
+    for name, value in estimator.get_params().items():
+        if name in ('vocabulary', 'dtype'):
+            continue
+        if value is None or isinstance(value, (str, bool, int, float)):
+            params[name] = value
+        elif isinstance(value, tuple):
+            params[name] = list(value)
+        elif isinstance(value, CommentAnalyzer):
+            params[name] = {"comment_analyzer": {"ngram_range": list(value.ngram_range)}}
+        else:
+            raise ValueError(f"Paramètre {name} non exportable: {value!r}")
+    return params
+
+
+def _restore_param(name, value):
+    if isinstance(value, dict) and "comment_analyzer" in value:
+        return CommentAnalyzer(**value["comment_analyzer"])
+    return tuple(value) if name == 'ngram_range' else value
+
+
+def _restore_params(params):
+    return {name: _restore_param(name, value) for name, value in params.items()}
+
+
+def export_flat_artifact(models_dir, vectorizer, model, model_type, model_version=None):
+    """Écrit le bundle plat `models/serving/` : un `.npy` par tableau + un en-tête.
+
+    Sans `model_version`, l'en-tête reçoit l'empreinte `compute_model_version`
+    des joblib et de cet en-tête : l'exporter avant d'écrire les métadonnées.
+    Retourne le chemin du bundle, ou None si le modèle n'est pas linéaire
+    (un ancien bundle est alors supprimé pour ne pas masquer le joblib).
+    """
+    models_dir = Path(models_dir)
+    target = models_dir / FLAT_DIR
+    try:
+        scorer = compile_model(model)
+    except (ValueError, AttributeError):
+        shutil.rmtree(target, ignore_errors=True)
+        return None
+
+    info = vectorizer_info(vectorizer)
+    arrays = dict(scorer.arrays())
+    if info['feature_mode'] == 'tfidf':
+        terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+        arrays['vocabulary'] = terms.astype(str)
+        arrays['idf'] = vectorizer.idf_
+        vectorizer_params = {"tfidf": _json_params(vectorizer)}
+    else:
+        arrays['idf'] = vectorizer.named_steps["idf"].idf_
+        vectorizer_params = {
+            "hashing": _json_params(vectorizer.named_steps["hashing"]),
+            "idf": _json_params(vectorizer.named_steps["idf"])
+        }
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version,
+        "model_type": model_type,
+        "scorer_kind": next(k for k, cls in SCORER_KINDS.items() if isinstance(scorer, cls)),
+        **info,
+        "vectorizer_params": vectorizer_params,
+        "arrays": {
+            name: {"dtype": str(np.asarray(a).dtype), "shape": list(np.shape(a))}
+            for name, a in arrays.items()
+        }
+    }
+    if model_version is None:
+        header["model_version"] = compute_model_version(models_dir, flat_header=header)
+
+    # Écriture dans un répertoire temporaire puis remplacement en un rename
+    tmp = models_dir / f".{FLAT_DIR}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, a in arrays.items():
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(a), allow_pickle=False)
+    with open(tmp / HEADER_FILE, 'w') as f:
+        json.dump(header, f, indent=2)
+    shutil.rmtree(target, ignore_errors=True)
+    tmp.rename(target)
+    return target
+
+
+def read_flat_header(path):
+    """En-tête du bundle plat, sans charger ses tableaux"""
+    with open(Path(path) / HEADER_FILE) as f:
+        header = json.load(f)
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Version de format non supportée: {header.get('format_version')}")
+    return header
+
+
+def load_flat_artifact(path, header=None):
+    """Charge le bundle plat en mmap : les pages sont partagées entre workers forkés"""
+    path = Path(path)
+    if header is None:
+        header = read_flat_header(path)
+
+    def array(name):
+        return np.load(path / f"{name}.npy", mmap_mode='r', allow_pickle=False)
+
+    params = header["vectorizer_params"]
+    if header["feature_mode"] == "tfidf":
+        # Le dict vocabulaire reste privé à chaque processus ; l'IDF est partagé
+        terms = array("vocabulary")
+        vectorizer = TfidfVectorizer(
+            vocabulary=dict(zip(terms.tolist(), range(len(terms)))),
+            **_restore_params(params["tfidf"])
+        )
+        vectorizer.idf_ = array("idf")
+    else:
+        transformer = TfidfTransformer(**_restore_params(params["idf"]))
+        transformer.idf_ = array("idf")
+        vectorizer = Pipeline([
+            ("hashing", HashingVectorizer(**_restore_params(params["hashing"]))),
+            ("idf", transformer)
+        ])
+
+    scorer_cls = SCORER_KINDS[header["scorer_kind"]]
+    scorer = scorer_cls.from_arrays({
+        name: array(name) for name in header["arrays"] if name not in ("vocabulary", "idf")
+    })
+    return header, vectorizer, scorer
+
+
+def load_serving_models(models_dir):
+    """Bundle plat s'il est présent et à jour, sinon les pickles joblib"""
+    models_dir = Path(models_dir)
+    flat_dir = models_dir / FLAT_DIR
+    if (flat_dir / HEADER_FILE).exists():
+        # Version comparée avant de mapper les tableaux d'un bundle périmé
+        header = read_flat_header(flat_dir)
+        expected = load_metadata(models_dir).get('model_version')
+        if expected is None or header["model_version"] == expected:
+            header, vectorizer, scorer = load_flat_artifact(flat_dir, header)
+            return ServingModels(vectorizer, scorer, scorer, header["model_type"], "flat")
+
+    vectorizer = joblib.load(models_dir / VECTORIZER_FILE)
+    model = joblib.load(models_dir / MODEL_FILE)
+    return ServingModels(
+        vectorizer, model, load_scorer(models_dir, model), type(model).__name__, "joblib"
+    )
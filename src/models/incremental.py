@@ -0,0 +1,262 @@
+"""Entraînement incrémental : featurizer figé + SGD `partial_fit` par mini-batchs.
+
+Le featurizer ne change plus après le premier batch, pour que les features
+restent comparables d'un batch à l'autre :
+
+- `hashing` : HashingVectorizer sans état ; l'IDF est estimé sur le premier
+  mini-batch puis gelé
+- `frozen` : vectoriseur déjà entraîné repris de models/ (vocabulaire gelé)
+
+Un SGDClassifier one-vs-rest (perte `log_loss` ou `hinge`) est mis à jour
+par `partial_fit`. Une fraction de chaque batch, choisie par hash du texte,
+n'est pas apprise : elle alimente un réservoir borné (les exemples les plus
+récents) qui sert à recalibrer par Platt chaque classe à la publication.
+L'état complet est checkpointé après chaque batch ; la publication réécrit
+les artefacts servis (joblib, bundle plat, métadonnées) sans refit complet,
+et le rechargement à chaud de l'API les prend en compte.
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+from src.data.stream_preprocess import hash_split, iter_partitions, read_split
+from src.models.artifacts import (
+    METADATA_FILE, MODEL_FILE, SCORER_FILE, VECTORIZER_FILE, compute_model_version
+)
+from src.models.features import create_vectorizer, vectorizer_info
+from src.models.flat_artifact import export_flat_artifact
+from src.models.linear_scorer import LinearOvRScorer
+
+CLASSES = np.array([0, 1, 2])
+LOSSES = ("log_loss", "hinge")
+FEATURIZERS = ("hashing", "frozen")
+MODEL_TYPE = "SGD (incrémental)"
+
+CHECKPOINT_DIR = "incremental"
+CHECKPOINT_FILE = "checkpoint.joblib"
+
+# 5% de chaque batch réservés à la calibration, 20k exemples au plus
+CALIBRATION_FRACTION = 0.05
+CALIBRATION_SIZE = 20_000
+# En dessous, la sigmoïde brute de SGD (celle de predict_proba) est gardée
+MIN_CALIBRATION_SIZE = 200
+
+
+class IncrementalTrainer:
+    def __init__(self, featurizer="hashing", loss="log_loss", alpha=1e-5,
+                 models_dir="models", random_state=42):
+        if featurizer not in FEATURIZERS:
+            raise ValueError(f"Featurizer inconnu: {featurizer} (attendu: {', '.join(FEATURIZERS)})")
+        if loss not in LOSSES:
+            raise ValueError(f"Perte inconnue: {loss} (attendu: {', '.join(LOSSES)})")
+        self.featurizer = featurizer
+        self.loss = loss
+        self.models_dir = Path(models_dir)
+        self.random_state = random_state
+        self.vectorizer = None
+        self.model = SGDClassifier(loss=loss, alpha=alpha, random_state=random_state)
+        self.calibration = pd.DataFrame({'text': pd.Series(dtype=object), 'label': pd.Series(dtype=np.int64)})
+        self.n_seen = 0
+        self.n_batches = 0
+
+    def _init_vectorizer(self, texts):
+        if self.featurizer == "frozen":
+            path = self.models_dir / VECTORIZER_FILE
+            if not path.exists():
+                raise FileNotFoundError(f"Vectoriseur à geler introuvable: {path}")
+            self.vectorizer = joblib.load(path)
+        else:
+            self.vectorizer = create_vectorizer("hashing").fit(texts)
+
+    def partial_fit(self, texts, labels):
+        """Apprend un mini-batch ; sa part de calibration est mise de côté"""
+        texts = pd.Series(texts, dtype=object).fillna("").astype(str).reset_index(drop=True)
+        labels = np.asarray(labels, dtype=np.int64)
+        if self.vectorizer is None:
+            self._init_vectorizer(texts)
+
+        held = hash_split(texts, CALIBRATION_FRACTION, self.random_state)
+        self.calibration = pd.concat(
+            [self.calibration, pd.DataFrame({'text': texts[held], 'label': labels[held]})],
+            ignore_index=True
+        ).tail(CALIBRATION_SIZE)
+
+        if (~held).any():
+            X = self.vectorizer.transform(texts[~held])
+            self.model.partial_fit(X, labels[~held], classes=CLASSES)
+        self.n_seen += int((~held).sum())
+        self.n_batches += 1
+
+    def calibrate(self):
+        """Scoreur servi : poids SGD + sigmoïde de Platt ajustée par classe"""
+        coef = np.ascontiguousarray(self.model.coef_.T)
+        intercept = self.model.intercept_.copy()
+        # A = -1, B = 0 : sigmoïde brute, identique à SGDClassifier.predict_proba
+        prob_a = -np.ones(len(CLASSES))
+        prob_b = np.zeros(len(CLASSES))
+
+        if len(self.calibration) >= MIN_CALIBRATION_SIZE:
+            dec = np.asarray(self.vectorizer.transform(self.calibration['text']) @ coef) + intercept
+            labels = self.calibration['label'].to_numpy()
+            for k, label in enumerate(CLASSES):
+                target = labels == label
+                if target.all() or not target.any():
+                    continue
+                platt = LogisticRegression(C=1e4).fit(dec[:, [k]], target)
+                prob_a[k] = -platt.coef_[0, 0]
+                prob_b[k] = -platt.intercept_[0]
+
+        return LinearOvRScorer(coef, intercept, prob_a, prob_b, CLASSES)
+
+    def evaluate(self, texts, labels, scorer=None):
+        scorer = scorer or self.calibrate()
+        predictions = scorer.predict(self.vectorizer.transform(pd.Series(texts).fillna("").astype(str)))
+        return {
+            'accuracy': float(accuracy_score(labels, predictions)),
+            'f1_score': float(f1_score(labels, predictions, average='weighted'))
+        }
+
+    def checkpoint_path(self):
+        return self.models_dir / CHECKPOINT_DIR / CHECKPOINT_FILE
+
+    def checkpoint(self):
+        """Sauvegarde atomique de l'état (featurizer, SGD, réservoir de calibration)"""
+        path = self.checkpoint_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        joblib.dump(self.__dict__, tmp)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def resume(cls, models_dir="models"):
+        """Reprend l'entraînement depuis le dernier checkpoint"""
+        trainer = cls.__new__(cls)
+        trainer.__dict__.update(joblib.load(Path(models_dir) / CHECKPOINT_DIR / CHECKPOINT_FILE))
+        trainer.models_dir = Path(models_dir)
+        return trainer
+
+    def publish(self, test_texts=None, test_labels=None):
+        """Réécrit les artefacts servis à partir de l'état courant"""
+        if self.vectorizer is None:
+            raise ValueError("Aucun batch appris : rien à publier")
+        models_dir = self.models_dir
+        models_dir.mkdir(parents=True, exist_ok=True)
+        scorer = self.calibrate()
+
+        joblib.dump(self.vectorizer, models_dir / VECTORIZER_FILE)
+        joblib.dump(scorer, models_dir / MODEL_FILE)
+        # Le scoreur compilé d'un ancien SVC masquerait le nouveau modèle
+        (models_dir / SCORER_FILE).unlink(missing_ok=True)
+        # Avant model_version, qui inclut l'en-tête du bundle
+        export_flat_artifact(models_dir, self.vectorizer, scorer, MODEL_TYPE)
+
+        metadata = {
+            'model_type': MODEL_TYPE,
+            'training': 'incremental',
+            'loss': self.loss,
+            'featurizer': self.featurizer,
+            'n_seen': self.n_seen,
+            'n_batches': self.n_batches,
+            'calibration_size': len(self.calibration),
+            **vectorizer_info(self.vectorizer),
+            'classes': {0: 'Négatif', 1: 'Neutre', 2: 'Positif'},
+            'model_version': compute_model_version(models_dir)
+        }
+        if test_texts is not None:
+            metadata.update(self.evaluate(test_texts, test_labels, scorer))
+
+        # Les métadonnées en dernier : leur version déclenche le rechargement à chaud
+        metadata_path = models_dir / METADATA_FILE
+        tmp = metadata_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp, metadata_path)
+        return metadata
+
+
+def iter_batches(path, batch_size):
+    """Mini-batchs (text, label) d'un CSV, d'un fichier ou d'un répertoire de partitions"""
+    path = Path(path)
+    if path.is_dir():
+        frames = iter_partitions(path)
+    elif path.suffix == ".csv":
+        frames = pd.read_csv(path, usecols=['text', 'label'], chunksize=batch_size)
+    else:
+        frames = [read_split(path)[['text', 'label']]]
+
+    pending = []
+    n_pending = 0
+    for frame in frames:
+        frame = frame.dropna(subset=['label'])
+        pending.append(frame)
+        n_pending += len(frame)
+        while n_pending >= batch_size:
+            df = pd.concat(pending, ignore_index=True)
+            yield df.iloc[:batch_size]
+            pending, n_pending = [df.iloc[batch_size:]], len(df) - batch_size
+    if n_pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def train_incremental(trainer, train_path, batch_size=10_000, test=None, publish_every=0):
+    """Consomme un flux de mini-batchs ; checkpoint après chaque batch"""
+    for df in iter_batches(train_path, batch_size):
+        start = time.perf_counter()
+        trainer.partial_fit(df['text'], df['label'])
+        trainer.checkpoint()
+        line = f" Batch {trainer.n_batches}: {trainer.n_seen} exemples appris ({time.perf_counter() - start:.2f}s)"
+        if test is not None:
+            scores = trainer.evaluate(test['text'], test['label'])
+            line += f", accuracy {scores['accuracy']:.4f}, F1 {scores['f1_score']:.4f}"
+        print(line)
+        if publish_every and trainer.n_batches % publish_every == 0:
+            trainer.publish()
+    return trainer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement incrémental (partial_fit) du modèle de sentiment")
+    parser.add_argument("--train", default="data/processed/train.csv", help="CSV, Parquet/Feather ou répertoire de partitions")
+    parser.add_argument("--test", default="data/processed/test.csv")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--loss", choices=LOSSES, default="log_loss")
+    parser.add_argument("--featurizer", choices=FEATURIZERS, default="hashing",
+                        help="hashing (IDF gelé au 1er batch) ou frozen (vectoriseur de models/)")
+    parser.add_argument("--alpha", type=float, default=1e-5)
+    parser.add_argument("--resume", action="store_true", help="reprendre depuis le dernier checkpoint")
+    parser.add_argument("--publish-every", type=int, default=0, help="publier tous les N batchs (0 : à la fin)")
+    parser.add_argument("--no-publish", action="store_true")
+    args = parser.parse_args()
+
+    checkpoint = Path(args.models_dir) / CHECKPOINT_DIR / CHECKPOINT_FILE
+    if args.resume and checkpoint.exists():
+        trainer = IncrementalTrainer.resume(args.models_dir)
+        print(f" Reprise du checkpoint: {trainer.n_batches} batchs, {trainer.n_seen} exemples")
+    else:
+        trainer = IncrementalTrainer(args.featurizer, args.loss, args.alpha, args.models_dir)
+
+    test = read_split(args.test) if args.test else None
+    train_incremental(trainer, args.train, args.batch_size, test, args.publish_every)
+
+    if not args.no_publish:
+        metadata = trainer.publish(
+            *((test['text'], test['label']) if test is not None else ())
+        )
+        print(f"\n Artefacts publiés dans {args.models_dir} (version {metadata['model_version']})")
+        if 'accuracy' in metadata:
+            print(f"   Accuracy: {metadata['accuracy']:.4f}")
+            print(f"   F1-Score: {metadata['f1_score']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
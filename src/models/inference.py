@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from dataclasses import dataclass, field
+
+SENTIMENT_LABELS = {0: "Négatif", 1: "Neutre", 2: "Positif"}
+_SENTIMENT_NAMES = np.array([SENTIMENT_LABELS[i] for i in range(len(SENTIMENT_LABELS))], dtype=object)
+
+# Seuil en dessous duquel une prédiction est considérée peu fiable
+LOW_CONFIDENCE_THRESHOLD = 0.5
+
+
+@dataclass
+class SentimentResult:
+    """Résultat d'une passe d'inférence sur un batch.
+
+    Contrat label/confiance :
+      - `probabilities` est un tableau (n, 3) float32 ; `probabilities[i]` est
+        le vecteur de probabilités complet (ordre de `classes_`)
+      - `labels[i]` est la classe d'argmax de ce vecteur (la première en cas d'égalité)
+      - `confidences[i] == probabilities[i, labels[i]]`
+
+    Le label est donc toujours cohérent avec la confiance affichée, même si le
+    vote one-vs-one de `SVC.predict` aurait donné une autre classe.
+    """
+    labels: np.ndarray
+    confidences: np.ndarray
+    probabilities: np.ndarray
+    # Durées (s) des étapes transform / predict_proba, pour les métriques
+    timings: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def sentiments(self):
+        return _SENTIMENT_NAMES[np.asarray(self.labels, dtype=np.intp)].tolist()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        """Sous-ensemble du batch (slice ou tableau d'indices)"""
+        return SentimentResult(
+            labels=self.labels[index],
+            confidences=self.confidences[index],
+            probabilities=self.probabilities[index]
+        )
+
+
+def predict_sentiment(model, X):
+    """Calcule label, confiance et probabilités en une seule passe.
+
+    Pour le scoreur compilé, les valeurs de décision sont calculées une fois
+    puis calibrées ; pour les autres modèles, un seul appel à predict_proba.
+    Les scores sont rendus en float32 : seul (n, 3) est alloué par batch.
+    """
+    if hasattr(model, 'proba_from_decision'):
+        probabilities = model.proba_from_decision(model.decision_function(X))
+    else:
+        probabilities = model.predict_proba(X)
+
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    best = np.argmax(probabilities, axis=1)
+    labels = np.asarray(model.classes_)[best]
+    confidences = probabilities[np.arange(len(best)), best]
+
+    return SentimentResult(
+        labels=labels,
+        confidences=confidences,
+        probabilities=probabilities
+    )
+
+
+def predict_texts(vectorizer, model, texts):
+    """Vectorise puis prédit un batch de textes bruts, sans jamais densifier X"""
+    start = time.perf_counter()
+    X = vectorizer.transform(texts)
+    if not sp.issparse(X):
+        raise TypeError(f"Le vectoriseur doit produire une matrice creuse, pas {type(X).__name__}")
+    X = X.tocsr()  # sans copie si déjà CSR
+    transformed = time.perf_counter()
+    result = predict_sentiment(model, X)
+    result.timings = {
+        "transform": transformed - start,
+        "predict_proba": time.perf_counter() - transformed
+    }
+    return result
+
+
+def build_predictions(texts, result):
+    """Une entrée {text, sentiment, confidence, label} par texte, en types natifs.
+
+    Conversions en bloc (`tolist`), sans opération NumPy par commentaire.
+    """
+    return [
+        {
+            "text": text,
+            "sentiment": sentiment,
+            "confidence": confidence,
+            "label": label
+        }
+        for text, sentiment, confidence, label in zip(
+            texts, result.sentiments, result.confidences.tolist(), result.labels.tolist()
+        )
+    ]
+
+
+def prediction_entropy(probabilities):
+    """Entropie (en nats) de chaque vecteur de probabilités"""
+    probabilities = np.asarray(probabilities)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(probabilities > 0, probabilities * np.log(probabilities), 0.0)
+    return -terms.sum(axis=1)
+
+
+def _percentiles(values, quantiles):
+    """Percentiles par interpolation linéaire (comme np.percentile), sans son surcoût fixe"""
+    ordered = np.sort(values)
+    positions = np.asarray(quantiles) * (len(ordered) - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (positions - lower)
+
+
+def compute_statistics(result):
+    """Statistiques du batch en opérations vectorisées (bincount, percentiles)"""
+    total = len(result)
+    if total == 0:
+        return {}
+
+    counts = np.bincount(np.asarray(result.labels, dtype=np.intp), minlength=len(SENTIMENT_LABELS))
+    percentages = counts / total * 100
+    confidences = np.asarray(result.confidences)
+    p10, p50, p90 = _percentiles(confidences, (0.1, 0.5, 0.9))
+
+    return {
+        "negative_percentage": round(float(percentages[0]), 2),
+        "neutral_percentage": round(float(percentages[1]), 2),
+        "positive_percentage": round(float(percentages[2]), 2),
+        "average_confidence": round(float(confidences.mean()), 4),
+        "confidence_p10": round(float(p10), 4),
+        "confidence_median": round(float(p50), 4),
+        "confidence_p90": round(float(p90), 4),
+        "average_entropy": round(float(prediction_entropy(result.probabilities).mean()), 4),
+        "low_confidence_percentage": round(float(np.mean(confidences < LOW_CONFIDENCE_THRESHOLD) * 100), 2)
+    }
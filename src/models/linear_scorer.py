@@ -0,0 +1,297 @@
+import numpy as np
+from pathlib import Path
+
+# Bornes utilisées par libsvm pour les probabilités pairwise
+MIN_PROB = 1e-7
+
+
+def platt_sigmoid(dec, prob_a, prob_b):
+    """1 / (1 + exp(A * f + B)), sous forme numériquement stable"""
+    f_ApB = dec * prob_a + prob_b
+    with np.errstate(over='ignore'):
+        return np.where(
+            f_ApB >= 0,
+            np.exp(-f_ApB) / (1.0 + np.exp(-f_ApB)),
+            1.0 / (1.0 + np.exp(f_ApB))
+        )
+
+
+class LinearSVCScorer:
+    """Scoreur compilé d'un SVC linéaire one-vs-one.
+
+    Remplace l'évaluation du noyau sur tous les vecteurs de support par un
+    unique produit matriciel creux x dense, suivi de la calibration de Platt
+    et du couplage pairwise de libsvm.
+    """
+
+    def __init__(self, coef, intercept, prob_a, prob_b, classes):
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64)  # (n_features, n_pairs)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.prob_a_ = np.asarray(prob_a, dtype=np.float64)
+        self.prob_b_ = np.asarray(prob_b, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.pairs_ = [
+            (i, j)
+            for i in range(len(self.classes_))
+            for j in range(i + 1, len(self.classes_))
+        ]
+
+    @property
+    def n_features_in_(self):
+        return self.coef_.shape[0]
+
+    def decision_function(self, X):
+        """Valeurs de décision one-vs-one, shape (n_samples, n_pairs)"""
+        return np.asarray(X @ self.coef_) + self.intercept_
+
+    def proba_from_decision(self, dec):
+        """Calibration de Platt puis couplage pairwise (Wu, Lin & Weng)"""
+        pairwise = np.clip(platt_sigmoid(dec, self.prob_a_, self.prob_b_), MIN_PROB, 1 - MIN_PROB)
+        return multiclass_probability(pairwise, self.pairs_, len(self.classes_))
+
+    def predict_proba(self, X):
+        return self.proba_from_decision(self.decision_function(X))
+
+    def predict(self, X):
+        """Vote one-vs-one, identique à SVC.predict"""
+        dec = self.decision_function(X)
+        votes = np.zeros((dec.shape[0], len(self.classes_)), dtype=np.int64)
+        for k, (i, j) in enumerate(self.pairs_):
+            positive = dec[:, k] > 0
+            votes[:, i] += positive
+            votes[:, j] += ~positive
+        return self.classes_[np.argmax(votes, axis=1)]
+
+    def arrays(self):
+        return {
+            'coef': self.coef_,
+            'intercept': self.intercept_,
+            'prob_a': self.prob_a_,
+            'prob_b': self.prob_b_,
+            'classes': self.classes_
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays['coef'],
+            arrays['intercept'],
+            arrays['prob_a'],
+            arrays['prob_b'],
+            arrays['classes']
+        )
+
+    def save(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(data)
+
+
+class LinearSoftmaxScorer:
+    """Scoreur compilé d'une régression logistique multinomiale"""
+
+    def __init__(self, coef, intercept, classes):
+        self.coef_ = coef  # (n_features, n_classes)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+
+    @property
+    def n_features_in_(self):
+        return self.coef_.shape[0]
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.coef_) + self.intercept_
+
+    def proba_from_decision(self, dec):
+        dec = dec - dec.max(axis=1, keepdims=True)
+        np.exp(dec, out=dec)
+        dec /= dec.sum(axis=1, keepdims=True)
+        return dec
+
+    def predict_proba(self, X):
+        return self.proba_from_decision(self.decision_function(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
+
+    def arrays(self):
+        return {
+            'coef': self.coef_,
+            'intercept': self.intercept_,
+            'classes': self.classes_
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['coef'], arrays['intercept'], arrays['classes'])
+
+
+class LinearOvRScorer:
+    """Scoreur linéaire one-vs-rest (SGDClassifier) calibré par Platt par classe.
+
+    Chaque score de classe passe par sa propre sigmoïde, puis les
+    probabilités sont renormalisées sur les classes.
+    """
+
+    def __init__(self, coef, intercept, prob_a, prob_b, classes):
+        self.coef_ = coef  # (n_features, n_classes)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.prob_a_ = np.asarray(prob_a, dtype=np.float64)
+        self.prob_b_ = np.asarray(prob_b, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+
+    @property
+    def n_features_in_(self):
+        return self.coef_.shape[0]
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.coef_) + self.intercept_
+
+    def proba_from_decision(self, dec):
+        proba = np.clip(platt_sigmoid(dec, self.prob_a_, self.prob_b_), MIN_PROB, 1.0)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict_proba(self, X):
+        return self.proba_from_decision(self.decision_function(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def arrays(self):
+        return {
+            'coef': self.coef_,
+            'intercept': self.intercept_,
+            'prob_a': self.prob_a_,
+            'prob_b': self.prob_b_,
+            'classes': self.classes_
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays['coef'],
+            arrays['intercept'],
+            arrays['prob_a'],
+            arrays['prob_b'],
+            arrays['classes']
+        )
+
+
+def multiclass_probability(pairwise, pairs, n_classes):
+    """Couplage pairwise de libsvm, vectorisé sur le batch.
+
+    `pairwise[:, k]` est la probabilité que la classe `pairs[k][0]` l'emporte
+    sur `pairs[k][1]`. Chaque ligne itère jusqu'à sa propre convergence, ce
+    qui reproduit exactement `multiclass_probability` de libsvm.
+    """
+    n = pairwise.shape[0]
+    k = n_classes
+    r = np.zeros((n, k, k))
+    for idx, (i, j) in enumerate(pairs):
+        r[:, i, j] = pairwise[:, idx]
+        r[:, j, i] = 1 - pairwise[:, idx]
+
+    # Q[t][t] = sum_{j != t} r[j][t]^2 ; Q[t][j] = -r[j][t] * r[t][j]
+    rT = np.transpose(r, (0, 2, 1))
+    Q = -rT * r
+    diag = np.sum(rT ** 2, axis=2)
+    idx = np.arange(k)
+    Q[:, idx, idx] = diag
+
+    p = np.full((n, k), 1.0 / k)
+    max_iter = max(100, k)
+    eps = 0.005 / k
+    active = np.arange(n)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        Qa = Q[active]
+        pa = p[active]
+        Qp = np.einsum('ntj,nj->nt', Qa, pa)
+        pQp = np.sum(pa * Qp, axis=1)
+        max_error = np.max(np.abs(Qp - pQp[:, None]), axis=1)
+
+        converged = max_error < eps
+        if converged.any():
+            active = active[~converged]
+            Qa = Qa[~converged]
+            pa = pa[~converged]
+            Qp = Qp[~converged]
+            pQp = pQp[~converged]
+            if active.size == 0:
+                break
+
+        for t in range(k):
+            Qtt = Qa[:, t, t]
+            diff = (-Qp[:, t] + pQp) / Qtt
+            pa[:, t] += diff
+            scale = 1 + diff
+            pQp = (pQp + diff * (diff * Qtt + 2 * Qp[:, t])) / scale / scale
+            Qp = (Qp + diff[:, None] * Qa[:, t, :]) / scale[:, None]
+            pa /= scale[:, None]
+
+        p[active] = pa
+
+    return p
+
+
+def compile_linear_svc(svc):
+    """Compile un SVC(kernel='linear', probability=True) entraîné"""
+    if getattr(svc, 'kernel', None) != 'linear':
+        raise ValueError("Seul un SVC à noyau linéaire peut être compilé")
+    if not getattr(svc, 'probability', False):
+        raise ValueError("Le SVC doit être entraîné avec probability=True")
+    if len(svc.classes_) < 3:
+        raise ValueError("Le scoreur compilé suppose un SVC multi-classes (one-vs-one)")
+
+    coef = svc.coef_
+    if hasattr(coef, 'toarray'):
+        coef = coef.toarray()
+
+    return LinearSVCScorer(
+        coef=np.asarray(coef).T,
+        intercept=svc.intercept_,
+        prob_a=svc.probA_,
+        prob_b=svc.probB_,
+        classes=svc.classes_
+    )
+
+
+def compile_logistic_regression(lr):
+    """Compile une LogisticRegression multinomiale entraînée"""
+    if not hasattr(lr, 'coef_') or len(lr.classes_) < 3 or lr.coef_.shape[0] != len(lr.classes_):
+        raise ValueError("Seule une régression logistique multinomiale peut être compilée")
+    if getattr(lr, 'multi_class', 'auto') == 'ovr' or lr.solver == 'liblinear':
+        raise ValueError("Une régression logistique one-vs-rest ne peut pas être compilée")
+    return LinearSoftmaxScorer(
+        coef=np.ascontiguousarray(lr.coef_.T, dtype=np.float64),
+        intercept=lr.intercept_,
+        classes=lr.classes_
+    )
+
+
+def compile_model(model):
+    """Compile un modèle linéaire supporté, ValueError sinon"""
+    if isinstance(model, (LinearSVCScorer, LinearSoftmaxScorer, LinearOvRScorer)):
+        return model
+    if type(model).__name__ == 'SVC':
+        return compile_linear_svc(model)
+    if type(model).__name__ == 'LogisticRegression':
+        return compile_logistic_regression(model)
+    raise ValueError(f"Modèle {type(model).__name__} non compilable")
+
+
+def load_scorer(models_dir, model):
+    """Retourne le scoreur compilé s'il existe, sinon le compile si possible"""
+    scorer_path = Path(models_dir) / "linear_scorer.npz"
+    if scorer_path.exists():
+        return LinearSVCScorer.load(scorer_path)
+    try:
+        return compile_model(model)
+    except (ValueError, AttributeError):
+        return model
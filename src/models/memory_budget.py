@@ -0,0 +1,81 @@
+"""Budget d'allocation de l'inférence, mesuré avec tracemalloc.
+
+Le chemin servi reste creux de bout en bout : CSR en sortie du vectoriseur,
+produit creux x dense dans le scoreur, scores (n, 3) float32 en sortie. Une
+matrice dense (n x n_features) intermédiaire se voit aussitôt dans le pic
+d'allocation d'un batch (10k x 5000 float64 = 400 Mo) ; tracemalloc suit
+aussi les tableaux NumPy et SciPy.
+
+Le suivi ralentit Python et mélange les allocations des threads : réservé
+aux tests et aux benchmarks, pas au serveur.
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from src.models.inference import predict_sentiment
+
+BATCH_SIZE = 10_000
+DEFAULT_BUDGET_MB = 32
+
+
+class AllocationBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def traced_peak():
+    """Pic d'allocation (octets) au-dessus du niveau d'entrée, dans `stats['peak_bytes']`"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    stats = {}
+    try:
+        yield stats
+    finally:
+        stats['peak_bytes'] = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+        if started:
+            tracemalloc.stop()
+
+
+def sparse_nbytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def profile_batch(vectorizer, model, texts):
+    """Pics d'allocation de transform et de predict pour un batch, en Mo"""
+    start = time.perf_counter()
+    with traced_peak() as transform:
+        X = vectorizer.transform(texts)
+    with traced_peak() as predict:
+        result = predict_sentiment(model, X)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "n_comments": len(texts),
+        "transform_peak_mb": transform['peak_bytes'] / 1e6,
+        "predict_peak_mb": predict['peak_bytes'] / 1e6,
+        "peak_mb": max(transform['peak_bytes'], predict['peak_bytes']) / 1e6,
+        "X_format": X.format,
+        "X_nnz": int(X.nnz),
+        "X_mb": sparse_nbytes(X) / 1e6,
+        # Ce qu'aurait coûté X densifié en float64
+        "dense_equivalent_mb": X.shape[0] * X.shape[1] * 8 / 1e6,
+        "output_dtype": str(result.probabilities.dtype),
+        "output_shape": list(result.probabilities.shape),
+        "elapsed_s": elapsed
+    }
+
+
+def check_allocation_budget(vectorizer, model, texts, budget_mb=DEFAULT_BUDGET_MB):
+    """Profil du batch ; AllocationBudgetExceeded si une étape dépasse `budget_mb`"""
+    report = profile_batch(vectorizer, model, texts)
+    for stage in ("transform", "predict"):
+        if report[f"{stage}_peak_mb"] > budget_mb:
+            raise AllocationBudgetExceeded(
+                f"{stage}: pic de {report[f'{stage}_peak_mb']:.1f} Mo pour {len(texts)} commentaires "
+                f"(budget {budget_mb} Mo)"
+            )
+    return report
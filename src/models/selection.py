@@ -0,0 +1,77 @@
+"""Sélection du modèle servi : front de Pareto F1 / latence / taille.
+
+Chaque candidat est décrit par un dict de résultats (`f1_score`,
+`latency_p99_us`, `artifact_mb`...). Les contraintes (latence p99 par
+commentaire, taille d'artefact) filtrent les candidats ; parmi ceux qui
+restent, le meilleur selon la métrique choisie est toujours sur le front de
+Pareto, les égalités étant départagées par la latence.
+"""
+import io
+import time
+
+import joblib
+import numpy as np
+
+from src.models.linear_scorer import compile_model
+
+# Objectifs du front : (clé, +1 à maximiser / -1 à minimiser)
+OBJECTIVES = (("f1_score", 1), ("latency_p99_us", -1), ("artifact_mb", -1))
+SELECTION_METRICS = ("f1_score", "accuracy")
+LATENCY_BATCH_SIZE = 100
+
+
+def serving_scorer(model):
+    """Ce que l'API appelle réellement : le scoreur compilé s'il existe"""
+    try:
+        return compile_model(model)
+    except (ValueError, AttributeError):
+        return model
+
+
+def measure_latency(model, X, batch_size=LATENCY_BATCH_SIZE, n_batches=50, random_state=42):
+    """Latence de predict_proba par commentaire (µs), p50 et p99 sur des batchs tirés de X"""
+    scorer = serving_scorer(model)
+    rng = np.random.RandomState(random_state)
+    batch_size = min(batch_size, X.shape[0])
+    scorer.predict_proba(X[:batch_size])  # chauffe
+    timings = []
+    for _ in range(n_batches):
+        batch = X[rng.choice(X.shape[0], size=batch_size, replace=False)]
+        start = time.perf_counter()
+        scorer.predict_proba(batch)
+        timings.append((time.perf_counter() - start) / batch_size * 1e6)
+    p50, p99 = np.percentile(timings, [50, 99])
+    return {"latency_batch_size": batch_size, "latency_p50_us": float(p50), "latency_p99_us": float(p99)}
+
+
+def artifact_size_mb(model):
+    """Taille du pickle joblib du modèle"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell() / 1e6
+
+
+def dominates(a, b):
+    better_or_equal = all(sign * a[key] >= sign * b[key] for key, sign in OBJECTIVES)
+    strictly_better = any(sign * a[key] > sign * b[key] for key, sign in OBJECTIVES)
+    return better_or_equal and strictly_better
+
+
+def pareto_front(results):
+    """Candidats qu'aucun autre ne domine sur tous les objectifs"""
+    return [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
+
+
+def select_model(results, metric="f1_score", max_latency_us=None, max_size_mb=None):
+    """Meilleur candidat sous contraintes ; le plus rapide si aucun ne les respecte"""
+    if metric not in SELECTION_METRICS:
+        raise ValueError(f"Métrique inconnue: {metric} (attendu: {', '.join(SELECTION_METRICS)})")
+    feasible = [
+        r for r in results
+        if (max_latency_us is None or r['latency_p99_us'] <= max_latency_us)
+        and (max_size_mb is None or r['artifact_mb'] <= max_size_mb)
+    ]
+    if not feasible:
+        print(" Aucun candidat ne respecte les contraintes : le plus rapide est retenu")
+        return min(results, key=lambda r: r['latency_p99_us'])
+    return max(pareto_front(feasible), key=lambda r: (r[metric], -r['latency_p99_us']))
@@ -1,27 +1,74 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
 from sklearn.model_selection import GridSearchCV
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
 import joblib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import time
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.models.linear_scorer import compile_linear_svc
+from src.models.artifacts import compute_model_version
+from src.models.features import FEATURE_MODES, create_vectorizer, vectorizer_info
+from src.models.flat_artifact import export_flat_artifact
+from src.models.feature_cache import FEATURE_CACHE_DIR, feature_cache_key, load_features, save_features
+from src.models.selection import SELECTION_METRICS, artifact_size_mb, measure_latency, pareto_front, select_model
+from src.data.stream_preprocess import read_split
+
+# Nom affiché -> méthode d'entraînement de SentimentModelTrainer
+CANDIDATES = {
+    "Logistic Regression": "train_logistic_regression",
+    "Random Forest": "train_random_forest",
+    "SVM": "train_svm"
+}
+
+_worker_trainer = None
+
+
+def _init_candidate_worker(trainer, memory_limit_mb, n_jobs):
+    """Worker d'entraînement : matrices héritées du parent (fork), budget mémoire, threads"""
+    global _worker_trainer
+    if memory_limit_mb:
+        import resource
+        # Budget ajouté à l'espace d'adressage hérité du parent
+        with open("/proc/self/statm") as f:
+            inherited = int(f.read().split()[0]) * resource.getpagesize()
+        limit = inherited + memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    trainer.n_jobs = n_jobs
+    _worker_trainer = trainer
+
+
+def _train_candidate(name):
+    start = time.perf_counter()
+    model = getattr(_worker_trainer, CANDIDATES[name])()
+    return model, time.perf_counter() - start
+
+
 class SentimentModelTrainer:
-    def __init__(self):
+    def __init__(self, feature_mode="tfidf", feature_cache_dir=FEATURE_CACHE_DIR):
+        self.feature_mode = feature_mode
+        self.feature_cache_dir = feature_cache_dir  # None : pas de cache disque
         self.vectorizer = None
         self.model = None
         self.best_model_name = None
+        self.n_jobs = -1  # parallélisme interne (GridSearchCV, Random Forest)
+        self.models_results = []
+        self.selection = {}
+        # id(modèle) -> (modèle, prédictions sur X_test_vec)
+        self.test_predictions = {}
         
     def load_data(self, train_path, test_path):
-        """Charge les données train/test"""
+        """Charge les données train/test (CSV, Parquet/Feather ou répertoire de partitions)"""
         print(" Chargement des données...")
-        self.train_df = pd.read_csv(train_path)
-        self.test_df = pd.read_csv(test_path)
+        self.train_df = read_split(train_path)
+        self.test_df = read_split(test_path)
         
         self.X_train = self.train_df['text']
         self.y_train = self.train_df['label']
@@ -32,22 +79,36 @@ class SentimentModelTrainer:
         print(f" Test: {len(self.X_test)} exemples")
     
     def create_vectorizer(self):
-        """Crée et fit le vectoriseur TF-IDF"""
-        print("\n Création du vectoriseur TF-IDF...")
-        
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),  # Unigrammes et bigrammes
-            min_df=2,            # Ignorer les termes très rares
-            max_df=0.95,         # Ignorer les termes trop fréquents
-            strip_accents='unicode',
-            lowercase=True
-        )
+        """Crée et fit le vectoriseur (TF-IDF ou hashing + IDF)"""
+        print(f"\n Création du vectoriseur ({self.feature_mode})...")
+        
+        self.vectorizer = create_vectorizer(self.feature_mode)
+        self.test_predictions = {}
+        
+        key = None
+        if self.feature_cache_dir is not None:
+            key = feature_cache_key(self.X_train, self.X_test, self.feature_mode, self.vectorizer)
+            cached = load_features(self.feature_cache_dir, key)
+            if cached is not None:
+                self.vectorizer, self.X_train_vec, self.X_test_vec = cached
+                print(f" Features rechargées du cache: {Path(self.feature_cache_dir) / key}")
+                print(f" Matrice train: {self.X_train_vec.shape}")
+                return
         
         self.X_train_vec = self.vectorizer.fit_transform(self.X_train)
         self.X_test_vec = self.vectorizer.transform(self.X_test)
         
-        print(f" Vocabulaire: {len(self.vectorizer.vocabulary_)} mots")
+        if key is not None:
+            # stop_words_ n'est pas utile à transform et alourdit le pickle
+            if getattr(self.vectorizer, 'stop_words_', None) is not None:
+                self.vectorizer.stop_words_ = None
+            path = save_features(
+                self.feature_cache_dir, key, self.vectorizer,
+                self.X_train_vec, self.X_test_vec, self.feature_mode
+            )
+            print(f" Features mises en cache: {path}")
+        
+        print(f" Features: {vectorizer_info(self.vectorizer)['n_features']}")
         print(f" Matrice train: {self.X_train_vec.shape}")
     
     def train_logistic_regression(self):
@@ -67,7 +128,7 @@ class SentimentModelTrainer:
             param_grid,
             cv=5,
             scoring='f1_weighted',
-            n_jobs=-1,
+            n_jobs=self.n_jobs,
             verbose=1
         )
         
@@ -86,7 +147,7 @@ class SentimentModelTrainer:
             n_estimators=100,
             max_depth=20,
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         rf.fit(self.X_train_vec, self.y_train)
@@ -106,12 +167,19 @@ class SentimentModelTrainer:
         svm.fit(self.X_train_vec, self.y_train)
         return svm
     
+    def predict_test(self, model):
+        """Prédictions sur le split de test, calculées une seule fois par modèle"""
+        entry = self.test_predictions.get(id(model))
+        if entry is None or entry[0] is not model:
+            entry = self.test_predictions[id(model)] = (model, model.predict(self.X_test_vec))
+        return entry[1]
+    
     def evaluate_model(self, model, model_name):
         """Évalue un modèle"""
         print(f"\n Évaluation {model_name}...")
         
         # Prédictions
-        y_pred = model.predict(self.X_test_vec)
+        y_pred = self.predict_test(model)
         
         # Métriques
         accuracy = accuracy_score(self.y_test, y_pred)
@@ -164,8 +232,9 @@ class SentimentModelTrainer:
         """Mesure le temps d'inférence"""
         print(f"\n Mesure du temps d'inférence...")
         
-        sample_texts = self.X_test.sample(n=n_samples, random_state=42)
-        sample_vec = self.vectorizer.transform(sample_texts)
+        # Mêmes lignes que l'échantillon de textes, prises dans la matrice déjà calculée
+        rng = np.random.RandomState(42)
+        sample_vec = self.X_test_vec[rng.permutation(self.X_test_vec.shape[0])[:n_samples]]
         
         start_time = time.time()
         _ = model.predict(sample_vec)
@@ -174,32 +243,80 @@ class SentimentModelTrainer:
         print(f" Temps pour {n_samples} commentaires: {inference_time:.2f}ms")
         print(f" Temps moyen par commentaire: {inference_time/n_samples:.2f}ms")
         
+        # Comparaison avec le scoreur compilé (SVC linéaire uniquement)
+        try:
+            scorer = compile_linear_svc(model)
+        except (ValueError, AttributeError):
+            return inference_time
+        
+        start_time = time.time()
+        _ = model.predict_proba(sample_vec)
+        proba_time = (time.time() - start_time) * 1000
+        
+        start_time = time.time()
+        _ = scorer.predict_proba(sample_vec)
+        compiled_time = (time.time() - start_time) * 1000
+        
+        print(f" predict_proba libsvm: {proba_time:.2f}ms")
+        print(f" predict_proba compilé: {compiled_time:.2f}ms "
+              f"(x{proba_time / max(compiled_time, 1e-6):.1f})")
+        
         return inference_time
     
-    def train_and_compare(self):
-        """Entraîne et compare plusieurs modèles"""
-        models_results = []
+    def train_candidates(self, parallel=1, memory_limit_mb=None):
+        """Entraîne les candidats, en parallèle sur un pool de processus si `parallel` > 1"""
+        trained = {}
+        if parallel <= 1:
+            for name, method in CANDIDATES.items():
+                start = time.perf_counter()
+                model = getattr(self, method)()
+                trained[name] = (model, time.perf_counter() - start)
+            return trained
+        
+        # Les cœurs sont partagés entre candidats pour éviter la sursouscription
+        workers = min(parallel, len(CANDIDATES))
+        n_jobs = max(1, (os.cpu_count() or 1) // workers)
+        print(f"\n Entraînement de {len(CANDIDATES)} candidats sur {workers} processus "
+              f"(n_jobs={n_jobs}, mémoire: {f'{memory_limit_mb} Mo' if memory_limit_mb else 'illimitée'})")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_candidate_worker,
+            initargs=(self, memory_limit_mb, n_jobs)
+        ) as executor:
+            futures = {executor.submit(_train_candidate, name): name for name in CANDIDATES}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    trained[name] = future.result()
+                except Exception as e:
+                    # MemoryError (budget dépassé) ou worker tué : le candidat est écarté
+                    print(f" Échec de l'entraînement {name}: {e!r}")
+        return trained
+    
+    def train_and_compare(self, parallel=1, memory_limit_mb=None, metric="f1_score",
+                          max_latency_us=None, max_size_mb=None):
+        """Entraîne et compare les modèles, puis sélectionne sur le front de Pareto"""
+        trained = self.train_candidates(parallel, memory_limit_mb)
+        if not trained:
+            raise RuntimeError("Aucun candidat n'a pu être entraîné")
         
-        # Logistic Regression
-        lr_model = self.train_logistic_regression()
-        lr_results = self.evaluate_model(lr_model, "Logistic Regression")
-        self.plot_confusion_matrix(lr_results['confusion_matrix'], "Logistic Regression")
-        lr_results['inference_time'] = self.measure_inference_time(lr_model)
-        models_results.append(lr_results)
-        
-        # Random Forest
-        rf_model = self.train_random_forest()
-        rf_results = self.evaluate_model(rf_model, "Random Forest")
-        self.plot_confusion_matrix(rf_results['confusion_matrix'], "Random Forest")
-        rf_results['inference_time'] = self.measure_inference_time(rf_model)
-        models_results.append(rf_results)
-        
-        # SVM
-        svm_model = self.train_svm()
-        svm_results = self.evaluate_model(svm_model, "SVM")
-        self.plot_confusion_matrix(svm_results['confusion_matrix'], "SVM")
-        svm_results['inference_time'] = self.measure_inference_time(svm_model)
-        models_results.append(svm_results)
+        models_results = []
+        for name in CANDIDATES:
+            if name not in trained:
+                continue
+            model, train_time = trained[name]
+            results = self.evaluate_model(model, name)
+            self.plot_confusion_matrix(results['confusion_matrix'], name)
+            results['inference_time'] = self.measure_inference_time(model)
+            results['train_time_s'] = train_time
+            results.update(measure_latency(model, self.X_test_vec))
+            results['artifact_mb'] = artifact_size_mb(model)
+            models_results.append(results)
+        
+        front = pareto_front(models_results)
+        for result in models_results:
+            result['pareto'] = any(result is r for r in front)
         
         # Sélectionner le meilleur modèle
         print("\n" + "="*60)
@@ -207,20 +324,30 @@ class SentimentModelTrainer:
         print("="*60)
         
         for result in models_results:
-            print(f"\n{result['name']}:")
+            print(f"\n{result['name']}{' (front de Pareto)' if result['pareto'] else ''}:")
             print(f"  Accuracy: {result['accuracy']:.4f}")
             print(f"  F1-Score: {result['f1_score']:.4f}")
+            print(f"  Temps d'entraînement: {result['train_time_s']:.2f}s")
             print(f"  Temps d'inférence: {result['inference_time']:.2f}ms")
-        
-        # Choisir le meilleur basé sur F1-score et temps
-        best_model = max(models_results, key=lambda x: x['f1_score'])
+            print(f"  Latence p99 (batch {result['latency_batch_size']}): {result['latency_p99_us']:.1f}µs/commentaire")
+            print(f"  Taille de l'artefact: {result['artifact_mb']:.2f} Mo")
+        
+        # Meilleur candidat du front qui respecte les contraintes de latence et de taille
+        self.selection = {
+            'metric': metric,
+            'max_latency_us': max_latency_us,
+            'max_size_mb': max_size_mb
+        }
+        best_model = select_model(models_results, **self.selection)
         
         print(f"\n Meilleur modèle: {best_model['name']}")
         print(f"   F1-Score: {best_model['f1_score']:.4f}")
         print(f"   Accuracy: {best_model['accuracy']:.4f}")
+        print(f"   Latence p99: {best_model['latency_p99_us']:.1f}µs/commentaire")
         
         self.model = best_model['model']
         self.best_model_name = best_model['name']
+        self.models_results = models_results
         
         return models_results
     
@@ -229,7 +356,12 @@ class SentimentModelTrainer:
         models_dir = Path("models")
         models_dir.mkdir(exist_ok=True)
         
-        # Sauvegarder le vectoriseur
+        # stop_words_ garde tous les n-grammes élagués : inutile pour transform,
+        # mais il alourdit fortement le pickle et son chargement
+        if getattr(self.vectorizer, 'stop_words_', None) is not None:
+            self.vectorizer.stop_words_ = None
+        
+        # Sauvegarder le vectoriseur (le nom de fichier est conservé en mode hashing)
         vectorizer_path = models_dir / "tfidf_vectorizer.joblib"
         joblib.dump(self.vectorizer, vectorizer_path)
         print(f"\n Vectoriseur sauvegardé: {vectorizer_path}")
@@ -239,35 +371,99 @@ class SentimentModelTrainer:
         joblib.dump(self.model, model_path)
         print(f" Modèle sauvegardé: {model_path}")
         
+        # Compiler le SVC linéaire en matrice de poids pour le serving
+        scorer_path = models_dir / "linear_scorer.npz"
+        try:
+            compile_linear_svc(self.model).save(scorer_path)
+            print(f" Scoreur compilé sauvegardé: {scorer_path}")
+        except (ValueError, AttributeError):
+            # Éviter qu'un ancien scoreur ne masque le nouveau modèle
+            scorer_path.unlink(missing_ok=True)
+        
+        # Bundle plat chargé en mmap par l'API (démarrage rapide, pages partagées),
+        # exporté avant le calcul de model_version qui inclut son en-tête
+        flat_path = export_flat_artifact(models_dir, self.vectorizer, self.model, self.best_model_name)
+        if flat_path is not None:
+            print(f" Artefact plat exporté: {flat_path}")
+        
         # Sauvegarder les métadonnées
+        y_pred = self.predict_test(self.model)
         metadata = {
             'model_type': self.best_model_name,
-            'accuracy': float(accuracy_score(self.y_test, self.model.predict(self.X_test_vec))),
-            'f1_score': float(f1_score(self.y_test, self.model.predict(self.X_test_vec), average='weighted')),
-            'n_features': len(self.vectorizer.vocabulary_),
-            'classes': {0: 'Négatif', 1: 'Neutre', 2: 'Positif'}
+            'accuracy': float(accuracy_score(self.y_test, y_pred)),
+            'f1_score': float(f1_score(self.y_test, y_pred, average='weighted')),
+            **vectorizer_info(self.vectorizer),
+            'classes': {0: 'Négatif', 1: 'Neutre', 2: 'Positif'},
+            'selection': self.selection,
+            'candidates': [
+                {
+                    'name': r['name'],
+                    'accuracy': float(r['accuracy']),
+                    'f1_score': float(r['f1_score']),
+                    'train_time_s': round(r['train_time_s'], 3),
+                    'latency_batch_size': r['latency_batch_size'],
+                    'latency_p50_us': round(r['latency_p50_us'], 2),
+                    'latency_p99_us': round(r['latency_p99_us'], 2),
+                    'artifact_mb': round(r['artifact_mb'], 3),
+                    'pareto': r['pareto'],
+                    'selected': r['name'] == self.best_model_name
+                }
+                for r in self.models_results
+            ],
+            # Clé de cache côté API : change dès que les artefacts changent
+            'model_version': compute_model_version(models_dir)
         }
         
         import json
         metadata_path = models_dir / "model_metadata.json"
-        with open(metadata_path, 'w') as f:
+        # Écriture atomique : l'API qui surveille models/ ne lit jamais un JSON partiel
+        tmp = metadata_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
             json.dump(metadata, f, indent=2)
+        os.replace(tmp, metadata_path)
         print(f" Métadonnées sauvegardées: {metadata_path}")
 
 def main():
-    trainer = SentimentModelTrainer()
+    import argparse
+    parser = argparse.ArgumentParser(description="Entraînement du modèle de sentiment")
+    parser.add_argument(
+        "--features",
+        choices=FEATURE_MODES,
+        default="tfidf",
+        help="tfidf (vocabulaire) ou hashing (HashingVectorizer + IDF, sans vocabulaire)"
+    )
+    parser.add_argument("--train", default="data/processed/train.csv", help="CSV, Parquet/Feather ou répertoire de partitions")
+    parser.add_argument("--test", default="data/processed/test.csv")
+    parser.add_argument("--feature-cache", default=FEATURE_CACHE_DIR, help="répertoire du cache de features")
+    parser.add_argument("--no-feature-cache", action="store_true", help="toujours refaire la featurisation")
+    parser.add_argument("--parallel", type=int, default=min(len(CANDIDATES), os.cpu_count() or 1),
+                        help="candidats entraînés en parallèle (1 : séquentiel)")
+    parser.add_argument("--memory-limit-mb", type=int, help="budget mémoire par processus d'entraînement")
+    parser.add_argument("--metric", choices=SELECTION_METRICS, default="f1_score")
+    parser.add_argument("--max-latency-us", type=float,
+                        help="latence p99 max par commentaire (µs, batchs de 100)")
+    parser.add_argument("--max-size-mb", type=float, help="taille max de l'artefact du modèle")
+    args = parser.parse_args()
     
-    # Charger les données
-    trainer.load_data(
-        "data/processed/train.csv",
-        "data/processed/test.csv"
+    trainer = SentimentModelTrainer(
+        feature_mode=args.features,
+        feature_cache_dir=None if args.no_feature_cache else args.feature_cache
     )
     
+    # Charger les données
+    trainer.load_data(args.train, args.test)
+    
     # Créer le vectoriseur
     trainer.create_vectorizer()
     
     # Entraîner et comparer les modèles
-    results = trainer.train_and_compare()
+    results = trainer.train_and_compare(
+        parallel=args.parallel,
+        memory_limit_mb=args.memory_limit_mb,
+        metric=args.metric,
+        max_latency_us=args.max_latency_us,
+        max_size_mb=args.max_size_mb
+    )
     
     # Sauvegarder le meilleur modèle
     trainer.save_model()
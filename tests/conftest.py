@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+# Vocabulaire des commentaires synthétiques : URLs, mentions, hashtags,
+# emojis, accents et espaces Unicode
+WORDS = [
+    "great", "video", "LOVE", "this", "song", "worst", "ever", "Modi", "bjp", "congress",
+    "first!!!", "lol", "😂😂", "déjà", "vu", "naïve", "İstanbul", "ß", "100%", "2019",
+    "http://t.co/abc", "https://youtu.be/x?t=1", "www.example.com/page", "@user_42", "@",
+    "#india", "#", "##tag", "can't", "won’t", "a.b.c", "...", "--", "\t", " ", " ",
+    "\n", "x@wwwy.z", "hé#llo", "http", "ww", "@#mix", "ＦＵＬＬ", "١٢٣", "émoji🔥fire"
+]
+
+
+def _synthetic_comments(size, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 40, size=size)
+    tokens = rng.integers(0, len(WORDS), size=int(lengths.sum()))
+    glue = rng.random(size=int(lengths.sum())) < 0.15
+    comments = []
+    position = 0
+    for length in lengths:
+        parts = []
+        for i in range(position, position + length):
+            parts.append(WORDS[tokens[i]])
+            parts.append("" if glue[i] else " ")
+        comments.append("".join(parts))
+        position += length
+    return comments
+
+
+@pytest.fixture(scope="session")
+def synthetic_comments():
+    """synthetic_comments(size, seed=0) : commentaires de 1 à 40 tokens, collés ou séparés aléatoirement"""
+    return _synthetic_comments
@@ -0,0 +1,112 @@
+import asyncio
+
+import numpy as np
+
+from src.api.batching import MicroBatcher
+from src.models.inference import SentimentResult
+
+
+class FakePredict:
+    """predict_fn factice : label = numéro du texte modulo 3, appels enregistrés"""
+
+    def __init__(self, error=None, delay=0.0):
+        self.calls = []
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        labels = np.array([int(text) % 3 for text in texts])
+        probabilities = np.eye(3)[labels]
+        return SentimentResult(labels, np.ones(len(texts)), probabilities)
+
+
+def run(batcher, requests, delay=0.0):
+    async def main():
+        async def call(texts, i):
+            await asyncio.sleep(delay * i)
+            return await batcher.predict(texts)
+        return await asyncio.gather(*(call(texts, i) for i, texts in enumerate(requests)),
+                                    return_exceptions=True)
+    return asyncio.run(main())
+
+
+def test_results_sliced_back_to_callers():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict, max_wait_ms=20, max_batch_size=100)
+    requests = [["0", "1"], ["5"], ["7", "8", "4"]]
+
+    results = run(batcher, requests)
+
+    # La première requête part seule (batcher au repos), les suivantes sont regroupées
+    assert predict.calls == [["0", "1"], ["5", "7", "8", "4"]]
+    for texts, result in zip(requests, results):
+        assert result.labels.tolist() == [int(text) % 3 for text in texts]
+    assert batcher.stats()["requests"] == 3 and batcher.stats()["batches"] == 2
+
+
+def test_idle_batcher_does_not_wait():
+    predict = FakePredict()
+    # Timer bien plus long que le test : seule une requête seule peut partir
+    batcher = MicroBatcher(predict, max_wait_ms=60_000, max_batch_size=100)
+
+    results = run(batcher, [["0"], ["1"]], delay=0.05)
+
+    assert predict.calls == [["0"], ["1"]]
+    assert [r.labels.tolist() for r in results] == [[0], [1]]
+    assert batcher.stats()["max_queue_delay_ms"] < 1000
+
+
+def test_flush_at_max_batch_size():
+    predict = FakePredict()
+    # Timer bien plus long que le test : seule la taille peut déclencher le flush
+    # une fois le premier batch en cours
+    batcher = MicroBatcher(predict, max_wait_ms=60_000, max_batch_size=3)
+
+    results = run(batcher, [["0", "1"], ["2"], ["3", "4", "5"]])
+
+    assert predict.calls == [["0", "1"], ["2"], ["3", "4", "5"]]
+    assert [r.labels.tolist() for r in results] == [[0, 1], [2], [0, 1, 2]]
+    assert batcher.stats()["largest_batch"] == 3
+
+
+def test_batches_never_exceed_max_batch_size():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict, max_wait_ms=50, max_batch_size=3)
+
+    # Le batch courant part avant de déborder ; la requête de 7 est découpée
+    requests = [["0", "1"], ["2", "3"], [str(i) for i in range(4, 11)]]
+    results = run(batcher, requests)
+
+    assert [len(call) for call in predict.calls] == [2, 2, 3, 3, 1]
+    for texts, result in zip(requests, results):
+        assert result.labels.tolist() == [int(text) % 3 for text in texts]
+    stats = batcher.stats()
+    assert stats["largest_batch"] == 3
+    assert stats["batch_size_histogram"]["<=1"] == 1 and stats["batch_size_histogram"]["<=5"] == 4
+
+
+def test_flush_on_timer():
+    # Le premier batch est encore en cours : la deuxième requête attend le timer
+    predict = FakePredict(delay=0.5)
+    batcher = MicroBatcher(predict, max_wait_ms=5, max_batch_size=1000)
+
+    results = run(batcher, [["0"], ["1"]], delay=0.01)
+
+    assert predict.calls == [["0"], ["1"]]
+    assert [r.labels.tolist() for r in results] == [[0], [1]]
+    assert 4 <= batcher.stats()["max_queue_delay_ms"] < 400
+    assert batcher.stats()["pending_comments"] == 0
+
+
+def test_predict_error_reaches_every_caller():
+    predict = FakePredict(error=RuntimeError("modèle indisponible"))
+    batcher = MicroBatcher(predict, max_wait_ms=5, max_batch_size=100)
+
+    results = run(batcher, [["0"], ["1", "2"], ["3"]])
+
+    assert len(predict.calls) == 2
+    assert all(isinstance(r, RuntimeError) and str(r) == "modèle indisponible" for r in results)
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+
+from src.api.cache import BasePredictionCache, PredictionCache, SQLitePredictionCache, predict_with_cache
+from src.models.inference import SentimentResult
+
+
+class FakePredictor:
+    """Prédicteur factice qui enregistre les textes réellement prédits"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        probabilities = np.array([[0.1, 0.2, 0.7] if "good" in t else [0.6, 0.3, 0.1] for t in texts])
+        best = probabilities.argmax(axis=1)
+        return SentimentResult(
+            labels=best,
+            confidences=probabilities.max(axis=1),
+            probabilities=probabilities
+        )
+
+
+def make_cache(backend, tmp_path, **kwargs):
+    if backend == "sqlite":
+        return SQLitePredictionCache(tmp_path / "cache.sqlite3", **kwargs)
+    return PredictionCache(**kwargs)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_cache_deduplicates_and_hits(backend, tmp_path):
+    """Les doublons du batch et les textes déjà vus ne sont pas re-prédits"""
+    cache = make_cache(backend, tmp_path, max_entries=100, ttl_seconds=60, model_version="v1")
+    predictor = FakePredictor()
+
+    texts = ["good", "first!", "good", "first!", "bad"]
+    result = asyncio.run(predict_with_cache(cache, predictor, texts))
+
+    assert predictor.calls == [["good", "first!", "bad"]]
+    assert list(result.labels) == [2, 0, 2, 0, 0]
+
+    result = asyncio.run(predict_with_cache(cache, predictor, ["bad", "good", "new"]))
+    assert predictor.calls[-1] == ["new"]
+    assert list(result.labels) == [0, 2, 0]
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_lru_eviction_and_ttl():
+    """Éviction LRU au-delà de max_entries et expiration après le TTL"""
+    cache = PredictionCache(max_entries=2, ttl_seconds=60, model_version="v1")
+    predictor = FakePredictor()
+
+    asyncio.run(predict_with_cache(cache, predictor, ["a", "b"]))
+    asyncio.run(predict_with_cache(cache, predictor, ["a"]))       # "a" devient récent
+    asyncio.run(predict_with_cache(cache, predictor, ["c"]))       # évince "b"
+    assert cache.stats()["evictions"] == 1
+
+    asyncio.run(predict_with_cache(cache, predictor, ["a", "b"]))
+    assert predictor.calls[-1] == ["b"]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_cache_ttl(backend, tmp_path):
+    """Une entrée expirée est re-prédite"""
+    cache = make_cache(backend, tmp_path, max_entries=10, ttl_seconds=-1, model_version="v1")
+    predictor = FakePredictor()
+
+    asyncio.run(predict_with_cache(cache, predictor, ["x"]))
+    asyncio.run(predict_with_cache(cache, predictor, ["x"]))
+    assert predictor.calls == [["x"], ["x"]]
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_cache_invalidated_on_model_change(backend, tmp_path):
+    """Un changement de version du modèle vide le cache"""
+    cache = make_cache(backend, tmp_path, max_entries=10, ttl_seconds=60, model_version="v1")
+    predictor = FakePredictor()
+
+    asyncio.run(predict_with_cache(cache, predictor, ["good"]))
+    cache.set_model_version("v2")
+    assert cache.stats()["size"] == 0
+
+    asyncio.run(predict_with_cache(cache, predictor, ["good"]))
+    assert len(predictor.calls) == 2
+
+
+def test_sqlite_cache_shared_between_workers(tmp_path):
+    """Deux workers ouvrant le même fichier partagent les prédictions"""
+    path = tmp_path / "cache.sqlite3"
+    worker_a = SQLitePredictionCache(path, max_entries=100, ttl_seconds=60, model_version="v1")
+    worker_b = SQLitePredictionCache(path, max_entries=100, ttl_seconds=60, model_version="v1")
+    predictor = FakePredictor()
+
+    first = asyncio.run(predict_with_cache(worker_a, predictor, ["good", "bad"]))
+    second = asyncio.run(predict_with_cache(worker_b, predictor, ["bad", "good"]))
+
+    assert len(predictor.calls) == 1
+    assert np.allclose(second.probabilities, first.probabilities[::-1])
+    assert worker_b.stats()["hits"] == 2
+
+
+def test_cache_ignores_results_of_replaced_model():
+    """Un batch prédit par l'ancien modèle n'entre pas dans le cache du nouveau"""
+    cache = PredictionCache(max_entries=10, ttl_seconds=60, model_version="v1")
+    predictor = FakePredictor()
+
+    async def predict_during_reload(texts):
+        cache.set_model_version("v2")  # rechargement pendant l'inférence
+        return await predictor(texts)
+
+    asyncio.run(predict_with_cache(cache, predict_during_reload, ["good"]))
+    assert cache.stats()["size"] == 0
+
+
+def test_sqlite_cache_evicts_on_timer(tmp_path):
+    """Le COUNT(*) et l'éviction LRU n'ont lieu qu'à chaque passe du timer"""
+    predictor = FakePredictor()
+    cache = SQLitePredictionCache(tmp_path / "cache.sqlite3", max_entries=2, ttl_seconds=60,
+                                  model_version="v1", eviction_interval=3600)
+    asyncio.run(predict_with_cache(cache, predictor, ["good 1", "good 2", "good 3"]))
+    assert cache.stats()["size"] == 3 and cache.stats()["evictions"] == 0
+
+    cache.eviction_interval = 0
+    asyncio.run(predict_with_cache(cache, predictor, ["good 4"]))
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 2
+
+
+def test_sqlite_cache_runs_off_event_loop(tmp_path, monkeypatch):
+    """Les requêtes SQLite tournent dans un thread, pas sur la boucle"""
+    cache = SQLitePredictionCache(tmp_path / "cache.sqlite3", max_entries=10, ttl_seconds=60,
+                                  model_version="v1")
+    threads = []
+    for name in ("get_many", "set_many"):
+        method = getattr(cache, name)
+
+        def record(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+
+        monkeypatch.setattr(cache, name, record)
+
+    asyncio.run(predict_with_cache(cache, FakePredictor(), ["good"]))
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+
+def test_sqlite_hits_skip_recent_last_access_refresh(tmp_path):
+    """Une entrée lue récemment est servie sans transaction d'écriture"""
+    cache = SQLitePredictionCache(tmp_path / "cache.sqlite3", max_entries=10, ttl_seconds=60,
+                                  model_version="v1", eviction_interval=3600)
+    predictor = FakePredictor()
+    asyncio.run(predict_with_cache(cache, predictor, ["good", "bad"]))
+
+    changes = cache._conn.total_changes
+    asyncio.run(predict_with_cache(cache, predictor, ["good", "bad"]))
+    assert cache._conn.total_changes == changes and cache.stats()["hits"] == 2
+
+    # Date d'accès plus vieille que l'intervalle : rafraîchie au prochain hit
+    cache.eviction_interval = 0
+    asyncio.run(predict_with_cache(cache, predictor, ["good"]))
+    assert cache._conn.total_changes == changes + 1
+
+
+def test_incomplete_backend_cannot_be_instantiated():
+    class NoClear(BasePredictionCache):
+        def get_many(self, keys):
+            return {}
+
+        def set_many(self, keys, result):
+            pass
+
+        def size(self):
+            return 0
+
+    with pytest.raises(TypeError, match="clear"):
+        NoClear()
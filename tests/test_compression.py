@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.api.compression import CompressionMiddleware, GzipRequestDecoder, brotli, negotiate_encoding
+
+
+async def echo(request):
+    payload = await request.json()
+    return JSONResponse({"count": len(payload["items"]), "items": payload["items"]})
+
+
+def client(**options):
+    app = Starlette(routes=[Route("/echo", echo, methods=["POST"])])
+    app.add_middleware(CompressionMiddleware, **options)
+    return TestClient(app)
+
+
+def test_negotiate_encoding_ignores_refused_encodings():
+    assert negotiate_encoding("gzip, deflate, br") == ("br" if brotli else "gzip")
+    assert negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("identity") is None
+
+
+def test_gzip_request_and_threshold():
+    body = json.dumps({"items": ["un commentaire assez répétitif"] * 200}).encode()
+    with client(minimum_size=1024) as http:
+        response = http.post("/echo", content=gzip.compress(body), headers={
+            "Content-Type": "application/json", "Content-Encoding": "gzip", "Accept-Encoding": "gzip"
+        })
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["count"] == 200
+
+        small = http.post("/echo", json={"items": [1]}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+        refused = http.post("/echo", content=body, headers={"Content-Encoding": "zstd"})
+        assert refused.status_code == 415
+
+
+def test_decoder_limits_decompressed_size():
+    bomb = gzip.compress(b"0" * 1_000_000)
+    decoder = GzipRequestDecoder(max_size=10_000)
+    with pytest.raises(HTTPException) as error:
+        decoder.decode(bomb, final=True)
+    assert error.value.status_code == 413
+
+    # Décompression en plusieurs messages
+    data = gzip.compress(b"abc" * 1000)
+    decoder = GzipRequestDecoder(max_size=10_000)
+    chunks = [decoder.decode(data[i:i + 100], final=i + 100 >= len(data)) for i in range(0, len(data), 100)]
+    assert b"".join(chunks) == b"abc" * 1000
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+from src.models.feature_cache import feature_cache_key
+from src.models.features import create_vectorizer
+from src.models.train_model import SentimentModelTrainer
+
+
+def make_trainer(cache_dir, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(["great", "video", "boring", "song", "love", "hate", "first", "meh"])
+    texts = pd.Series([" ".join(rng.choice(words, size=rng.integers(2, 8))) for _ in range(400)])
+    labels = pd.Series(rng.integers(0, 3, size=len(texts)))
+
+    trainer = SentimentModelTrainer(feature_cache_dir=cache_dir)
+    trainer.X_train, trainer.y_train = texts[:300], labels[:300]
+    trainer.X_test, trainer.y_test = texts[300:], labels[300:]
+    return trainer
+
+
+def test_features_reloaded_from_cache(tmp_path, monkeypatch):
+    first = make_trainer(tmp_path)
+    first.create_vectorizer()
+
+    # Un hit du cache ne refit pas le vectoriseur
+    def no_refit(self, *args, **kwargs):
+        raise AssertionError("vectoriseur refit malgré le cache")
+    monkeypatch.setattr(type(first.vectorizer), "fit_transform", no_refit)
+
+    second = make_trainer(tmp_path)
+    second.create_vectorizer()
+
+    assert second.vectorizer.vocabulary_ == first.vectorizer.vocabulary_
+    assert (second.X_train_vec != first.X_train_vec).nnz == 0
+    assert (second.X_test_vec != first.X_test_vec).nnz == 0
+
+
+def test_key_depends_on_data_and_params():
+    texts = pd.Series(["great video", "boring song"])
+    key = feature_cache_key(texts, texts, "tfidf", create_vectorizer("tfidf"))
+    assert key == feature_cache_key(texts.copy(), texts, "tfidf", create_vectorizer("tfidf"))
+    assert key != feature_cache_key(texts[::-1], texts, "tfidf", create_vectorizer("tfidf"))
+    assert key != feature_cache_key(texts, texts, "hashing", create_vectorizer("hashing"))
+    assert key != feature_cache_key(
+        texts, texts, "tfidf", create_vectorizer("tfidf").set_params(min_df=1)
+    )
+
+
+def test_predictions_computed_once_per_model():
+    class CountingModel:
+        calls = 0
+
+        def predict(self, X):
+            self.calls += 1
+            return np.zeros(X.shape[0], dtype=int)
+
+    trainer = make_trainer(None)
+    trainer.create_vectorizer()
+    model = CountingModel()
+    trainer.evaluate_model(model, "Compteur")
+    trainer.predict_test(model)
+    assert model.calls == 1
@@ -0,0 +1,39 @@
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.data.text_cleaning import clean_text
+from src.models.features import create_vectorizer, vectorizer_info
+from src.models.flat_artifact import export_flat_artifact, load_flat_artifact
+
+
+def test_fused_analyzer_matches_clean_then_sklearn(synthetic_comments):
+    texts = synthetic_comments(2000) + ["Great VIDEO!!! https://x.y @bob #love", "a b cd", "", "café"]
+    sklearn_analyzer = TfidfVectorizer(ngram_range=(1, 2), strip_accents='unicode').build_analyzer()
+    analyzer = create_vectorizer("tfidf").analyzer
+    assert [analyzer(t) for t in texts] == [sklearn_analyzer(clean_text(t)) for t in texts]
+
+
+def test_raw_and_cleaned_texts_give_same_features(synthetic_comments):
+    texts = synthetic_comments(1000, seed=3)
+    for mode in ("tfidf", "hashing"):
+        vectorizer = create_vectorizer(mode).fit([clean_text(t) for t in texts])
+        raw, cleaned = vectorizer.transform(texts), vectorizer.transform([clean_text(t) for t in texts])
+        assert abs(raw - cleaned).max() == 0
+        assert vectorizer_info(vectorizer)["text_analyzer"] == "comment"
+
+
+def test_flat_artifact_keeps_analyzer(tmp_path, synthetic_comments):
+    texts = synthetic_comments(600, seed=4)
+    vectorizer = create_vectorizer("tfidf").fit(texts)
+    X = vectorizer.transform(texts)
+    model = LogisticRegression().fit(X, np.arange(len(texts)) % 3)
+    export_flat_artifact(tmp_path, vectorizer, model, "LogisticRegression", "v1")
+
+    header, loaded, _ = load_flat_artifact(tmp_path / "serving")
+    assert header["text_analyzer"] == "comment"
+    assert abs(loaded.transform(texts) - X).max() < 1e-12
+    # Le joblib embarque aussi l'analyseur
+    joblib.dump(vectorizer, tmp_path / "vectorizer.joblib")
+    assert abs(joblib.load(tmp_path / "vectorizer.joblib").transform(texts) - X).max() == 0
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.api.hot_reload import ModelReloader, ModelValidationError, prepare_models
+from src.models import flat_artifact
+from src.models.artifacts import (
+    FLAT_DIR, HEADER_FILE, METADATA_FILE, MODEL_FILE, VECTORIZER_FILE, compute_model_version
+)
+from src.models.features import create_vectorizer
+from src.models.flat_artifact import export_flat_artifact, load_serving_models
+
+
+def test_watcher_survives_partial_metadata(tmp_path):
+    # model_metadata.json lu pendant son écriture
+    (tmp_path / "model_metadata.json").write_text('{"model_version": ')
+
+    async def apply(serving, version):
+        raise AssertionError("aucun échange attendu")
+
+    async def run():
+        reloader = ModelReloader(tmp_path, apply, "v0")
+        reloader.start_watching(0.01)
+        await asyncio.sleep(0.1)
+        stats = reloader.stats()
+        reloader.stop_watching()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["watching"]
+    assert stats["last_error"]
+    assert stats["model_version"] == "v0"
+
+
+def publish(models_dir, synthetic_comments, seed=0):
+    """Artefacts joblib + bundle plat + métadonnées, comme save_model"""
+    texts = synthetic_comments(300, seed=seed)
+    vectorizer = create_vectorizer("tfidf").fit(texts)
+    model = LogisticRegression(max_iter=200).fit(vectorizer.transform(texts), np.arange(len(texts)) % 3)
+    joblib.dump(vectorizer, models_dir / VECTORIZER_FILE)
+    joblib.dump(model, models_dir / MODEL_FILE)
+    export_flat_artifact(models_dir, vectorizer, model, "LogisticRegression")
+    version = compute_model_version(models_dir)
+    (models_dir / METADATA_FILE).write_text(json.dumps({"model_version": version}))
+    return version
+
+
+def test_flat_header_is_part_of_model_version(tmp_path, synthetic_comments):
+    version = publish(tmp_path, synthetic_comments)
+    header_path = tmp_path / FLAT_DIR / HEADER_FILE
+    header = json.loads(header_path.read_text())
+    assert header["model_version"] == version
+    assert prepare_models(tmp_path)[1] == version
+
+    # Un en-tête modifié seul change l'empreinte : le rechargement est refusé
+    header["model_type"] = "autre"
+    header_path.write_text(json.dumps(header))
+    assert compute_model_version(tmp_path) != version
+    with pytest.raises(ModelValidationError):
+        prepare_models(tmp_path)
+
+
+def test_stale_flat_bundle_is_not_mapped(tmp_path, synthetic_comments, monkeypatch):
+    publish(tmp_path, synthetic_comments)
+    (tmp_path / METADATA_FILE).write_text(json.dumps({"model_version": "nouvelle"}))
+
+    def fail(*args):
+        raise AssertionError("bundle périmé chargé")
+
+    monkeypatch.setattr(flat_artifact, "load_flat_artifact", fail)
+    assert load_serving_models(tmp_path).artifact_format == "joblib"
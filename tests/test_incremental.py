@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.flat_artifact import load_serving_models
+from src.models.incremental import IncrementalTrainer, iter_batches
+
+WORDS = {
+    0: ["hate", "boring", "worst", "awful"],
+    1: ["video", "today", "first", "watching"],
+    2: ["love", "great", "amazing", "best"]
+}
+
+
+def labeled_comments(n, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 3, size=n)
+    texts = [
+        " ".join(rng.choice(WORDS[label] + WORDS[1], size=rng.integers(3, 10)))
+        for label in labels
+    ]
+    return pd.DataFrame({"text": texts, "label": labels})
+
+
+@pytest.fixture
+def train_csv(tmp_path):
+    path = tmp_path / "train.csv"
+    labeled_comments(6000).to_csv(path, index=False)
+    return path
+
+
+def test_iter_batches_covers_input(train_csv):
+    batches = list(iter_batches(train_csv, 1000))
+    assert [len(b) for b in batches] == [1000] * 6
+    pd.testing.assert_frame_equal(
+        pd.concat(batches, ignore_index=True), pd.read_csv(train_csv)
+    )
+
+
+@pytest.mark.parametrize("loss", ["log_loss", "hinge"])
+def test_resume_and_publish(train_csv, tmp_path, loss):
+    """Le checkpoint reprend exactement l'état, et l'artefact publié est servi tel quel"""
+    models_dir = tmp_path / "models"
+    batches = list(iter_batches(train_csv, 1500))
+
+    trainer = IncrementalTrainer(loss=loss, models_dir=models_dir)
+    for df in batches[:2]:
+        trainer.partial_fit(df['text'], df['label'])
+    trainer.checkpoint()
+
+    resumed = IncrementalTrainer.resume(models_dir)
+    for t in (trainer, resumed):
+        for df in batches[2:]:
+            t.partial_fit(df['text'], df['label'])
+    np.testing.assert_array_equal(trainer.model.coef_, resumed.model.coef_)
+
+    test = labeled_comments(500, seed=1)
+    metadata = resumed.publish(test['text'], test['label'])
+    assert metadata['accuracy'] > 0.9
+
+    serving = load_serving_models(models_dir)
+    assert serving.artifact_format == "flat"
+    X = serving.vectorizer.transform(test['text'])
+    proba = serving.scorer.predict_proba(X)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    np.testing.assert_allclose(proba, resumed.calibrate().predict_proba(X), atol=1e-12)
+
+
+def test_uncalibrated_scorer_matches_sgd(train_csv, tmp_path):
+    """Sans réservoir de calibration, le scoreur reproduit SGDClassifier.predict_proba"""
+    trainer = IncrementalTrainer(models_dir=tmp_path)
+    df = pd.read_csv(train_csv)
+    trainer.partial_fit(df['text'], df['label'])
+    trainer.calibration = trainer.calibration.iloc[:0]
+
+    X = trainer.vectorizer.transform(df['text'][:200])
+    np.testing.assert_allclose(
+        trainer.calibrate().predict_proba(X), trainer.model.predict_proba(X), atol=1e-6
+    )
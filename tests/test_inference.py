@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.models.inference import (
+    SENTIMENT_LABELS, SentimentResult, build_predictions, compute_statistics, predict_sentiment
+)
+
+
+def make_result(size, seed=0):
+    probabilities = np.random.default_rng(seed).dirichlet(np.ones(3), size=size)
+    best = probabilities.argmax(axis=1)
+    return SentimentResult(
+        labels=best,
+        confidences=probabilities.max(axis=1),
+        probabilities=probabilities
+    )
+
+
+class StubModel:
+    """Modèle sans artefact : probabilités fixées, classes brutes du dataset"""
+    classes_ = np.array([-1, 0, 1])
+
+    def __init__(self, probabilities):
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+
+    def predict_proba(self, X):
+        return self.probabilities
+
+
+def test_predict_sentiment_label_matches_confidence():
+    """label = classes_[argmax], confiance float32 = probabilité max (la première en cas d'égalité)"""
+    probabilities = [[0.7, 0.2, 0.1], [0.1, 0.3, 0.6], [0.25, 0.5, 0.25], [0.4, 0.2, 0.4]]
+    result = predict_sentiment(StubModel(probabilities), X=None)
+
+    assert result.labels.tolist() == [-1, 1, 0, -1]
+    assert result.probabilities.dtype == np.float32 and result.confidences.dtype == np.float32
+    np.testing.assert_array_equal(result.confidences, result.probabilities.max(axis=1))
+    np.testing.assert_allclose(result.confidences, [0.7, 0.6, 0.5, 0.4], rtol=1e-6)
+
+
+def test_build_predictions_matches_per_comment_loop():
+    """Les prédictions assemblées en bloc reproduisent l'ancienne boucle par commentaire"""
+    result = make_result(1000)
+    texts = [f"comment {i}" for i in range(len(result))]
+
+    expected = [
+        {"text": text, "sentiment": SENTIMENT_LABELS[label], "confidence": float(np.max(proba)), "label": int(label)}
+        for text, label, proba in zip(texts, result.labels, result.probabilities)
+    ]
+    predictions = build_predictions(texts, result)
+
+    assert predictions == expected
+    assert all(type(p["confidence"]) is float and type(p["label"]) is int for p in predictions)
+    assert build_predictions([], result[:0]) == []
+
+
+def test_statistics_percentiles_and_entropy():
+    """Percentiles identiques à np.percentile, entropie bornée par log(3)"""
+    result = make_result(257, seed=1)
+    statistics = compute_statistics(result)
+
+    expected = np.percentile(result.confidences, [10, 50, 90])
+    assert statistics["confidence_p10"] == round(float(expected[0]), 4)
+    assert statistics["confidence_median"] == round(float(expected[1]), 4)
+    assert statistics["confidence_p90"] == round(float(expected[2]), 4)
+
+    assert 0 <= statistics["average_entropy"] <= np.log(3)
+    assert statistics["low_confidence_percentage"] == round(float(np.mean(result.confidences < 0.5) * 100), 2)
@@ -0,0 +1,101 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+import time
+from scipy import sparse
+from sklearn.svm import SVC
+
+from src.models.linear_scorer import compile_linear_svc, LinearSVCScorer
+from src.models.flat_artifact import export_flat_artifact, load_flat_artifact
+from src.models.inference import predict_texts
+
+MODELS_DIR = Path("models")
+TEST_PATH = Path("data/processed/test.csv")
+
+
+def load_artifacts():
+    """Charge le vectoriseur, le modèle et le split de test"""
+    if not (MODELS_DIR / "sentiment_model.joblib").exists() or not TEST_PATH.exists():
+        pytest.skip("Modèles ou split de test absents")
+
+    vectorizer = joblib.load(MODELS_DIR / "tfidf_vectorizer.joblib")
+    model = joblib.load(MODELS_DIR / "sentiment_model.joblib")
+    if getattr(model, 'kernel', None) != 'linear':
+        pytest.skip(f"Modèle {type(model).__name__} non compilable")
+
+    texts = pd.read_csv(TEST_PATH)['text'].fillna("")
+    return vectorizer, model, vectorizer.transform(texts)
+
+
+def test_compiled_svc_parity_on_synthetic_data():
+    """Parité predict_proba / predict sur un SVC entraîné à la volée (sans artefacts)"""
+    rng = np.random.default_rng(0)
+    centers = sparse.random(3, 200, density=0.1, random_state=1, format='csr')
+    y = rng.integers(0, 3, size=300)
+    noise = sparse.random(300, 200, density=0.05, random_state=2, format='csr')
+    X = sparse.csr_matrix(centers[y] + noise)
+
+    model = SVC(kernel='linear', probability=True, random_state=42).fit(X, y)
+    scorer = compile_linear_svc(model)
+
+    X_test = sparse.csr_matrix(centers[rng.integers(0, 3, size=100)]
+                               + sparse.random(100, 200, density=0.05, random_state=3))
+    assert np.max(np.abs(scorer.predict_proba(X_test) - model.predict_proba(X_test))) < 1e-6
+    assert np.array_equal(scorer.predict(X_test), model.predict(X_test))
+
+
+def test_compiled_scorer_parity():
+    """Le scoreur compilé reproduit predict_proba et predict du SVC"""
+    vectorizer, model, X = load_artifacts()
+    scorer = compile_linear_svc(model)
+
+    expected = model.predict_proba(X)
+    compiled = scorer.predict_proba(X)
+
+    max_diff = np.max(np.abs(expected - compiled))
+    print(f" Écart max predict_proba: {max_diff:.2e}")
+    assert max_diff < 1e-6
+
+    assert np.array_equal(scorer.predict(X), model.predict(X))
+
+    start = time.time()
+    model.predict_proba(X)
+    libsvm_time = (time.time() - start) * 1000
+
+    start = time.time()
+    scorer.predict_proba(X)
+    compiled_time = (time.time() - start) * 1000
+
+    print(f" libsvm: {libsvm_time:.2f}ms / compilé: {compiled_time:.2f}ms "
+          f"pour {X.shape[0]} commentaires")
+
+
+def test_compiled_scorer_roundtrip(tmp_path):
+    """Le scoreur sauvegardé en NPZ se recharge à l'identique"""
+    vectorizer, model, X = load_artifacts()
+    scorer = compile_linear_svc(model)
+
+    path = tmp_path / "linear_scorer.npz"
+    scorer.save(path)
+    reloaded = LinearSVCScorer.load(path)
+
+    assert np.allclose(scorer.predict_proba(X), reloaded.predict_proba(X))
+
+
+def test_flat_artifact_parity(tmp_path):
+    """Le bundle plat chargé en mmap prédit comme les pickles joblib"""
+    vectorizer, model, X = load_artifacts()
+    texts = pd.read_csv(TEST_PATH)['text'].fillna("").tolist()
+
+    export_flat_artifact(tmp_path, vectorizer, model, type(model).__name__, "test")
+    header, flat_vectorizer, flat_scorer = load_flat_artifact(tmp_path / "serving")
+
+    assert header["model_version"] == "test"
+    assert isinstance(flat_scorer.coef_.base, np.memmap)
+
+    expected = predict_texts(vectorizer, model, texts)
+    flat = predict_texts(flat_vectorizer, flat_scorer, texts)
+    assert np.array_equal(expected.labels, flat.labels)
+    assert np.allclose(expected.probabilities, flat.probabilities)
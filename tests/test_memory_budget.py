@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models.features import create_vectorizer
+from src.models.inference import predict_texts
+from src.models.linear_scorer import compile_model
+from src.models.memory_budget import AllocationBudgetExceeded, check_allocation_budget
+
+
+@pytest.fixture(scope="module")
+def serving(synthetic_comments):
+    texts = synthetic_comments(3000, seed=1)
+    vectorizer = create_vectorizer("tfidf").fit(texts)
+    model = LogisticRegression(max_iter=200).fit(vectorizer.transform(texts), np.arange(len(texts)) % 3)
+    return vectorizer, compile_model(model)
+
+
+class Densify:
+    def __init__(self, model):
+        self.model, self.classes_ = model, model.classes_
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X.toarray())
+
+
+def test_sparse_path_stays_under_budget(serving, synthetic_comments):
+    vectorizer, scorer = serving
+    texts = synthetic_comments(2000)
+    report = check_allocation_budget(vectorizer, scorer, texts, budget_mb=8)
+    assert report["X_format"] == "csr"
+    assert report["output_dtype"] == "float32" and report["output_shape"] == [2000, 3]
+    # Bien en dessous d'une seule copie dense de X
+    assert report["predict_peak_mb"] < report["dense_equivalent_mb"] / 20
+
+    result = predict_texts(vectorizer, scorer, texts[:10])
+    assert result.probabilities.dtype == np.float32 and result.confidences.dtype == np.float32
+
+
+def test_densification_is_flagged(serving, synthetic_comments):
+    vectorizer, scorer = serving
+    with pytest.raises(AllocationBudgetExceeded, match="predict"):
+        check_allocation_budget(vectorizer, Densify(scorer), synthetic_comments(2000), budget_mb=8)
+
+
+def test_dense_vectorizer_output_is_rejected(serving):
+    vectorizer, scorer = serving
+
+    class DenseVectorizer:
+        def transform(self, texts):
+            return vectorizer.transform(texts).toarray()
+
+    with pytest.raises(TypeError):
+        predict_texts(DenseVectorizer(), scorer, ["great video"])
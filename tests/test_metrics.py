@@ -0,0 +1,30 @@
+from src.api.metrics import Counter, Histogram, ServingMetrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets cumulés, +Inf, somme et nombre au format Prometheus"""
+    histogram = Histogram("latency_seconds", "Latence", (0.1, 1.0), ("stage",))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "transform")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="transform",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="transform",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="transform",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="transform"} 4' in lines
+    assert 'latency_seconds_sum{stage="transform"} 3.65' in lines
+
+
+def test_counter_and_gauges_render():
+    """Compteurs par labels et jauges lues au scrape ; une jauge en erreur est omise"""
+    counter = Counter("requests_total", "Requêtes", ("path", "status"))
+    counter.inc("/predict_batch", 200)
+    counter.inc("/predict_batch", 200)
+    assert 'requests_total{path="/predict_batch",status="200"} 2' in counter.render()
+
+    metrics = ServingMetrics()
+    metrics.gauge("queue_depth", "File", lambda: 3)
+    metrics.gauge("broken", "Jauge sans source", lambda: None.size)
+    text = metrics.render()
+    assert "queue_depth 3\n" in text
+    assert "broken" not in text
@@ -1,8 +1,10 @@
 import joblib
-import numpy as np
 from pathlib import Path
 import time
 
+from src.models.inference import predict_sentiment
+from src.models.linear_scorer import load_scorer
+
 def test_model_performance():
     """Teste les performances du modèle"""
     
@@ -13,6 +15,7 @@ def test_model_performance():
     models_dir = Path("models")
     vectorizer = joblib.load(models_dir / "tfidf_vectorizer.joblib")
     model = joblib.load(models_dir / "sentiment_model.joblib")
+    scorer = load_scorer(models_dir, model)
     
     # Cas de test
     test_cases = [
@@ -45,10 +48,9 @@ def test_model_performance():
         
         try:
             X = vectorizer.transform([text])
-            pred = model.predict(X)[0]
-            proba = model.predict_proba(X)[0]
-            sentiment = {0: "Négatif", 1: "Neutre", 2: "Positif"}[pred]
-            confidence = np.max(proba)
+            result = predict_sentiment(scorer, X)
+            sentiment = result.sentiments[0]
+            confidence = result.confidences[0]
             
             status = "✅" if sentiment == expected or expected == "?" else "❌"
             if sentiment == expected:
@@ -69,11 +71,32 @@ def test_model_performance():
     
     start = time.time()
     X = vectorizer.transform(test_batch)
-    _ = model.predict(X)
+    _ = predict_sentiment(scorer, X)
     inference_time = (time.time() - start) * 1000
     
     print(f"  Temps pour 50 commentaires: {inference_time:.2f}ms")
     print(f"  Critère: < 100ms ({'✅' if inference_time < 100 else '❌'})")
 
+def test_prediction_contract():
+    """Le label est l'argmax des probabilités et la confiance sa probabilité"""
+    
+    models_dir = Path("models")
+    vectorizer = joblib.load(models_dir / "tfidf_vectorizer.joblib")
+    model = joblib.load(models_dir / "sentiment_model.joblib")
+    scorer = load_scorer(models_dir, model)
+    
+    texts = [
+        "This is absolutely amazing! Best video ever!",
+        "This is terrible and boring",
+        "It's okay, nothing special",
+        "",
+    ]
+    result = predict_sentiment(scorer, vectorizer.transform(texts))
+    
+    assert result.probabilities.shape == (len(texts), 3)
+    assert (result.labels == result.probabilities.argmax(axis=1)).all()
+    assert (result.confidences == result.probabilities.max(axis=1)).all()
+
 if __name__ == "__main__":
-    test_model_performance()
\ No newline at end of file
+    test_model_performance()
+    test_prediction_contract()
\ No newline at end of file
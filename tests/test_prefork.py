@@ -0,0 +1,82 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.models.artifacts import METADATA_FILE, MODEL_FILE, VECTORIZER_FILE, compute_model_version
+from src.models.features import create_vectorizer
+from src.models.flat_artifact import export_flat_artifact
+
+ROOT = Path(__file__).resolve().parents[1]
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch(cwd, port, *args):
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "VIDEO_STORE_PATH": str(cwd / "videos.sqlite3")}
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.api.prefork", "app_api:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "2", *args],
+        # Logs dans un fichier : un pipe non lu bloquerait les workers
+        cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=open(cwd / "prefork.log", "wb")
+    )
+
+
+def wait_for_health(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert process.poll() is None, "lanceur arrêté avant de servir /health"
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as response:
+                return json.load(response)
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("/health ne répond pas")
+
+
+def test_two_workers_serve_and_stop_cleanly(tmp_path, synthetic_comments):
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    texts = synthetic_comments(300)
+    vectorizer = create_vectorizer("tfidf").fit(texts)
+    model = LogisticRegression(max_iter=200).fit(vectorizer.transform(texts), np.arange(len(texts)) % 3)
+    joblib.dump(vectorizer, models_dir / VECTORIZER_FILE)
+    joblib.dump(model, models_dir / MODEL_FILE)
+    export_flat_artifact(models_dir, vectorizer, model, "LogisticRegression")
+    (models_dir / METADATA_FILE).write_text(json.dumps({"model_version": compute_model_version(models_dir)}))
+
+    port = free_port()
+    process = launch(tmp_path, port)
+    try:
+        health = wait_for_health(port, process)
+        assert health["status"] == "healthy" and health["artifact_format"] == "flat"
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        process.kill()
+
+
+def test_gives_up_after_repeated_startup_crashes(tmp_path):
+    # Sans modèles et sans préchargement, chaque worker échoue à son startup
+    process = launch(tmp_path, free_port(), "--no-preload", "--max-crashes", "2")
+    try:
+        assert process.wait(timeout=60) == 1
+    finally:
+        process.kill()
+    assert "échecs de démarrage consécutifs" in (tmp_path / "prefork.log").read_text()
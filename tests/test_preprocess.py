@@ -0,0 +1,41 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.data.preprocess import TextCleaner, clean_text, clean_texts
+
+
+def legacy_clean_text(text):
+    """Implémentation d'origine de TextCleaner.clean_text"""
+    if pd.isna(text):
+        return ""
+
+    text = str(text).lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'#(\w+)', r'\1', text)
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def test_clean_text_matches_legacy_implementation(synthetic_comments):
+    """Sortie identique octet pour octet à l'implémentation d'origine"""
+    texts = synthetic_comments(20_000) + [
+        np.nan, None, 42, 1.5, "", "   ", "HTTP://X.COM", "@", "#", "x@wwwy.z",
+        "a b c", "\x1cfoo\x1f", "İ", "ǅ", "naïve café", "#tag#tag", "@a@b"
+    ]
+    expected = [legacy_clean_text(text) for text in texts]
+
+    assert [clean_text(text) for text in texts] == expected
+    assert clean_texts(texts, n_jobs=2, chunk_size=1000) == expected
+
+
+def test_clean_series_keeps_index():
+    """La colonne nettoyée garde l'index du DataFrame d'origine"""
+    series = pd.Series(["Great VIDEO!!", np.nan, "@user see https://t.co/x #wow"], index=[10, 20, 30])
+    cleaned = TextCleaner(n_jobs=1).clean_series(series)
+
+    assert cleaned.index.tolist() == [10, 20, 30]
+    assert cleaned.tolist() == ["great video", "", "see wow"]
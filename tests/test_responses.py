@@ -0,0 +1,71 @@
+import importlib
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import responses
+from src.models.inference import SentimentResult
+
+msgpack = pytest.importorskip("msgpack")  # dépendance optionnelle
+
+TEXTS = ["great video", "boring", "ok I guess", "great video"]
+
+
+@pytest.fixture(params=["app_api", "src.api.app"])
+def client(request, monkeypatch):
+    api = importlib.import_module(request.param)
+
+    async def predict_cached(texts):
+        probabilities = np.random.default_rng(len(texts)).dirichlet(np.ones(3), size=len(texts))
+        labels = probabilities.argmax(axis=1)
+        return SentimentResult(labels, probabilities.max(axis=1).astype(np.float32),
+                               probabilities.astype(np.float32))
+
+    monkeypatch.setattr(api, "vectorizer", object())
+    monkeypatch.setattr(api, "model", object())
+    monkeypatch.setattr(api, "predict_cached", predict_cached)
+    return api, TestClient(api.app)
+
+
+def post(client, accept=None, **params):
+    headers = {"Accept": accept} if accept else {}
+    return client.post("/predict_batch", params=params,
+                       json={"comments": [{"text": t} for t in TEXTS]}, headers=headers)
+
+
+def test_compact_and_msgpack_match_full_response(client):
+    api, client = client
+    full = post(client).json()
+
+    compact = post(client, compact="true", probabilities="true").json()
+    assert compact["labels"] == [p["label"] for p in full["predictions"]]
+    assert compact["confidences"] == pytest.approx([p["confidence"] for p in full["predictions"]])
+    assert [compact["sentiments"][str(label)] for label in compact["labels"]] == \
+        [p["sentiment"] for p in full["predictions"]]
+    assert np.allclose(np.asarray(compact["probabilities"]).max(axis=1), compact["confidences"])
+    assert compact["statistics"] == full["statistics"]
+    assert compact["total_comments"] == full["total_comments"] == len(TEXTS)
+
+    response = post(client, accept="application/msgpack")
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == full
+
+    response = post(client, accept="application/msgpack", compact="true", probabilities="true")
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == compact
+
+
+def test_compact_json_without_orjson(client, monkeypatch):
+    api, client = client
+    with_orjson = post(client, compact="true", probabilities="true").json()
+    monkeypatch.setattr(responses, "orjson", None)
+    assert post(client, compact="true", probabilities="true").json() == with_orjson
+
+
+def test_compact_serialization_stage_timed_by_middleware(client):
+    api, client = client
+    before = api.metrics.stage_latency.count("serialization")
+    post(client)
+    post(client, compact="true")
+    assert api.metrics.stage_latency.count("serialization") == before + 2
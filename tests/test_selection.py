@@ -0,0 +1,37 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+
+from src.models.selection import measure_latency, pareto_front, select_model
+
+
+def candidate(name, f1, latency, size):
+    return {"name": name, "f1_score": f1, "accuracy": f1, "latency_p99_us": latency, "artifact_mb": size}
+
+
+CANDIDATES = [
+    candidate("lr", 0.88, 2.0, 0.1),
+    candidate("rf", 0.86, 150.0, 30.0),   # dominé par lr
+    candidate("svm", 0.90, 40.0, 2.0),
+]
+
+
+def test_pareto_front_drops_dominated():
+    assert [c["name"] for c in pareto_front(CANDIDATES)] == ["lr", "svm"]
+
+
+def test_select_respects_latency_budget():
+    assert select_model(CANDIDATES)["name"] == "svm"
+    assert select_model(CANDIDATES, max_latency_us=10)["name"] == "lr"
+    assert select_model(CANDIDATES, max_size_mb=1)["name"] == "lr"
+    # Aucun candidat sous le budget : le plus rapide
+    assert select_model(CANDIDATES, max_latency_us=0.5)["name"] == "lr"
+
+
+def test_measure_latency_reports_percentiles():
+    rng = np.random.default_rng(0)
+    X = sp.random(300, 50, density=0.1, format="csr", random_state=0)
+    model = LogisticRegression().fit(X, rng.integers(0, 3, size=300))
+    latency = measure_latency(model, X, n_batches=5)
+    assert latency["latency_batch_size"] == 100
+    assert 0 < latency["latency_p50_us"] <= latency["latency_p99_us"]
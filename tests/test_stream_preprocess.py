@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.preprocess import TextCleaner
+from src.data.stream_preprocess import preprocess_stream, read_split
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    words = np.array(["great", "video", "boring", "song", "love", "hate", "first", "meh", "@user", "#tag"])
+    comments = [" ".join(rng.choice(words, size=rng.integers(1, 12))) for _ in range(3000)]
+    df = pd.DataFrame({"clean_comment": comments, "category": rng.choice([-1, 0, 1], size=len(comments))})
+    path = tmp_path / "raw.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_split_independent_of_chunking(raw_csv, tmp_path, fmt):
+    """Même contenu de train/test quelle que soit la taille des chunks"""
+    small = preprocess_stream(raw_csv, tmp_path / "small", chunk_size=100, fmt=fmt)
+    large = preprocess_stream(raw_csv, tmp_path / "large", chunk_size=5000, fmt=fmt)
+    assert small["counts"] == large["counts"]
+
+    for split in ("train", "test"):
+        a = read_split(tmp_path / "small" / split).sort_values(["text", "label"]).reset_index(drop=True)
+        b = read_split(tmp_path / "large" / split).sort_values(["text", "label"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(a, b)
+
+    # Les doublons de texte ne sont jamais répartis des deux côtés
+    train = set(read_split(tmp_path / "small" / "train")["text"])
+    test = set(read_split(tmp_path / "small" / "test")["text"])
+    assert not train & test
+
+
+def test_stream_matches_in_memory_cleaning(raw_csv, tmp_path):
+    """Textes et labels identiques à TextCleaner.process_dataset, proportions respectées"""
+    expected = TextCleaner().process_dataset(raw_csv, tmp_path / "clean.csv")
+    manifest = preprocess_stream(raw_csv, tmp_path / "stream", chunk_size=700)
+
+    streamed = pd.concat([read_split(tmp_path / "stream" / s) for s in ("train", "test")])
+    assert sorted(zip(streamed["text"], streamed["label"])) == sorted(zip(expected["text"], expected["label"]))
+
+    test_share = sum(manifest["counts"]["test"].values()) / manifest["rows_out"]
+    assert abs(test_share - 0.2) < 0.05
+    # Stratifié en espérance seulement : chaque classe approche la proportion
+    for label, n_test in manifest["counts"]["test"].items():
+        n_class = n_test + manifest["counts"]["train"][label]
+        assert abs(n_test / n_class - 0.2) < 0.05
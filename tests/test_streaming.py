@@ -0,0 +1,120 @@
+import asyncio
+import importlib
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.streaming import (
+    MAX_LINE_BYTES, DuplexStreamingResponse, RequestBody, StreamInputError, iter_ndjson, stream_predictions
+)
+from src.api.worker_pool import InferencePool
+from src.models.inference import SentimentResult
+
+
+async def byte_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def predict(texts):
+    """Label = longueur du texte modulo 3"""
+    labels = np.array([len(text) % 3 for text in texts])
+    probabilities = np.full((len(texts), 3), 0.1)
+    probabilities[np.arange(len(texts)), labels] = 0.8
+    return SentimentResult(labels, probabilities.max(axis=1), probabilities)
+
+
+def collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+def run_stream(chunks, chunk_size=2):
+    output = b"".join(collect(stream_predictions(byte_stream(chunks), predict, chunk_size)))
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_lines_split_across_network_chunks():
+    payload = b'{"id": "a", "text": "bonjour"}\n"salut"\n{"text": "caf\xc3\xa9"}'
+    chunks = [payload[i:i + 5] for i in range(0, len(payload), 5)]
+    assert collect(iter_ndjson(byte_stream(chunks))) == [("a", "bonjour"), (None, "salut"), (None, "café")]
+
+
+def test_oversized_line_is_rejected():
+    chunks = [b'"ok"\n', b'"' + b"x" * MAX_LINE_BYTES, b'x"\n']
+    with pytest.raises(StreamInputError, match="Ligne 2"):
+        collect(iter_ndjson(byte_stream(chunks)))
+
+
+def test_bad_line_after_valid_ones_keeps_their_predictions():
+    lines = run_stream([b'"a"\n"bb"\n"ccc"\n', b'{"oops": 1}\n"dddd"\n'], chunk_size=2)
+    # Le chunk complet (a, bb) et le chunk en cours (ccc) sont émis avant l'erreur
+    assert [line["index"] for line in lines[:-1]] == [0, 1, 2]
+    assert [line["label"] for line in lines[:-1]] == [1, 2, 0]
+    assert lines[-1]["processed"] == 3
+    assert "Ligne 4" in lines[-1]["error"]
+
+
+def test_final_statistics_line():
+    lines = run_stream([b'{"id": 7, "text": "a"}\n"bb"\n"ccc"\n'], chunk_size=2)
+    assert lines[0] == {"index": 0, "sentiment": "Neutre", "confidence": pytest.approx(0.8), "label": 1, "id": 7}
+    final = lines[-1]
+    assert final["total_comments"] == 3
+    assert final["statistics"]["negative_percentage"] == pytest.approx(33.33)
+    assert final["statistics"]["average_confidence"] == pytest.approx(0.8)
+
+
+def test_response_stops_when_client_disconnects():
+    produced = []
+
+    async def endless():
+        while True:
+            produced.append(len(produced))
+            yield b"{}\n"
+            await asyncio.sleep(0.01)
+
+    async def main():
+        messages = [{"type": "http.request", "body": b'"a"\n', "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # Le client part une fois l'upload terminé
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        body = RequestBody(receive)
+        response = DuplexStreamingResponse(endless(), request_body=body)
+        [chunk async for chunk in body]
+        await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=5)
+
+    asyncio.run(main())
+    assert 0 < len(produced) < 50
+
+
+@pytest.mark.parametrize("module_name", ["app_api", "src.api.app"])
+def test_predict_stream_endpoint(module_name, monkeypatch):
+    api = importlib.import_module(module_name)
+    monkeypatch.setattr(api, "vectorizer", object())
+    monkeypatch.setattr(api, "model", object())
+    monkeypatch.setattr(api, "inference_pool", InferencePool(kind="thread", max_workers=1, max_queue=0))
+    monkeypatch.setattr(api, "predict_cached", predict)
+
+    try:
+        response = TestClient(api.app).post(
+            "/predict_stream", content=b'"a"\n{"id": "x", "text": "bb"}\n"ccc"\n'
+        )
+    finally:
+        api.inference_pool.shutdown()
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["label"] for line in lines[:-1]] == [1, 2, 0]
+    assert lines[1]["id"] == "x"
+    assert lines[-1]["total_comments"] == 3
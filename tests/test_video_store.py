@@ -0,0 +1,95 @@
+import asyncio
+import importlib
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.video_store import VideoStore, append_comments, session_key
+from src.models.inference import SentimentResult, compute_statistics
+
+
+def fake_result(n, seed=0):
+    rng = np.random.default_rng(seed)
+    probabilities = rng.dirichlet(np.ones(3), size=n)
+    labels = probabilities.argmax(axis=1)
+    return SentimentResult(labels, probabilities[np.arange(n), labels], probabilities)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VideoStore(tmp_path / "videos.sqlite3")
+    yield store
+    store.close()
+
+
+def test_only_new_ids_are_predicted(store):
+    calls = []
+
+    async def predict(texts):
+        calls.append(list(texts))
+        return fake_result(len(texts), seed=len(calls))
+
+    first = asyncio.run(append_comments(store, "vid", [("a", "x"), ("b", "y"), ("a", "x")], predict))
+    second = asyncio.run(append_comments(store, "vid", [("b", "y"), ("c", "z")], predict))
+
+    assert calls == [["x", "y"], ["z"]]
+    assert (first["new_comments"], second["new_comments"]) == (2, 1)
+    assert [p["id"] for p in second["predictions"]] == ["b", "c"]
+    # La prédiction d'un id connu est celle stockée, pas une nouvelle
+    assert second["predictions"][0] == first["predictions"][1]
+    assert second["summary"]["total_comments"] == 3
+
+
+def test_summary_matches_full_recompute(store):
+    result = fake_result(500)
+    ids = [f"c{i}" for i in range(500)]
+    store.add_predictions("vid", ids[:300], result[:300], "v1")
+    # Les ids déjà présents ne sont pas recomptés
+    store.add_predictions("vid", ids[200:], result[200:], "v1")
+
+    summary = store.summary("vid")
+    expected = compute_statistics(result)
+    assert summary["total_comments"] == 500
+    for key in ("negative_percentage", "neutral_percentage", "positive_percentage",
+                "average_confidence", "average_entropy", "low_confidence_percentage"):
+        assert summary["statistics"][key] == pytest.approx(expected[key], abs=1e-3)
+    assert store.summary("other") is None
+
+
+def test_purge_sessions_keeps_videos_and_live_sessions(store):
+    result = fake_result(2)
+    for key in ("vid", session_key("old"), session_key("live")):
+        store.add_predictions(key, ["a", "b"], result)
+    store._conn.execute("UPDATE videos SET updated_at = 0 WHERE video_id IN (?, 'vid')", (session_key("old"),))
+    store._conn.commit()
+
+    assert store.purge_sessions() == 1
+    assert store.summary(session_key("old")) is None
+    assert store.predictions(session_key("old"), ["a", "b"]) == {}
+    assert store.summary("vid")["total_comments"] == 2
+    assert store.summary(session_key("live"))["total_comments"] == 2
+    # Une seule passe par intervalle
+    store._conn.execute("UPDATE videos SET updated_at = 0")
+    assert store.purge_sessions() == 0
+
+
+def test_duplicate_ids_in_one_batch_counted_once(store):
+    result = fake_result(4)
+    assert store.add_predictions("vid", ["a", "b", "a", "c"], result) == 3
+    assert store.add_predictions("vid", ["c", "d"], result[:2]) == 1
+    assert store.summary("vid")["total_comments"] == 4
+    assert store.predictions("vid", ["a"])["a"][0] == result.labels[0]
+
+
+@pytest.mark.parametrize("module_name", ["app_api", "src.api.app"])
+def test_summary_endpoint_rejects_session_keys(store, module_name, monkeypatch):
+    api = importlib.import_module(module_name)
+    monkeypatch.setattr(api, "video_store", store)
+    for key in ("vid", session_key("abc")):
+        store.add_predictions(key, ["a"], fake_result(1))
+
+    client = TestClient(api.app)
+    assert client.get("/videos/vid/summary").json()["total_comments"] == 1
+    assert client.get(f"/videos/{session_key('abc')}/summary").status_code == 422
+    assert client.get("/videos/unknown/summary").status_code == 404
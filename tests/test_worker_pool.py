@@ -0,0 +1,67 @@
+import asyncio
+import importlib
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.batching import MicroBatcher
+from src.api.cache import PredictionCache
+from src.api.video_store import VideoStore
+from src.api.worker_pool import InferencePool, PoolSaturatedError
+
+
+def test_full_queue_raises_pool_saturated():
+    pool = InferencePool(kind="thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        # Un batch en cours, un en attente : la file est pleine
+        running = [asyncio.ensure_future(pool.submit(release.wait)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError):
+            await pool.submit(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        pool.shutdown()
+
+    assert pool.stats()["rejected"] == 1
+    assert pool.in_flight == 0
+
+
+@pytest.mark.parametrize("module_name", ["app_api", "src.api.app"])
+def test_saturated_pool_returns_503_with_retry_after(module_name, monkeypatch, tmp_path):
+    api = importlib.import_module(module_name)
+    pool = InferencePool(kind="thread", max_workers=1, max_queue=0)
+    pool.in_flight = pool.capacity
+
+    # Sans lifespan : état minimal d'un worker démarré
+    monkeypatch.setattr(api, "vectorizer", object())
+    monkeypatch.setattr(api, "model", object())
+    monkeypatch.setattr(api, "inference_pool", pool)
+    monkeypatch.setattr(api, "batcher", MicroBatcher(api.run_inference, max_wait_ms=0))
+    monkeypatch.setattr(api, "prediction_cache", PredictionCache(max_entries=0))
+    monkeypatch.setattr(api, "video_store", VideoStore(tmp_path / "videos.sqlite3"))
+
+    client = TestClient(api.app)
+    try:
+        responses = [
+            client.post("/predict_batch", json={"comments": [{"text": "great video"}]}),
+            client.post("/videos/vid/comments", json={"comments": [{"id": "a", "text": "great video"}]}),
+            client.post("/sessions/s1/comments", json={"comments": [{"id": "a", "text": "great video"}]}),
+            # Rejeté avant le début du flux, pas en 200 avec une ligne d'erreur
+            client.post("/predict_stream", content=b'{"text": "great video"}\n')
+        ]
+    finally:
+        pool.shutdown()
+        api.video_store.close()
+
+    for response in responses:
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    assert pool.stats()["rejected"] == 4